@@ -0,0 +1 @@
+from automoonbot.moonpy.benchmark.suite import BENCHMARKS, benchmark, compare, run
@@ -0,0 +1,38 @@
+import json
+import argparse
+
+from automoonbot.moonpy.benchmark.suite import BENCHMARKS, compare, run
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="moonpy benchmark suite")
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS))
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--baseline", help="results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    results = run(args.only, args.quick)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    for entry in results["results"]:
+        if "error" in entry:
+            print(f"{entry['name']:<16} error: {entry['error']}")
+        else:
+            print(
+                f"{entry['name']:<16} {json.dumps(entry['params']):<40} "
+                f"{entry['ops_per_sec']:>14.1f} ops/s"
+            )
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        for entry in regressions:
+            ratio = entry["ratio"]
+            print(f"regression: {entry['name']} {entry['params']} x{ratio:.2f}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
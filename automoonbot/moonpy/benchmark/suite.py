@@ -0,0 +1,259 @@
+import gc
+import sys
+import json
+import time
+import platform
+import subprocess
+import numpy as np
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from automoonbot.moonpy.benchmark import synthetic
+
+BENCHMARKS: Dict[str, Callable[[bool], Iterable[Dict[str, Any]]]] = {}
+
+
+def benchmark(name: str) -> Callable:
+    """
+    Registers a generator of results under `name`, it receives whether the
+    quick sizes were requested
+    """
+
+    def register(fn: Callable) -> Callable:
+        BENCHMARKS[name] = fn
+        return fn
+
+    return register
+
+
+def measure(fn: Callable[[], Any], repeat: int = 5, warmup: int = 1) -> List[float]:
+    """
+    Wall clock seconds of `repeat` calls of `fn` after `warmup` calls, with
+    the garbage collector paused while timing
+    """
+    for _ in range(warmup):
+        fn()
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+    finally:
+        if enabled:
+            gc.enable()
+    return times
+
+
+def result(
+    params: Dict[str, Any], times: List[float], ops: int, **extra
+) -> Dict[str, Any]:
+    best = min(times)
+    return {
+        "params": params,
+        "repeat": len(times),
+        "best": best,
+        "mean": float(np.mean(times)),
+        "ops": ops,
+        "ops_per_sec": ops / best if best > 0 else float("inf"),
+        **extra,
+    }
+
+
+def graph(names: List[str], capacity: int):
+    from automoonbot.moonpy.data import HeteroGraphWrapper
+
+    wrapper = HeteroGraphWrapper()
+    wrapper.add_equities(names, capacity=capacity)
+    return wrapper
+
+
+@benchmark("graph_update")
+def graph_update(quick: bool):
+    steps = 32 if quick else 256
+    for n in (8, 32) if quick else (16, 64, 256):
+        names = synthetic.symbols(n)
+        frame = synthetic.bars(names, steps)
+
+        def run():
+            graph(names, steps).update_equities_batch(frame)
+
+        yield result({"symbols": n, "steps": steps}, measure(run, 3), len(frame))
+
+
+@benchmark("graph_add")
+def graph_add(quick: bool):
+    for n in (8, 32) if quick else (16, 64, 256):
+        names = synthetic.symbols(n)
+        times = measure(lambda: graph(names, 64), 3)
+        yield result({"symbols": n}, times, n)
+
+
+@benchmark("to_pyg")
+def to_pyg(quick: bool):
+    steps = 32 if quick else 128
+    for n in (8, 32) if quick else (16, 64, 256):
+        wrapper = graph(synthetic.symbols(n), steps)
+        wrapper.update_equities_batch(synthetic.bars(synthetic.symbols(n), steps))
+        times = measure(wrapper.to_pyg, 5)
+        yield result(
+            {"symbols": n},
+            times,
+            1,
+            nodes=wrapper.node_count(),
+            edges=wrapper.edge_count(),
+        )
+
+
+@benchmark("time_series")
+def time_series(quick: bool):
+    import moonrs
+
+    pushes, queries = (10_000, 1_000) if quick else (1_000_000, 100_000)
+    for capacity in (256, 4096):
+        push, between = moonrs.bench_time_series(capacity, 5, pushes, queries, 64)
+        yield result({"capacity": capacity, "op": "push"}, [push], pushes)
+        yield result({"capacity": capacity, "op": "between"}, [between], queries)
+
+
+@benchmark("correlation")
+def correlation(quick: bool):
+    import moonrs
+
+    repeat = 10 if quick else 1_000
+    for rows in (64, 512) if quick else (64, 512, 4096):
+        seconds = moonrs.bench_correlation(rows, 5, repeat)
+        yield result({"rows": rows, "cols": 5}, [seconds], repeat)
+
+
+@benchmark("portfolio")
+def portfolio(quick: bool):
+    from automoonbot.moonpy.session import BatchPortfolio, Portfolio
+
+    n = 64
+    for assets in (16, 256) if quick else (16, 256, 4096):
+        names = synthetic.symbols(assets)
+        single = Portfolio(names[0], names)
+        transfers = synthetic.transfers(n, assets)
+        times = measure(lambda: single.apply_transaction(transfers), 20)
+        yield result({"assets": assets, "envs": 1, "transfers": n}, times, n)
+
+        envs = 64 if quick else 1024
+        batch = BatchPortfolio(names[0], names, envs)
+        quotes = synthetic.random_walk(2, assets)[1]
+        quotes[0] = 1.0
+        batch_transfers = synthetic.transfers(n * envs, assets, envs=envs)
+
+        def step():
+            batch.update_quotes(quotes)
+            batch.transact(batch_transfers, batch.growth())
+
+        times = measure(step, 20)
+        yield result({"assets": assets, "envs": envs, "transfers": n}, times, envs)
+
+
+@benchmark("streamer")
+def streamer(quick: bool):
+    from automoonbot.moonpy.data import Streamer
+
+    items = 10_000 if quick else 200_000
+    for queue_size in (64, 4096):
+
+        def run():
+            stream = Streamer(queue_size, data=range(items), policy="block", sleep=0)
+            received = 0
+            with stream:
+                while received < items:
+                    received += len(stream.next_batch(timeout=1))
+
+        yield result({"queue_size": queue_size}, measure(run, 3, 0), items)
+
+
+@benchmark("memory_forward")
+def memory_forward(quick: bool):
+    import torch
+    from automoonbot.moonpy.model import MultiHeadMemory
+
+    torch.manual_seed(0)
+    model = MultiHeadMemory(heads=8, mem_size=256, mem_dim=64, key_dim=64, val_dim=64)
+    model.eval()
+    for batch in (1, 64) if quick else (1, 64, 1024):
+        q = torch.randn(batch, 64)
+        with torch.no_grad():
+            times = measure(lambda: model(q), 10)
+        yield result({"batch": batch}, times, batch)
+
+
+@benchmark("gat_forward")
+def gat_forward(quick: bool):
+    import torch
+    from automoonbot.moonpy.model import GATNet
+
+    torch.manual_seed(0)
+    model = GATNet(64, 32, 16) if quick else GATNet()
+    model.eval()
+    for nodes in (64, 256) if quick else (256, 1024, 4096):
+        x = torch.randn(nodes, 32)
+        edges = nodes * 8
+        edge_index = torch.randint(0, nodes, (2, edges))
+        with torch.no_grad():
+            times = measure(lambda: model(x, edge_index), 5)
+        yield result({"nodes": nodes, "edges": edges}, times, nodes)
+
+
+def metadata() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "time": time.time(),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+    }
+
+
+def run(names: Iterable[str] | None = None, quick: bool = False) -> Dict[str, Any]:
+    """
+    Runs the benchmarks in `names`, all of them by default. A benchmark that
+    fails is reported with its error instead of aborting the suite
+    """
+    results = []
+    for name in names or BENCHMARKS:
+        try:
+            for entry in BENCHMARKS[name](quick):
+                results.append({"name": name, **entry})
+        except Exception as e:
+            results.append({"name": name, "error": f"{type(e).__name__}: {e}"})
+    return {"meta": {**metadata(), "quick": quick}, "results": results}
+
+
+def key(entry: Dict[str, Any]) -> Tuple[str, str]:
+    return entry["name"], json.dumps(entry.get("params", {}), sort_keys=True)
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float = 0.1
+) -> List[Dict[str, Any]]:
+    """
+    Entries of `current` whose throughput fell more than `tolerance` below
+    the matching entry of `baseline`
+    """
+    previous = {
+        key(entry): entry for entry in baseline["results"] if "ops_per_sec" in entry
+    }
+    regressions = []
+    for entry in current["results"]:
+        before = previous.get(key(entry))
+        if before is None or "ops_per_sec" not in entry:
+            continue
+        ratio = entry["ops_per_sec"] / before["ops_per_sec"]
+        if ratio < 1.0 - tolerance:
+            regressions.append({**entry, "ratio": ratio})
+    return regressions
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+from typing import List
+
+START = 1_700_000_000
+
+
+def symbols(n: int) -> List[str]:
+    return [f"S{i:04d}" for i in range(n)]
+
+
+def random_walk(
+    steps: int, assets: int, seed: int = 0, sigma: float = 0.01
+) -> np.ndarray:
+    """
+    `(steps, assets)` geometric random walk of prices starting at 100
+    """
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0, sigma, (steps, assets))
+    return 100.0 * np.exp(np.cumsum(returns, axis=0))
+
+
+def bars(
+    names: List[str], steps: int, seed: int = 0, interval: int = 60
+) -> pd.DataFrame:
+    """
+    One OHLCV bar per symbol and step, ordered by timestamp then symbol,
+    laid out like `BarStore` rows
+    """
+    rng = np.random.default_rng(seed)
+    close = random_walk(steps, len(names), seed).reshape(-1)
+    spread = np.abs(rng.normal(0.0, 0.002, close.size)) * close
+    return pd.DataFrame(
+        {
+            "symbol": np.tile(np.array(names, dtype=object), steps),
+            "timestamp": np.repeat(START + interval * np.arange(steps), len(names)),
+            "duration": interval,
+            "adjusted": True,
+            "open": close - spread / 2,
+            "high": close + spread,
+            "low": close - spread,
+            "close": close,
+            "volume": rng.integers(100, 10_000, close.size).astype(np.float64),
+        }
+    )
+
+
+def transfers(
+    n: int, assets: int, seed: int = 0, envs: int | None = None
+) -> np.ndarray:
+    """
+    `n` valid transfers between random distinct assets, as a `TRANSFER`
+    array, or a `BATCH_TRANSFER` array spread over `envs` environments
+    """
+    from automoonbot.moonpy.session import BATCH_TRANSFER, TRANSFER
+
+    rng = np.random.default_rng(seed)
+    out = np.zeros(n, dtype=TRANSFER if envs is None else BATCH_TRANSFER)
+    out["src"] = rng.integers(0, assets, n)
+    out["tgt"] = (out["src"] + rng.integers(1, assets, n)) % assets
+    # Keeps the fractions taken from any one source below 1
+    out["size"] = rng.uniform(0.0, 1.0 / n, n)
+    if envs is not None:
+        out["env"] = rng.integers(0, envs, n)
+    return out
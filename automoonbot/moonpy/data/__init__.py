@@ -1,3 +1,13 @@
-from automoonbot.moonpy.data.database import DBInterface
-from automoonbot.moonpy.data.streamer import Streamer, DBStreamer
-from automoonbot.moonpy.data.wrapper import HeteroGraphWrapper
\ No newline at end of file
+from automoonbot.moonpy.data.database import DBInterface, BarStore
+from automoonbot.moonpy.data.cache import DiskCache, ResponseCache
+from automoonbot.moonpy.data.streamer import (
+    Streamer,
+    AsyncStreamer,
+    DBStreamer,
+    RingBuffer,
+)
+from automoonbot.moonpy.data.wrapper import HeteroGraphWrapper
+from automoonbot.moonpy.data.parsing import ColumnStore
+from automoonbot.moonpy.data.backfill import Backfill, plan_backfill
+from automoonbot.moonpy.data.shared import SharedGraphWriter, SharedGraphReader
+from automoonbot.moonpy.data.loader import NeighbourLoader
\ No newline at end of file
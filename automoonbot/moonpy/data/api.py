@@ -1,11 +1,125 @@
+import json
+import asyncio
+import aiohttp
 from yfinance import Tickers
 from requests import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable
 from pyrate_limiter import Duration, RequestRate, Limiter
-from requests_cache import CacheMixin, RedisCache, BaseCache
+from requests_cache import CacheMixin, BaseCache
 from requests_ratelimiter import LimiterMixin, MemoryQueueBucket
 
 from automoonbot.moonpy.utils import Timing
+from automoonbot.moonpy.data.cache import DiskCache, ResponseCache, cache_key, endpoint
+
+ALPHAVANTAGE_URL = "https://www.alphavantage.co/query?"
+
+
+def create_limiter(rate_limit: str) -> Limiter:
+    """
+    Limiter for a rate written as `requests/interval`, e.g. `75/minute`
+    """
+    rate, interval = rate_limit.split("/")
+    max_requests = int(rate)
+    interval_seconds = Timing.parse_interval(interval)
+    return Limiter(RequestRate(max_requests, interval_seconds * Duration.SECOND))
+
+
+def parse_response(
+    text: str, ok: bool, status_code: int, reason: str | None
+) -> Dict[str, Any]:
+    try:
+        response_json = json.loads(text)
+    except ValueError:
+        response_json = None
+    if not isinstance(response_json, dict):
+        response_json = {
+            "ok": False,
+            "status_code": status_code,
+            "error_message": reason if not ok else "Failed to parse JSON",
+            "content": text,
+        }
+        return response_json
+    response_json["ok"] = True
+    if not ok:
+        response_json["ok"] = False
+        response_json["status_code"] = status_code
+        response_json["error_message"] = reason
+    return response_json
+
+
+def cacheable(response: Dict[str, Any]) -> bool:
+    """
+    Throttled and failed calls are answered with a message instead of data
+    and must not be served from the cache
+    """
+    if not response.get("ok"):
+        return False
+    return not any(key in response for key in ("Note", "Information", "Error Message"))
+
+
+class AlphaVantageQueries:
+    """
+    Query strings of the AlphaVantage endpoints, shared by the blocking and
+    the asynchronous clients
+    """
+
+    _base_url: str
+    _api_key: str
+
+    def _intraday_url(
+        self,
+        symbol: str,
+        interval: str,
+        month: str,
+        extended_hours: bool = True,
+        outputsize: str = "full",
+    ) -> str:
+        return self._base_url + (
+            f"function=TIME_SERIES_INTRADAY"
+            f"&apikey={self._api_key}"
+            f"&symbol={symbol}"
+            f"&interval={interval}"
+            f"&month={month}"
+            f"&extended_hours={extended_hours}"
+            f"&outputsize={outputsize}"
+        )
+
+    def _interday_url(
+        self,
+        symbol: str,
+        interval: str,
+        outputsize: str = "full",
+    ) -> str:
+        return self._base_url + (
+            f"function=TIME_SERIES_{interval}_ADJUSTED"
+            f"&apikey={self._api_key}"
+            f"&symbol={symbol}"
+            f"&outputsize={outputsize}"
+        )
+
+    def _news_url(
+        self,
+        symbol: str,
+        start: str,
+        end: str,
+    ) -> str:
+        return self._base_url + (
+            "function=NEWS_SENTIMENT"
+            "&sort=RELEVANCE"
+            "&limit=1000"
+            f"&apikey={self._api_key}"
+            f"&tickers={symbol}"
+            f"&time_from={start}"
+            f"&time_to={end}"
+        )
+
+    def _options_url(self, symbol: str, date: str) -> str:
+        return self._base_url + (
+            "function=HISTORICAL_OPTIONS"
+            f"&apikey={self._api_key}"
+            f"&symbol={symbol}"
+            f"&date={date}"
+        )
 
 
 class CachedLimiterSession(CacheMixin, LimiterMixin, Session):
@@ -19,38 +133,40 @@ class CachedLimiterSession(CacheMixin, LimiterMixin, Session):
         super().__init__(
             limiter=self._create_limiter(rate_limit),
             bucket_class=MemoryQueueBucket,
-            backend=cache_backend or RedisCache(),
+            backend=cache_backend or DiskCache(),
             cache_control=True,
+            filter_fn=self._cacheable,
         )
 
         self._base_url = base_url
         self._api_key = api_key
 
     def _create_limiter(self, rate_limit: str) -> Limiter:
-        rate, interval = rate_limit.split("/")
-        max_requests = int(rate)
-        interval_seconds = Timing.parse_interval(interval)
-        return Limiter(RequestRate(max_requests, interval_seconds * Duration.SECOND))
+        return create_limiter(rate_limit)
+
+    @staticmethod
+    def _parse(response) -> Dict[str, Any]:
+        """
+        `parse_response` of `response`, kept on it so the cache filter and
+        `make_request` decode the body only once
+        """
+        parsed = getattr(response, "_parsed", None)
+        if parsed is None:
+            parsed = parse_response(
+                response.text, response.ok, response.status_code, response.reason
+            )
+            response._parsed = parsed
+        return parsed
+
+    @classmethod
+    def _cacheable(cls, response) -> bool:
+        return cacheable(cls._parse(response))
 
     def make_request(self, url: str, **kwargs) -> Dict[str, Any]:
-        response = self.get(url, **kwargs)
-        try:
-            response_json = response.json()
-        except ValueError:
-            response_json = {
-                "ok": False,
-                "error_message": "Failed to parse JSON",
-                "content": response.text,
-            }
-        response_json["ok"] = True
-        if not response.ok:
-            response_json["ok"] = False
-            response_json["status_code"] = response.status_code
-            response_json["error_message"] = response.reason
-        return response_json
+        return self._parse(self.get(url, **kwargs))
 
 
-class AlphaVantage(CachedLimiterSession):
+class AlphaVantage(AlphaVantageQueries, CachedLimiterSession):
     def __init__(
         self,
         api_key: str,
@@ -58,7 +174,7 @@ class AlphaVantage(CachedLimiterSession):
         cache_backend=None,
     ) -> None:
         super().__init__(
-            base_url="https://www.alphavantage.co/query?",
+            base_url=ALPHAVANTAGE_URL,
             api_key=api_key,
             rate_limit=rate_limit,
             cache_backend=cache_backend,
@@ -72,15 +188,7 @@ class AlphaVantage(CachedLimiterSession):
         extended_hours: bool = True,
         outputsize: str = "full",
     ) -> Dict[str, Any] | None:
-        url = self._base_url + (
-            f"function=TIME_SERIES_INTRADAY"
-            f"&apikey={self._api_key}"
-            f"&symbol={symbol}"
-            f"&interval={interval}"
-            f"&month={month}"
-            f"&extended_hours={extended_hours}"
-            f"&outputsize={outputsize}"
-        )
+        url = self._intraday_url(symbol, interval, month, extended_hours, outputsize)
         return self.make_request(url)
 
     def _asset_interday(
@@ -89,13 +197,7 @@ class AlphaVantage(CachedLimiterSession):
         interval: str,
         outputsize: str = "full",
     ) -> Dict[str, Any]:
-        url = self._base_url + (
-            f"function=TIME_SERIES_{interval}_ADJUSTED"
-            f"&apikey={self._api_key}"
-            f"&symbol={symbol}"
-            f"&outputsize={outputsize}"
-        )
-        return self.make_request(url)
+        return self.make_request(self._interday_url(symbol, interval, outputsize))
 
     def _news_sentiment(
         self,
@@ -103,22 +205,129 @@ class AlphaVantage(CachedLimiterSession):
         start: str,
         end: str,
     ) -> Dict[str, Any]:
-        url = self._base_url + (
-            "function=NEWS_SENTIMENT"
-            "&sort=RELEVANCE"
-            "&limit=1000"
-            f"&apikey={self._api_key}"
-            f"&tickers={symbol}"
-            f"&time_from={start}"
-            f"&time_to={end}"
-        )
-        return self.make_request(url)
+        return self.make_request(self._news_url(symbol, start, end))
 
     def _options_eod(self, symbol: str, date: str):
-        url = self._base_url + (
-            "function=HISTORICAL_OPTIONS"
-            f"&apikey={self._api_key}"
-            f"&symbol={symbol}"
-            f"&date={date}"
+        return self.make_request(self._options_url(symbol, date))
+
+
+class AsyncAlphaVantage(AlphaVantageQueries):
+    """
+    Asynchronous AlphaVantage client over a pooled `aiohttp` session, rate
+    limited like `AlphaVantage`. Requests for many symbols are issued
+    concurrently, at most `max_connections` at a time, and are delayed
+    rather than rejected once the rate limit is reached. Responses found in
+    `cache` skip both the limiter and the network. Use as an async context
+    manager or call `close` when done
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        rate_limit: str,
+        base_url: str = ALPHAVANTAGE_URL,
+        max_connections: int = 32,
+        timeout: float = 30,
+        cache: ResponseCache | None = None,
+    ) -> None:
+        self._base_url = base_url
+        self._cache = cache
+        self._api_key = api_key
+        self._limiter = create_limiter(rate_limit)
+        self._max_connections = max_connections
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session = None
+
+    async def __aenter__(self) -> "AsyncAlphaVantage":
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self._max_connections),
+                timeout=self._timeout,
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def make_request(self, url: str, **kwargs) -> Dict[str, Any]:
+        key = cache_key(url)
+        if self._cache is not None:
+            cached = self._cache.get(key)
+            if cached is not None:
+                return parse_response(cached.decode(), True, 200, None)
+        session = self._ensure_session()
+        async with self._limiter.ratelimit("alphavantage", delay=True):
+            async with session.get(url, **kwargs) as response:
+                text = await response.text()
+                result = parse_response(
+                    text, response.ok, response.status, response.reason
+                )
+        if self._cache is not None and cacheable(result):
+            self._cache.set(key, text.encode(), endpoint(url))
+        return result
+
+    async def _asset_intraday(
+        self,
+        symbol: str,
+        interval: str,
+        month: str,
+        extended_hours: bool = True,
+        outputsize: str = "full",
+    ) -> Dict[str, Any]:
+        url = self._intraday_url(symbol, interval, month, extended_hours, outputsize)
+        return await self.make_request(url)
+
+    async def _asset_interday(
+        self,
+        symbol: str,
+        interval: str,
+        outputsize: str = "full",
+    ) -> Dict[str, Any]:
+        return await self.make_request(self._interday_url(symbol, interval, outputsize))
+
+    async def _news_sentiment(
+        self,
+        symbol: str,
+        start: str,
+        end: str,
+    ) -> Dict[str, Any]:
+        return await self.make_request(self._news_url(symbol, start, end))
+
+    async def _options_eod(self, symbol: str, date: str) -> Dict[str, Any]:
+        return await self.make_request(self._options_url(symbol, date))
+
+    async def _fan_out(self, calls: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        results = await asyncio.gather(*calls.values())
+        return dict(zip(calls.keys(), results))
+
+    async def intraday_many(
+        self, symbols: Iterable[str], interval: str, month: str, **kwargs
+    ) -> Dict[str, Dict[str, Any]]:
+        return await self._fan_out(
+            {
+                symbol: self._asset_intraday(symbol, interval, month, **kwargs)
+                for symbol in symbols
+            }
+        )
+
+    async def news_many(
+        self, symbols: Iterable[str], start: str, end: str
+    ) -> Dict[str, Dict[str, Any]]:
+        return await self._fan_out(
+            {symbol: self._news_sentiment(symbol, start, end) for symbol in symbols}
+        )
+
+    async def options_many(
+        self, symbols: Iterable[str], date: str
+    ) -> Dict[str, Dict[str, Any]]:
+        return await self._fan_out(
+            {symbol: self._options_eod(symbol, date) for symbol in symbols}
         )
-        return self.make_request(url)
\ No newline at end of file
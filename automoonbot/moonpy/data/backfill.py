@@ -0,0 +1,136 @@
+import asyncio
+from pandas import DataFrame
+from typing import Any, Dict, Iterable, List, Tuple
+
+from automoonbot.moonpy.utils import Timing
+from automoonbot.moonpy.data.api import AsyncAlphaVantage, cacheable
+from automoonbot.moonpy.data.database import BarStore, quote
+from automoonbot.moonpy.data.parsing import ColumnStore, Columns, parse_series
+
+Chunk = Tuple[str, str]
+
+
+def plan_backfill(symbols: Iterable[str], start: str, end: str) -> List[Chunk]:
+    """
+    One `(symbol, month)` chunk per intraday request covering `[start, end]`
+    """
+    months = Timing.get_all_months(start, end)
+    return [(symbol, month) for symbol in symbols for month in months]
+
+
+def parse_intraday(payload: Dict[str, Any], symbol: str, interval: str) -> DataFrame:
+    """
+    Bars of an intraday response laid out for `BarStore.insert`
+    """
+    return to_bars(parse_series(payload), symbol, interval)
+
+
+def to_bars(columns: Columns, symbol: str, interval: str) -> DataFrame:
+    frame = DataFrame(columns)
+    frame["symbol"] = symbol
+    frame["duration"] = Timing.parse_interval(interval)
+    frame["adjusted"] = True
+    return frame
+
+
+class Backfill:
+    """
+    Fetches intraday history month by month for many symbols into a
+    `BarStore`. Chunks are fetched by a pool of `workers` tasks sharing
+    the rate limit of `client`, so throughput is bounded by that limit
+    rather than by the latency of each call. Every chunk written is
+    recorded in the store, a later run only fetches the chunks missing.
+    With `columns`, parsed months are also dumped there and read back
+    instead of fetched when the store has to be rebuilt
+    """
+
+    def __init__(
+        self,
+        client: AsyncAlphaVantage,
+        store: BarStore,
+        interval: str = "1min",
+        workers: int = 8,
+        table: str = "backfill_chunks",
+        columns: ColumnStore | None = None,
+    ) -> None:
+        self._client = client
+        self._columns = columns
+        self._store = store
+        self._interval = interval
+        self._workers = workers
+        self._table = quote(table)
+        with self._store.connection as con:
+            con.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._table} ("
+                "symbol TEXT NOT NULL, "
+                "interval TEXT NOT NULL, "
+                "month TEXT NOT NULL, "
+                "rows INTEGER NOT NULL, "
+                "PRIMARY KEY (symbol, interval, month)"
+                ") WITHOUT ROWID"
+            )
+
+    def completed(self) -> List[Chunk]:
+        rows = self._store.connection.execute(
+            f"SELECT symbol, month FROM {self._table} WHERE interval = ?",
+            [self._interval],
+        ).fetchall()
+        return [(symbol, month) for symbol, month in rows]
+
+    def pending(self, symbols: Iterable[str], start: str, end: str) -> List[Chunk]:
+        done = set(self.completed())
+        chunks = plan_backfill(symbols, start, end)
+        return [chunk for chunk in chunks if chunk not in done]
+
+    def _write(self, chunk: Chunk, frame: DataFrame) -> int:
+        symbol, month = chunk
+        written = self._store.insert(frame) if not frame.empty else 0
+        with self._store.connection as con:
+            con.execute(
+                f"INSERT OR REPLACE INTO {self._table} VALUES (?, ?, ?, ?)",
+                [symbol, self._interval, month, written],
+            )
+        return written
+
+    async def _fetch(self, chunk: Chunk) -> DataFrame | None:
+        symbol, month = chunk
+        parts = (symbol, self._interval, month)
+        if self._columns is not None and parts in self._columns:
+            return to_bars(self._columns.load(*parts), symbol, self._interval)
+        payload = await self._client._asset_intraday(symbol, self._interval, month)
+        if not cacheable(payload):
+            return None
+        columns = parse_series(payload)
+        if self._columns is not None:
+            self._columns.save(columns, *parts)
+        return to_bars(columns, symbol, self._interval)
+
+    async def run(self, symbols: Iterable[str], start: str, end: str) -> Dict[str, Any]:
+        """
+        Fetches every pending chunk, returns the number of chunks fetched,
+        the chunks that failed and will be retried by the next run, and the
+        number of bars written
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        for chunk in self.pending(symbols, start, end):
+            queue.put_nowait(chunk)
+        stats = {"fetched": 0, "failed": [], "rows": 0}
+
+        async def worker() -> None:
+            while True:
+                try:
+                    chunk = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    frame = await self._fetch(chunk)
+                except Exception:
+                    frame = None
+                if frame is None:
+                    stats["failed"].append(chunk)
+                    continue
+                stats["rows"] += self._write(chunk, frame)
+                stats["fetched"] += 1
+
+        await asyncio.gather(*(worker() for _ in range(max(self._workers, 1))))
+        return stats
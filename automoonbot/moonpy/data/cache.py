@@ -0,0 +1,260 @@
+import time
+import zlib
+import hashlib
+import threading
+from fnmatch import fnmatch
+from typing import Any, Dict, Iterator
+from urllib.parse import parse_qsl, urlsplit
+from requests_cache import BaseCache
+from requests_cache.backends.base import BaseStorage
+from requests_cache.serializers import pickle_serializer
+
+from automoonbot.moonpy.data.database import connect, quote
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Seconds a response stays fresh, keyed by `function` pattern. Past months of
+# intraday bars and end of day option chains do not change once published
+ENDPOINT_TTL = {
+    "TIME_SERIES_INTRADAY": 7 * DAY,
+    "TIME_SERIES_*_ADJUSTED": DAY,
+    "NEWS_SENTIMENT": HOUR,
+    "HISTORICAL_OPTIONS": 30 * DAY,
+}
+
+
+def endpoint(url: str) -> str:
+    """
+    The `function` query parameter of an AlphaVantage url
+    """
+    return dict(parse_qsl(urlsplit(url).query)).get("function", "")
+
+
+def cache_key(url: str) -> str:
+    """
+    Key of a request independent of the api key and of the parameter order
+    """
+    params = sorted(
+        (name, value)
+        for name, value in parse_qsl(urlsplit(url).query)
+        if name != "apikey"
+    )
+    return hashlib.sha256(repr(params).encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    Compressed payloads in a SQLite file with a time to live per endpoint.
+    Once the stored bytes exceed `max_bytes` the least recently read
+    entries are evicted. Safe to share between threads
+    """
+
+    def __init__(
+        self,
+        path: str = "http_cache.db",
+        ttl: Dict[str, float] | None = None,
+        default_ttl: float = DAY,
+        max_bytes: int = 1 << 30,
+        level: int = 6,
+        table: str = "responses",
+    ) -> None:
+        self._path = path
+        self._ttl = {**ENDPOINT_TTL, **(ttl or {})}
+        self._default_ttl = default_ttl
+        self._max_bytes = max_bytes
+        self._level = level
+        self._table = quote(table)
+        self._lock = threading.Lock()
+        self._metrics = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0}
+        self._con = connect(path, wal=True)
+        with self._con:
+            self._con.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._table} ("
+                "key TEXT PRIMARY KEY, "
+                "endpoint TEXT NOT NULL, "
+                "expires REAL NOT NULL, "
+                "accessed REAL NOT NULL, "
+                "size INTEGER NOT NULL, "
+                "payload BLOB NOT NULL"
+                ")"
+            )
+            self._con.execute(
+                f"CREATE INDEX IF NOT EXISTS {quote(table + '_accessed_idx')} "
+                f"ON {self._table} (accessed)"
+            )
+        row = self._con.execute(f"SELECT SUM(size) FROM {self._table}").fetchone()
+        self._bytes = row[0] or 0
+
+    def ttl(self, function: str) -> float:
+        for pattern, seconds in self._ttl.items():
+            if fnmatch(function, pattern):
+                return seconds
+        return self._default_ttl
+
+    def get(self, key: str) -> bytes | None:
+        now = time.time()
+        with self._lock:
+            row = self._con.execute(
+                f"SELECT expires, payload FROM {self._table} WHERE key = ?", [key]
+            ).fetchone()
+            if row is None:
+                self._metrics["misses"] += 1
+                return None
+            expires, payload = row
+            if expires <= now:
+                self._metrics["misses"] += 1
+                self._metrics["expired"] += 1
+                self._delete(key)
+                return None
+            with self._con:
+                self._con.execute(
+                    f"UPDATE {self._table} SET accessed = ? WHERE key = ?", [now, key]
+                )
+            self._metrics["hits"] += 1
+        return zlib.decompress(payload)
+
+    def set(self, key: str, value: bytes, function: str = "") -> None:
+        now = time.time()
+        payload = zlib.compress(value, self._level)
+        with self._lock:
+            self._delete(key)
+            with self._con:
+                expires = now + self.ttl(function)
+                self._con.execute(
+                    f"INSERT INTO {self._table} VALUES (?, ?, ?, ?, ?, ?)",
+                    [key, function, expires, now, len(payload), payload],
+                )
+            self._bytes += len(payload)
+            self._evict()
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._delete(key)
+
+    def _delete(self, key: str) -> bool:
+        with self._con:
+            row = self._con.execute(
+                f"DELETE FROM {self._table} WHERE key = ? RETURNING size", [key]
+            ).fetchone()
+        if row is None:
+            return False
+        self._bytes -= row[0]
+        return True
+
+    def _evict(self) -> None:
+        """
+        Drops expired entries, then the least recently read ones, until the
+        cache fits within `max_bytes`
+        """
+        if self._bytes <= self._max_bytes:
+            return
+        with self._con:
+            rows = self._con.execute(
+                f"DELETE FROM {self._table} WHERE expires <= ? RETURNING size",
+                [time.time()],
+            ).fetchall()
+            self._bytes -= sum(size for size, in rows)
+            self._metrics["expired"] += len(rows)
+            cursor = self._con.execute(
+                f"SELECT key, size FROM {self._table} ORDER BY accessed"
+            )
+            evict = []
+            for key, size in cursor:
+                if self._bytes <= self._max_bytes:
+                    break
+                evict.append((key,))
+                self._bytes -= size
+            cursor.close()
+            self._con.executemany(f"DELETE FROM {self._table} WHERE key = ?", evict)
+            self._metrics["evicted"] += len(evict)
+
+    def keys(self) -> Iterator[str]:
+        with self._lock:
+            rows = self._con.execute(f"SELECT key FROM {self._table}").fetchall()
+        return (key for key, in rows)
+
+    def clear(self) -> None:
+        with self._lock, self._con:
+            self._con.execute(f"DELETE FROM {self._table}")
+            self._bytes = 0
+
+    def close(self) -> None:
+        self._con.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            row = self._con.execute(f"SELECT COUNT(*) FROM {self._table}").fetchone()
+        return row[0]
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            row = self._con.execute(
+                f"SELECT expires FROM {self._table} WHERE key = ?", [key]
+            ).fetchone()
+        return row is not None and row[0] > time.time()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._metrics["hits"] + self._metrics["misses"]
+        return {
+            **self._metrics,
+            "hit_rate": self._metrics["hits"] / lookups if lookups else 0.0,
+            "entries": len(self),
+            "bytes": self._bytes,
+        }
+
+
+class ResponseStorage(BaseStorage):
+    """
+    `requests_cache` storage of pickled responses in a `ResponseCache`
+    """
+
+    def __init__(self, cache: ResponseCache, **kwargs) -> None:
+        super().__init__(serializer=pickle_serializer, **kwargs)
+        self.cache = cache
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.cache.get(key)
+        if value is None:
+            raise KeyError(key)
+        return self.deserialize(key, value)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        function = endpoint(getattr(value, "url", "") or "")
+        self.cache.set(key, self.serialize(value), function)
+
+    def __delitem__(self, key: str) -> None:
+        if not self.cache.delete(key):
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return self.cache.keys()
+
+    def __len__(self) -> int:
+        return len(self.cache)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.cache
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    def close(self) -> None:
+        self.cache.close()
+
+
+class DiskCache(BaseCache):
+    """
+    Local `requests_cache` backend over a `ResponseCache`, needs no server
+    """
+
+    def __init__(self, cache_name: str = "http_cache.db", **kwargs) -> None:
+        super().__init__(cache_name=cache_name)
+        self.responses = ResponseStorage(ResponseCache(cache_name, **kwargs))
+
+    @property
+    def db_path(self) -> str:
+        return self.cache_name
+
+    def stats(self) -> Dict[str, Any]:
+        return self.responses.cache.stats()
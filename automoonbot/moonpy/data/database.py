@@ -1,11 +1,65 @@
+import re
 import sqlite3
 import pandas as pd
 import datetime as dt
 from pandas import DataFrame
-from typing import List
+from typing import Any, Iterable, Iterator, List, Sequence, Tuple
+
+IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def quote(identifier: str) -> str:
+    """
+    Quotes a table or column name for interpolation into a statement,
+    names that are not plain identifiers are rejected
+    """
+    if not IDENTIFIER.match(identifier):
+        raise ValueError(f"invalid identifier: {identifier!r}")
+    return f'"{identifier}"'
+
+
+def connect(database: str, wal: bool = False) -> sqlite3.Connection:
+    """
+    Connection shareable between threads. With `wal` the database is
+    switched to write-ahead logging, which persists in the file, so only
+    stores that own their database should ask for it
+    """
+    try:
+        con = sqlite3.connect(
+            database=database,
+            check_same_thread=False,
+        )
+    except sqlite3.Error as e:
+        raise AttributeError(
+            f"an error occurred while connecting to the database: {e}"
+        )
+    if wal:
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=NORMAL")
+    return con
+
+
+def to_epoch(value: dt.datetime | int | float) -> int:
+    if isinstance(value, dt.datetime):
+        return int(value.timestamp())
+    return int(value)
+
+
+def read_chunks(cursor: sqlite3.Cursor, chunksize: int) -> Iterator[DataFrame]:
+    columns = [column[0] for column in cursor.description]
+    while True:
+        rows = cursor.fetchmany(chunksize)
+        if not rows:
+            return
+        yield DataFrame.from_records(rows, columns=columns)
 
 
 class DBInterface:
+    """
+    Read-only queries over existing `tables` keyed by their `index` column,
+    the database itself is left as found
+    """
+
     def __init__(
         self,
         database: str,
@@ -23,15 +77,9 @@ class DBInterface:
         self._step = step
         self._stops = stops
 
-        try:
-            self._con = sqlite3.connect(
-                database=database,
-                check_same_thread=False,
-            )
-        except sqlite3.Error as e:
-            raise AttributeError(
-                f"an error occurred while connecting to the database: {e}"
-            )
+        for name in (index, *tables):
+            quote(name)
+        self._con = connect(database)
 
     @property
     def starts(self) -> dt.datetime | int:
@@ -58,46 +106,199 @@ class DBInterface:
         self._stops = value
 
     def incr(self, steps: int = 1) -> None:
-        start = steps * self.step
-        if start >= self.stops:
+        start = self.starts + steps * self.step
+        if self.stops is not None and start >= self.stops:
             return
         self.starts = start
 
+    def _select(self, condition: str, table: str | None) -> str:
+        tables = [table] if table else self._tables
+        return " UNION ALL ".join(
+            f"SELECT * FROM {quote(table)} WHERE {quote(self._index)} {condition}"
+            for table in tables
+        )
+
+    def _read(
+        self, query: str, params: Sequence[Any], chunksize: int | None
+    ) -> DataFrame | Iterator[DataFrame] | None:
+        if chunksize:
+            return read_chunks(self._con.execute(query, params), chunksize)
+        data = pd.read_sql(sql=query, con=self._con, params=list(params))
+        if not data.empty:
+            return data
+        return None
+
     def get_one(
         self,
         value: str,
         table: str | None = None,
     ) -> DataFrame | None:
-        if table:
-            query = f"SELECT * FROM {table} WHERE ? = ?"
-        else:
-            query = " UNION ".join(
-                [
-                    f"SELECT * FROM {table} AS table WHERE ? = ?"
-                    for table in self._tables
-                ]
-            )
-        data = pd.read_sql(sql=query, con=self._con, params=[self._index, value])
-        if not data.empty:
-            return data
-        return None
+        query = self._select("= ?", table)
+        params = [value] * (1 if table else len(self._tables))
+        return self._read(query, params, None)
 
     def get_between(
         self,
         start: str,
         end: str,
         table: str | None = None,
-    ) -> DataFrame | None:
-        if table:
-            query = f"SELECT * FROM {table} WHERE ? BETWEEN ? AND ?"
-        else:
-            query = " UNION ".join(
-                [
-                    f"SELECT * FROM {table} AS table WHERE ? BETWEEN ? AND ?"
-                    for table in self._tables
-                ]
+        chunksize: int | None = None,
+    ) -> DataFrame | Iterator[DataFrame] | None:
+        """
+        Rows whose index lies within `[start, end]`, as one frame or, with
+        `chunksize`, as an iterator of frames read lazily from the cursor
+        """
+        query = self._select("BETWEEN ? AND ?", table)
+        params = [start, end] * (1 if table else len(self._tables))
+        return self._read(query, params, chunksize)
+
+
+class BarStore:
+    """
+    OHLCV bars keyed by `(symbol, timestamp)`, timestamps are unix seconds.
+    The key is the clustered primary key of the table, so a range of bars
+    of one symbol is an index seek followed by a sequential read
+    """
+
+    columns = (
+        "symbol",
+        "timestamp",
+        "duration",
+        "adjusted",
+        "open",
+        "high",
+        "low",
+        "close",
+        "volume",
+    )
+
+    def __init__(self, database: str, table: str = "bars") -> None:
+        self._db = database
+        self._table = quote(table)
+        self._con = connect(database, wal=True)
+        with self._con:
+            self._con.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._table} ("
+                "symbol TEXT NOT NULL, "
+                "timestamp INTEGER NOT NULL, "
+                "duration INTEGER NOT NULL DEFAULT 60, "
+                "adjusted INTEGER NOT NULL DEFAULT 1, "
+                "open REAL, high REAL, low REAL, close REAL, volume REAL, "
+                "PRIMARY KEY (symbol, timestamp)"
+                ") WITHOUT ROWID"
             )
-        data = pd.read_sql(sql=query, con=self._con, params=[self._index, start, end])
-        if not data.empty:
-            return data
-        return None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        return self._con
+
+    def close(self) -> None:
+        self._con.close()
+
+    def insert_rows(self, rows: Iterable[Tuple]) -> int:
+        """
+        Upserts rows laid out as `columns` in a single transaction, returns
+        the number of rows written
+        """
+        names = ", ".join(self.columns)
+        marks = ", ".join("?" * len(self.columns))
+        with self._con:
+            cursor = self._con.executemany(
+                f"INSERT OR REPLACE INTO {self._table} ({names}) VALUES ({marks})",
+                rows,
+            )
+        return cursor.rowcount
+
+    def insert(self, frame: DataFrame, duration: int = 60) -> int:
+        """
+        Upserts a frame with `symbol`, `timestamp`, `open`, `high`, `low`,
+        `close` and `volume` columns, `duration` and `adjusted` are optional.
+        Timestamps are unix seconds or datetimes
+        """
+        if frame.empty:
+            return 0
+        timestamps = frame["timestamp"]
+        if pd.api.types.is_datetime64_any_dtype(timestamps):
+            epoch = pd.Timestamp(0, tz=timestamps.dt.tz)
+            timestamps = (timestamps - epoch) // pd.Timedelta(seconds=1)
+        defaults = {"duration": duration, "adjusted": True}
+        columns = {
+            "symbol": frame["symbol"].astype(str),
+            "timestamp": timestamps.astype("int64"),
+        }
+        for column, default in defaults.items():
+            values = frame.get(column, pd.Series(default, index=frame.index))
+            columns[column] = values.astype("int64")
+        for column in ("open", "high", "low", "close", "volume"):
+            columns[column] = frame[column].astype("float64")
+        rows = zip(*(columns[column].tolist() for column in self.columns))
+        return self.insert_rows(rows)
+
+    def _range(
+        self,
+        symbols: str | Sequence[str],
+        start: dt.datetime | int,
+        end: dt.datetime | int,
+    ) -> sqlite3.Cursor:
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        marks = ", ".join("?" * len(symbols))
+        query = (
+            f"SELECT {', '.join(self.columns)} FROM {self._table} "
+            f"WHERE symbol IN ({marks}) AND timestamp BETWEEN ? AND ? "
+            "ORDER BY timestamp, symbol"
+        )
+        return self._con.execute(query, [*symbols, to_epoch(start), to_epoch(end)])
+
+    def cursor(
+        self,
+        symbols: str | Sequence[str],
+        start: dt.datetime | int,
+        end: dt.datetime | int,
+    ) -> sqlite3.Cursor:
+        """
+        Open cursor over the bars of `symbols` within `[start, end]` in time
+        order, for callers that fetch rows incrementally
+        """
+        return self._range(symbols, start, end)
+
+    def between(
+        self,
+        symbols: str | Sequence[str],
+        start: dt.datetime | int,
+        end: dt.datetime | int,
+    ) -> DataFrame:
+        cursor = self._range(symbols, start, end)
+        return DataFrame.from_records(cursor.fetchall(), columns=list(self.columns))
+
+    def iter_between(
+        self,
+        symbols: str | Sequence[str],
+        start: dt.datetime | int,
+        end: dt.datetime | int,
+        chunksize: int = 10_000,
+    ) -> Iterator[DataFrame]:
+        """
+        Same rows as `between`, read `chunksize` rows at a time
+        """
+        return read_chunks(self._range(symbols, start, end), chunksize)
+
+    def latest(self, symbol: str) -> int | None:
+        row = self._con.execute(
+            f"SELECT MAX(timestamp) FROM {self._table} WHERE symbol = ?", [symbol]
+        ).fetchone()
+        return row[0] if row else None
+
+    def symbols(self) -> List[str]:
+        query = f"SELECT DISTINCT symbol FROM {self._table}"
+        rows = self._con.execute(query).fetchall()
+        return [row[0] for row in rows]
+
+    def count(self, symbol: str | None = None) -> int:
+        if symbol is None:
+            row = self._con.execute(f"SELECT COUNT(*) FROM {self._table}").fetchone()
+        else:
+            row = self._con.execute(
+                f"SELECT COUNT(*) FROM {self._table} WHERE symbol = ?", [symbol]
+            ).fetchone()
+        return row[0]
@@ -0,0 +1,42 @@
+import numpy as np
+from typing import Any, Iterator, List
+
+
+class NeighbourLoader:
+    """
+    Mini-batches over the named `seeds`, each yielded as the `HeteroData`
+    of its sampled neighbourhood, see `HeteroGraphWrapper.sample`. A batch
+    holds at most `batch_size` seeds and their fanned out neighbours, so
+    its size does not depend on the size of the graph. With `shuffle` the
+    seeds are reordered on every pass, and every batch is sampled with its
+    own seed, drawn from `seed`
+    """
+
+    def __init__(
+        self,
+        graph: Any,
+        seeds: List[str],
+        fanouts: List[int],
+        batch_size: int = 64,
+        shuffle: bool = False,
+        seed: int = 0,
+    ) -> None:
+        assert batch_size > 0, "batch_size must be positive"
+        self.graph = graph
+        self.seeds = list(seeds)
+        self.fanouts = list(fanouts)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self) -> int:
+        return -(-len(self.seeds) // self.batch_size)
+
+    def __iter__(self) -> Iterator[Any]:
+        order = np.arange(len(self.seeds))
+        if self.shuffle:
+            self._rng.shuffle(order)
+        seeds = self._rng.integers(0, 2**63, size=len(self), dtype=np.uint64)
+        for batch, start in enumerate(range(0, len(order), self.batch_size)):
+            names = [self.seeds[i] for i in order[start : start + self.batch_size]]
+            yield self.graph.sample(names, self.fanouts, int(seeds[batch]))
@@ -0,0 +1,184 @@
+import os
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:
+    pa = None
+
+Columns = Dict[str, np.ndarray]
+
+BAR_FIELDS = ("open", "high", "low", "close", "volume")
+NEWS_FIELDS = ("overall_sentiment_score",)
+TICKER_FIELDS = ("relevance_score", "ticker_sentiment_score")
+OPTION_FIELDS = (
+    "strike",
+    "last",
+    "mark",
+    "bid",
+    "bid_size",
+    "ask",
+    "ask_size",
+    "volume",
+    "open_interest",
+    "implied_volatility",
+    "delta",
+    "gamma",
+    "theta",
+    "vega",
+    "rho",
+)
+OPTION_LABELS = ("contractID", "symbol", "type")
+
+
+def field_name(key: str) -> str:
+    """
+    `"5. adjusted close"` -> `"adjusted_close"`
+    """
+    return key.split(". ", 1)[-1].replace(" ", "_")
+
+
+def to_epoch(values: List[str], timezone: str | None = None, **kwargs) -> np.ndarray:
+    """
+    Unix seconds of date strings, naive ones are taken in `timezone`
+    """
+    index = pd.to_datetime(values, **kwargs)
+    if timezone is not None and index.tz is None:
+        index = index.tz_localize(
+            timezone, ambiguous=False, nonexistent="shift_forward"
+        )
+    elif index.tz is not None:
+        index = index.tz_convert("UTC")
+    return index.as_unit("s").asi8.astype(np.int64, copy=False)
+
+
+def to_floats(values: List[Any]) -> np.ndarray:
+    """
+    Float column of numeric strings, missing and unparsable values are NaN
+    """
+    return pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(
+        dtype=np.float64
+    )
+
+
+def series_key(payload: Dict[str, Any]) -> str | None:
+    for key in payload:
+        if "Time Series" in key:
+            return key
+    return None
+
+
+def parse_series(payload: Dict[str, Any]) -> Columns:
+    """
+    Columns of an intraday or interday time series response: `timestamp` in
+    unix seconds of the exchange time zone given in the metadata, and one
+    float column per field, sorted by time
+    """
+    key = series_key(payload)
+    series = payload.get(key) if key else None
+    if not series:
+        return {
+            "timestamp": np.empty(0, dtype=np.int64),
+            **{field: np.empty(0, dtype=np.float64) for field in BAR_FIELDS},
+        }
+    meta = payload.get("Meta Data", {})
+    timezone = next(
+        (value for name, value in meta.items() if name.endswith("Time Zone")),
+        "US/Eastern",
+    )
+    fields = next(iter(series.values())).keys()
+    # One row per bar, numpy parses the numeric strings of the whole block
+    values = np.array([list(bar.values()) for bar in series.values()])
+    columns = {"timestamp": to_epoch(list(series.keys()), timezone)}
+    for j, field in enumerate(fields):
+        columns[field_name(field)] = values[:, j].astype(np.float64)
+    order = np.argsort(columns["timestamp"], kind="stable")
+    return {name: column[order] for name, column in columns.items()}
+
+
+def parse_news(payload: Dict[str, Any]) -> Dict[str, Columns]:
+    """
+    Columns of a news sentiment response, `articles` has one row per
+    article and `tickers` one row per ticker mentioned in an article,
+    linked by the `article` row number
+    """
+    feed = payload.get("feed", [])
+    articles = {
+        "timestamp": to_epoch(
+            [item["time_published"] for item in feed], "UTC", format="%Y%m%dT%H%M%S"
+        ),
+        "title": np.array([item.get("title", "") for item in feed], dtype=object),
+        "url": np.array([item.get("url", "") for item in feed], dtype=object),
+        "source": np.array([item.get("source", "") for item in feed], dtype=object),
+    }
+    for field in NEWS_FIELDS:
+        articles[field] = to_floats([item.get(field) for item in feed])
+    mentions = [
+        (i, ticker)
+        for i, item in enumerate(feed)
+        for ticker in item.get("ticker_sentiment", [])
+    ]
+    tickers = {
+        "article": np.array([i for i, _ in mentions], dtype=np.int64),
+        "ticker": np.array([t.get("ticker", "") for _, t in mentions], dtype=object),
+    }
+    for field in TICKER_FIELDS:
+        tickers[field] = to_floats([t.get(field) for _, t in mentions])
+    return {"articles": articles, "tickers": tickers}
+
+
+def parse_options(payload: Dict[str, Any]) -> Columns:
+    """
+    Columns of a historical options response, dates are unix seconds
+    """
+    data = payload.get("data", [])
+    columns = {
+        label: np.array([row.get(label, "") for row in data], dtype=object)
+        for label in OPTION_LABELS
+    }
+    for field in ("date", "expiration"):
+        columns[field] = to_epoch([row.get(field) for row in data], format="%Y-%m-%d")
+    for field in OPTION_FIELDS:
+        columns[field] = to_floats([row.get(field) for row in data])
+    return columns
+
+
+class ColumnStore:
+    """
+    Parsed columns dumped as Arrow IPC files under `root`, read back through
+    a memory map so a month already parsed is neither fetched nor parsed
+    again. Requires `pyarrow`
+    """
+
+    def __init__(self, root: str) -> None:
+        if pa is None:
+            raise ImportError("ColumnStore requires pyarrow")
+        self._root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, *parts: str) -> str:
+        return os.path.join(self._root, "-".join(parts) + ".arrow")
+
+    def __contains__(self, parts: tuple) -> bool:
+        return os.path.exists(self.path(*parts))
+
+    def save(self, columns: Columns, *parts: str) -> str:
+        path = self.path(*parts)
+        table = pa.table({name: pa.array(column) for name, column in columns.items()})
+        partial = path + ".partial"
+        with pa.OSFile(partial, "wb") as sink:
+            with ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(partial, path)
+        return path
+
+    def load(self, *parts: str) -> Columns | None:
+        path = self.path(*parts)
+        if not os.path.exists(path):
+            return None
+        # The arrays keep the map open, their buffers are backed by the file
+        table = ipc.open_file(pa.memory_map(path, "r")).read_all()
+        return {name: table.column(name).to_numpy() for name in table.column_names}
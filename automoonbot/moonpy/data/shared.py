@@ -0,0 +1,270 @@
+import os
+import sys
+import json
+import mmap
+import time
+import uuid
+import warnings
+import numpy as np
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Tuple
+
+try:
+    import _posixshmem
+except ImportError:
+    _posixshmem = None
+
+# Bytes reserved for the header and the manifest of a published graph
+CONTROL_SIZE = 1 << 16
+# Offset of every array within a data segment
+ALIGN = 64
+# Version counter and manifest length ahead of the manifest itself
+HEADER = np.dtype([("sequence", "<i8"), ("length", "<i8")])
+
+Arrays = Dict[Any, np.ndarray]
+
+
+def _key(relation: Any) -> Any:
+    return list(relation) if isinstance(relation, tuple) else relation
+
+
+def _relation(key: Any) -> Any:
+    return tuple(key) if isinstance(key, list) else key
+
+
+class _Attached(SharedMemory):
+    """
+    Existing segment mapped the way `SharedMemory` does it, minus the
+    registration with the resource tracker
+    """
+
+    def __init__(self, name: str) -> None:
+        if _posixshmem is None:
+            # No tracker outside POSIX, the segment lives while it is mapped
+            super().__init__(name=name)
+            return
+        self._name = "/" + name if self._prepend_leading_slash else name
+        self._fd = _posixshmem.shm_open(self._name, os.O_RDWR, mode=self._mode)
+        try:
+            self._size = os.fstat(self._fd).st_size
+            self._mmap = mmap.mmap(self._fd, self._size)
+        except OSError:
+            os.close(self._fd)
+            self._fd = -1
+            raise
+        self._buf = memoryview(self._mmap)
+
+
+def _attach(name: str) -> SharedMemory:
+    """
+    Opens an existing segment without handing it to the resource tracker,
+    which would otherwise unlink it when this process exits. Unregistering
+    afterwards is not an option, processes spawned by the writer share its
+    tracker and would drop the writer's own entry
+    """
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+    return _Attached(name)
+
+
+def _release(shm: SharedMemory) -> bool:
+    """
+    Closes `shm` unless arrays still point into it
+    """
+    try:
+        shm.close()
+        return True
+    except BufferError:
+        return False
+
+
+class SharedGraphWriter:
+    """
+    Publishes the `x`, `edge_index` and `edge_attr` arrays of a graph into
+    named shared memory, for readers in other processes to map without a
+    copy. Two data segments are written in turn, so the arrays of the
+    previous version stay intact while the next one is written. A segment
+    too small for a graph is replaced by a larger one under a new name.
+
+    The control segment `name` holds a sequence number, odd while a
+    version is being written, followed by a JSON manifest of the arrays
+    """
+
+    def __init__(self, name: str | None = None, capacity: int = 1 << 20) -> None:
+        self.name = name or f"moon-{uuid.uuid4().hex[:12]}"
+        self._capacity = capacity
+        self._control = SharedMemory(name=self.name, create=True, size=CONTROL_SIZE)
+        self._header = np.ndarray((), dtype=HEADER, buffer=self._control.buf)
+        self._header[()] = (0, 0)
+        self._slots: List[SharedMemory | None] = [None, None]
+        self._generation = 0
+
+    @property
+    def version(self) -> int:
+        return int(self._header["sequence"]) // 2
+
+    def _segment(self, slot: int, size: int) -> SharedMemory:
+        shm = self._slots[slot]
+        if shm is None or shm.size < size:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+            self._generation += 1
+            shm = SharedMemory(
+                name=f"{self.name}-{slot}-{self._generation}",
+                create=True,
+                size=max(size + size // 2, self._capacity),
+            )
+            self._slots[slot] = shm
+        return shm
+
+    def publish(self, x: Arrays, edge_index: Arrays, edge_attr: Arrays) -> int:
+        """
+        Copies the arrays into the next slot and publishes them as a new
+        version, which is returned
+        """
+        groups = {"x": x, "edge_index": edge_index, "edge_attr": edge_attr}
+        layout, size = [], 0
+        for group, arrays in groups.items():
+            for key, array in arrays.items():
+                array = np.ascontiguousarray(array)
+                size = -(-size // ALIGN) * ALIGN
+                layout.append((group, key, array, size))
+                size += array.nbytes
+
+        sequence = int(self._header["sequence"])
+        slot = (sequence // 2 + 1) % 2
+        shm = self._segment(slot, max(size, 1))
+        entries = [
+            [group, _key(key), array.dtype.str, list(array.shape), offset]
+            for group, key, array, offset in layout
+        ]
+        manifest = json.dumps({"segment": shm.name, "arrays": entries}).encode()
+        if HEADER.itemsize + len(manifest) > CONTROL_SIZE:
+            raise ValueError(f"manifest of {len(manifest)} bytes does not fit")
+
+        self._header["sequence"] = sequence + 1
+        for _, _, array, offset in layout:
+            view = np.ndarray(array.shape, array.dtype, buffer=shm.buf, offset=offset)
+            view[...] = array
+        self._control.buf[HEADER.itemsize : HEADER.itemsize + len(manifest)] = manifest
+        self._header["length"] = len(manifest)
+        self._header["sequence"] = sequence + 2
+        return self.version
+
+    def close(self) -> None:
+        """
+        Releases every segment, readers keep the mappings they hold
+        """
+        self._header = None
+        for shm in [*self._slots, self._control]:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+        self._slots = [None, None]
+
+    def __enter__(self) -> "SharedGraphWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class SharedGraphReader:
+    """
+    Maps the graph published by a `SharedGraphWriter` as read-only arrays.
+    The arrays of a version stay valid until the writer starts the version
+    after the next, which `valid` tells
+    """
+
+    def __init__(self, name: str, timeout: float = 5.0) -> None:
+        self.name = name
+        self._timeout = timeout
+        self._control = _attach(name)
+        self._header = np.ndarray((), dtype=HEADER, buffer=self._control.buf)
+        self._segments: Dict[str, SharedMemory] = {}
+        self._retired: List[SharedMemory] = []
+
+    @property
+    def version(self) -> int:
+        return int(self._header["sequence"]) // 2
+
+    def valid(self, version: int) -> bool:
+        """
+        Whether arrays read at `version` have not been overwritten yet
+        """
+        return int(self._header["sequence"]) <= 2 * (version + 1)
+
+    def _manifest(self) -> Tuple[int, Dict[str, Any]]:
+        deadline = time.monotonic() + self._timeout
+        while True:
+            sequence = int(self._header["sequence"])
+            if sequence % 2 == 0 and sequence > 0:
+                end = HEADER.itemsize + int(self._header["length"])
+                raw = bytes(self._control.buf[HEADER.itemsize : end])
+                if int(self._header["sequence"]) == sequence:
+                    return sequence // 2, json.loads(raw)
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"no graph published under {self.name}")
+            time.sleep(0)
+
+    def _segment(self, name: str) -> SharedMemory:
+        if name not in self._segments:
+            live = {name, *list(self._segments)[-1:]}
+            for old in [old for old in self._segments if old not in live]:
+                self._retired.append(self._segments.pop(old))
+            self._retired = [shm for shm in self._retired if not _release(shm)]
+            self._segments[name] = _attach(name)
+        return self._segments[name]
+
+    def read(self) -> Tuple[int, Arrays, Arrays, Arrays]:
+        """
+        The latest version with its `x`, `edge_index` and `edge_attr` arrays,
+        mapped without a copy
+        """
+        while True:
+            version, manifest = self._manifest()
+            shm = self._segment(manifest["segment"])
+            groups: Dict[str, Arrays] = {"x": {}, "edge_index": {}, "edge_attr": {}}
+            for group, key, dtype, shape, offset in manifest["arrays"]:
+                view = np.ndarray(shape, np.dtype(dtype), buffer=shm.buf, offset=offset)
+                view.flags.writeable = False
+                groups[group][_relation(key)] = view
+            if self.valid(version):
+                return version, groups["x"], groups["edge_index"], groups["edge_attr"]
+
+    def to_pyg(self) -> Tuple[int, Any]:
+        """
+        The latest version as `HeteroData`, tensors share the mapped memory
+        and must not be written to
+        """
+        import torch
+        from torch_geometric.data import HeteroData
+
+        version, x, edge_index, edge_attr = self.read()
+        data = HeteroData()
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", message=".*not writable.*")
+            for cls, feature in x.items():
+                data[cls].x = torch.from_numpy(feature)
+            for relation, index in edge_index.items():
+                data[relation].edge_index = torch.from_numpy(index)
+            for relation, attr in edge_attr.items():
+                data[relation].edge_attr = torch.from_numpy(attr)
+        return version, data
+
+    def close(self) -> None:
+        """
+        Unmaps every segment, arrays still held keep theirs alive
+        """
+        self._header = None
+        for shm in [*self._segments.values(), *self._retired, self._control]:
+            _release(shm)
+        self._segments.clear()
+        self._retired = []
+
+    def __enter__(self) -> "SharedGraphReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -1,14 +1,155 @@
 import time
+import asyncio
+import sqlite3
+import calendar
 import threading
 import datetime as dt
 from pandas import DataFrame
-from queue import Queue, Empty, Full
-from typing import List, Any, Iterable
+from collections import deque
+from queue import Empty
+from typing import Dict, List, Any, Iterable, Tuple
+from collections.abc import AsyncIterable, AsyncIterator
 
-from automoonbot.moonpy.data import DBInterface
+from automoonbot.moonpy.data.database import DBInterface, quote
+
+
+class RingBuffer:
+    """
+    Bounded FIFO hand-off between one producer and its consumers. Items
+    are moved in batches under a single lock acquisition, and what happens
+    to a put on a full buffer is set by `policy`:
+
+    - `block` waits for room, up to `timeout`
+    - `drop-oldest` evicts the oldest queued item
+    - `coalesce-latest` replaces the newest queued item, so the backlog is
+      kept and only the latest of the overflowing items survives
+
+    Every item is stamped on entry, the time it spent queued is reported by
+    `stats` along with the number of items dropped or coalesced
+    """
+
+    policies = {"block", "drop-oldest", "coalesce-latest"}
+
+    def __init__(self, capacity: int, policy: str = "drop-oldest") -> None:
+        assert capacity > 0, "capacity must be positive"
+        assert (
+            policy in self.__class__.policies
+        ), f"invalid policy, must be one of {self.__class__.policies}"
+        self._capacity = capacity
+        self._policy = policy
+        self._items = deque()
+        self._cond = threading.Condition(threading.Lock())
+        self._produced = 0
+        self._consumed = 0
+        self._dropped = 0
+        self._coalesced = 0
+        self._latency = 0.0
+        self._latency_max = 0.0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def policy(self) -> str:
+        return self._policy
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def full(self) -> bool:
+        return len(self._items) >= self._capacity
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def put(self, item: Any, timeout: float | None = None) -> bool:
+        return self.put_many((item,), timeout) == 1
+
+    def put_many(self, items: Iterable[Any], timeout: float | None = None) -> int:
+        """
+        Queues `items` in order, returns how many were accepted. Only the
+        `block` policy can refuse items, when no room frees up in `timeout`
+        """
+        accepted = 0
+        with self._cond:
+            for item in items:
+                if len(self._items) >= self._capacity:
+                    if self._policy == "drop-oldest":
+                        self._items.popleft()
+                        self._dropped += 1
+                    elif self._policy == "coalesce-latest":
+                        self._items.pop()
+                        self._coalesced += 1
+                    elif not self._cond.wait_for(self._has_room, timeout):
+                        break
+                self._items.append((time.perf_counter(), item))
+                accepted += 1
+            self._produced += accepted
+            if accepted:
+                self._cond.notify_all()
+        return accepted
+
+    def get(self) -> Any:
+        """
+        Pops the oldest item without waiting, raises `Empty` if there is none
+        """
+        items = self.get_many(1)
+        if not items:
+            raise Empty
+        return items[0]
+
+    def get_many(
+        self, max_items: int | None = None, timeout: float | None = 0
+    ) -> List[Any]:
+        """
+        Pops up to `max_items` items, all queued items by default. Waits up
+        to `timeout` for the first one, `None` waits indefinitely
+        """
+        with self._cond:
+            if not self._items and timeout != 0:
+                self._cond.wait_for(lambda: bool(self._items), timeout)
+            n = len(self._items)
+            if max_items is not None:
+                n = min(n, max_items)
+            now = time.perf_counter()
+            batch = []
+            for _ in range(n):
+                stamp, item = self._items.popleft()
+                latency = now - stamp
+                self._latency += latency
+                self._latency_max = max(self._latency_max, latency)
+                batch.append(item)
+            self._consumed += n
+            if n:
+                self._cond.notify_all()
+        return batch
+
+    def _has_room(self) -> bool:
+        return len(self._items) < self._capacity
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            consumed = self._consumed
+            return {
+                "produced": self._produced,
+                "consumed": consumed,
+                "dropped": self._dropped,
+                "coalesced": self._coalesced,
+                "queued": len(self._items),
+                "latency_mean": self._latency / consumed if consumed else 0.0,
+                "latency_max": self._latency_max,
+            }
 
 
 class Streamer:
+    """
+    Replays `data` on a background thread into a `RingBuffer`. The producer
+    does not pace itself, under the default `block` policy a full queue is
+    what holds it back. Pass `sleep` to throttle it, or another `policy` to
+    drop or coalesce items instead of waiting
+    """
+
     done_policies = {"omit", "raise"}
 
     def __init__(
@@ -16,11 +157,13 @@ class Streamer:
         queue_size: int,
         done: str = "omit",
         data: Iterable | None = None,
+        policy: str = "block",
         **kwargs,
     ) -> None:
         self._running = False
+        self._finished = False
         self._data = iter(data) if data is not None else None
-        self._queue = Queue(maxsize=queue_size)
+        self._queue = RingBuffer(queue_size, policy)
         self._lock = threading.Lock()
         self._thread = None
         self._kwargs = kwargs
@@ -31,8 +174,22 @@ class Streamer:
 
     @property
     def running(self) -> bool:
-        with self._lock:
-            return self._running
+        return self._running
+
+    @property
+    def exhausted(self) -> bool:
+        """
+        Whether the source has run out and every item has been consumed
+        """
+        return self._finished and self._queue.empty()
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """
+        Hand-off counters: items produced, consumed, dropped and coalesced,
+        and the mean and max seconds an item spent queued
+        """
+        return self._queue.stats()
 
     def start(self) -> None:
         with self._lock:
@@ -57,14 +214,19 @@ class Streamer:
         """
         if not self._data:
             return
-        while not self._queue.full():
-            try:
-                data = next(self._data)
-            except StopIteration:
-                return
-            self._store(data)
+        room = self._queue.capacity - len(self._queue)
+        if room <= 0:
+            return
+        batch = []
+        for data in self._data:
+            batch.append(data)
+            if len(batch) >= room:
+                break
+        else:
+            self._finished = True
+        self._store_many(batch)
 
-    def get_data(self, sleep: int = 1) -> Any | None:
+    def get_data(self, sleep: float = 0) -> Any | None:
         """
         Override this method for specific types of streamers
         """
@@ -73,35 +235,57 @@ class Streamer:
         try:
             data = next(self._data)
         except StopIteration:
+            self._finished = True
             return None
-        time.sleep(sleep)
+        if sleep > 0:
+            time.sleep(sleep)
         return data
 
     def _store(self, data: Any) -> None:
         if data is None:
             return
-        try:
-            self._queue.put_nowait(data)
-        except Full:
-            try:
-                discarded = self._queue.get_nowait()
-                del discarded
-                self._queue.put(data)
-            except Empty:
+        self._store_many((data,))
+
+    def _store_many(self, batch: Iterable[Any]) -> None:
+        """
+        Hands `batch` over in one go. Under the `block` policy this waits
+        for room for as long as the streamer runs
+        """
+        pending = [data for data in batch if data is not None]
+        if self._queue.policy != "block":
+            self._queue.put_many(pending)
+            return
+        while pending:
+            accepted = self._queue.put_many(pending, timeout=0.1)
+            pending = pending[accepted:]
+            if pending and not self.running:
                 return
 
     def _fetch_loop(self, **kwargs) -> None:
         self.prefill(**kwargs)
-        while self.running:
+        while self.running and not self._finished:
             data = self.get_data(**kwargs)
             self._store(data)
 
+    def next_batch(
+        self, max_items: int | None = None, timeout: float = 0
+    ) -> List[Any]:
+        """
+        Takes up to `max_items` queued items at once, waiting up to `timeout`
+        for the first. An empty batch is returned when nothing is queued,
+        unless the done policy is `raise`
+        """
+        batch = self._queue.get_many(max_items, timeout)
+        if not batch and self._done == "raise":
+            raise StopIteration
+        return batch
+
     def __iter__(self) -> Iterable:
         return self
 
     def __next__(self) -> Any | None:
         try:
-            return self._queue.get_nowait()
+            return self._queue.get()
         except Empty:
             if self._done == "omit":
                 return None
@@ -119,7 +303,140 @@ class Streamer:
         self.stop()
 
 
+class AsyncStreamer:
+    """
+    Asyncio counterpart of `Streamer`, the producer runs as a task on the
+    running loop and the stream is consumed with `async for`. Iteration
+    ends once the producer is exhausted and the queue is drained. Overflow
+    follows the same policies as `RingBuffer`
+    """
+
+    def __init__(
+        self,
+        queue_size: int,
+        data: AsyncIterable | Iterable | None = None,
+        policy: str = "block",
+    ) -> None:
+        assert queue_size > 0, "queue size must be positive"
+        assert (
+            policy in RingBuffer.policies
+        ), f"invalid policy, must be one of {RingBuffer.policies}"
+        if data is None:
+            self._data = None
+        elif isinstance(data, AsyncIterable):
+            self._data = aiter(data)
+        else:
+            self._data = iter(data)
+        self._capacity = queue_size
+        self._policy = policy
+        self._items = deque()
+        self._cond = asyncio.Condition()
+        self._task = None
+        self._finished = False
+        self._dropped = 0
+        self._coalesced = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": len(self._items),
+            "dropped": self._dropped,
+            "coalesced": self._coalesced,
+        }
+
+    async def get_data(self) -> Any | None:
+        """
+        Override this method for specific types of streamers
+        """
+        if self._data is None:
+            return None
+        try:
+            if isinstance(self._data, AsyncIterator):
+                return await anext(self._data)
+            return next(self._data)
+        except (StopIteration, StopAsyncIteration):
+            return None
+
+    async def _store(self, data: Any) -> None:
+        async with self._cond:
+            if len(self._items) >= self._capacity:
+                if self._policy == "drop-oldest":
+                    self._items.popleft()
+                    self._dropped += 1
+                elif self._policy == "coalesce-latest":
+                    self._items.pop()
+                    self._coalesced += 1
+                else:
+                    await self._cond.wait_for(
+                        lambda: len(self._items) < self._capacity
+                    )
+            self._items.append(data)
+            self._cond.notify_all()
+
+    async def _fetch_loop(self) -> None:
+        try:
+            while True:
+                data = await self.get_data()
+                if data is None:
+                    return
+                await self._store(data)
+        finally:
+            async with self._cond:
+                self._finished = True
+                self._cond.notify_all()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._finished = False
+        self._task = asyncio.get_running_loop().create_task(self._fetch_loop())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def __aiter__(self) -> AsyncIterator:
+        return self
+
+    async def __anext__(self) -> Any:
+        if self._task is None and not self._finished:
+            self.start()
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._items or self._finished)
+            if not self._items:
+                raise StopAsyncIteration
+            data = self._items.popleft()
+            self._cond.notify_all()
+            return data
+
+    async def __aenter__(self) -> "AsyncStreamer":
+        self.start()
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.stop()
+
+
 class DBStreamer(Streamer, DBInterface):
+    """
+    Replays the rows of `tables` window by window, each item is a frame of
+    the rows whose index falls within one `step` starting at `starts`.
+    Rows are read lazily from a single cursor `chunksize` at a time, and
+    the background thread keeps up to `queue_size` windows read ahead,
+    blocking instead of dropping when the consumer falls behind. Empty
+    windows are skipped
+    """
+
     def __init__(
         self,
         queue_size: int,
@@ -129,13 +446,82 @@ class DBStreamer(Streamer, DBInterface):
         starts: dt.datetime | int,
         step: dt.timedelta | int,
         stops: dt.datetime | int | None = None,
+        chunksize: int = 4096,
         **kwargs,
     ) -> None:
-        Streamer.__init__(queue_size, **kwargs)
-        DBInterface.__init__(database, index, tables, starts, step, stops, **kwargs)
+        kwargs.setdefault("policy", "block")
+        Streamer.__init__(self, queue_size, **kwargs)
+        DBInterface.__init__(self, database, index, tables, starts, step, stops)
+        self._chunksize = chunksize
+        self._origin = starts
+        self._cursor = None
+        self._columns = None
+        self._rows = deque()
+
+    def _window_expr(self) -> Tuple[str, List[Any]]:
+        index = quote(self._index)
+        if isinstance(self._origin, dt.datetime):
+            origin = calendar.timegm(self._origin.timetuple())
+            step = int(self.step.total_seconds())
+            expr = f"(CAST(strftime('%s', {index}) AS INTEGER) - ?) / ?"
+            return expr, [origin, step]
+        return f"({index} - ?) / ?", [self._origin, self.step]
+
+    def _open(self) -> sqlite3.Cursor:
+        index = quote(self._index)
+        expr, expr_params = self._window_expr()
+        condition = f"{index} >= ?"
+        bounds = [self._bound(self._origin)]
+        if self.stops is not None:
+            condition += f" AND {index} < ?"
+            bounds.append(self._bound(self.stops))
+        query = " UNION ALL ".join(
+            f"SELECT *, {expr} AS _window FROM {quote(table)} WHERE {condition}"
+            for table in self._tables
+        )
+        params = (expr_params + bounds) * len(self._tables)
+        cursor = self._con.execute(f"{query} ORDER BY {index}", params)
+        self._columns = [column[0] for column in cursor.description[:-1]]
+        return cursor
+
+    @staticmethod
+    def _bound(value: dt.datetime | int) -> str | int:
+        if isinstance(value, dt.datetime):
+            return value.isoformat(" ")
+        return value
+
+    def _peek(self) -> Tuple | None:
+        if not self._rows:
+            self._rows.extend(self._cursor.fetchmany(self._chunksize))
+        return self._rows[0] if self._rows else None
+
+    def prefill(self, **_) -> None:
+        while not self._queue.full():
+            data = self.get_data()
+            if data is None:
+                self._finished = True
+                return
+            self._queue.put(data)
 
-    def prefill(self) -> None:
-        pass
+    def get_data(self, **_) -> DataFrame | None:
+        if self._cursor is None:
+            self._cursor = self._open()
+        head = self._peek()
+        if head is None:
+            return None
+        window = head[-1]
+        rows = []
+        while head is not None and head[-1] == window:
+            rows.append(self._rows.popleft()[:-1])
+            head = self._peek()
+        self.starts = self._origin + window * self.step
+        return DataFrame.from_records(rows, columns=self._columns)
 
-    def get_data(self) -> DataFrame | None:
-        pass
+    def _fetch_loop(self, **_) -> None:
+        self.prefill()
+        while self.running and not self._finished:
+            data = self.get_data()
+            if data is None:
+                self._finished = True
+                return
+            self._store(data)
@@ -1,8 +1,14 @@
+import torch
+import numpy as np
+import pandas as pd
 from torch_geometric.data import HeteroData
-from typing import Dict
+from typing import Dict, List, Optional
 
 from moonrs import HeteroGraph
 
+# Columns every bar needs, only `duration` and `adjusted` have defaults
+BAR_COLUMNS = ("open", "high", "low", "close", "volume")
+
 
 class HeteroGraphWrapper(HeteroGraph):
     def __init__(self) -> None:
@@ -17,9 +23,39 @@ class HeteroGraphWrapper(HeteroGraph):
     def reset(self) -> None:
         self.clear()
 
+    @staticmethod
+    def _hetero_data(x, edge_index, edge_attr) -> HeteroData:
+        data = HeteroData()
+        for cls, feature in x.items():
+            data[cls].x = torch.from_numpy(feature)
+        for relation, index in edge_index.items():
+            data[relation].edge_index = torch.from_numpy(index)
+        for relation, attr in edge_attr.items():
+            data[relation].edge_attr = torch.from_numpy(attr)
+        return data
+
     def to_pyg(self) -> HeteroData:
-        ret = HeteroData()
-        data = super().to_pyg()
+        """
+        Builds `HeteroData` from the arrays exported by the native graph,
+        tensors share memory with the exported arrays
+        """
+        return self._hetero_data(*super().to_pyg())
+
+    def sample(self, seeds: List[str], fanouts: List[int], seed: int = 0) -> HeteroData:
+        """
+        `HeteroData` of the neighbourhood of the named `seeds`, sampled
+        natively with up to `fanouts[k]` incoming edges per node at hop `k`,
+        `-1` for all of them. The seeds are the first `batch_size` rows of
+        their class, `names` lists the node behind every row
+        """
+        x, edge_index, edge_attr, names, seeds = super().sample(
+            list(seeds), list(fanouts), seed
+        )
+        data = self._hetero_data(x, edge_index, edge_attr)
+        for cls, rows in names.items():
+            data[cls].names = rows
+            data[cls].batch_size = seeds.get(cls, 0)
+        return data
 
     def update(self):
         pass
@@ -35,12 +71,67 @@ class HeteroGraphWrapper(HeteroGraph):
         publisher: str,
         capacity: int,
         tickers: Dict[str, float],
+        timestamp: Optional[float] = None,
     ) -> None:
-        super().add_article(title, summary, sentiment, publisher, capacity, tickers)
+        super().add_article(
+            title, summary, sentiment, publisher, capacity, tickers, timestamp
+        )
 
     def add_equity(self, symbol: str, company: str, capacity: int) -> None:
         super().add_equity(symbol, company, capacity)
 
+    def add_equities(
+        self,
+        symbols: List[str],
+        *,
+        capacity: int,
+        companies: Optional[List[str]] = None,
+    ) -> None:
+        if companies is None:
+            companies = [""] * len(symbols)
+        super().add_equities(list(symbols), list(companies), capacity)
+
+    def update_equities_batch(self, frame: pd.DataFrame, duration: float = 60) -> int:
+        """
+        Applies one bar per row in a single native call, edges are recomputed
+        once for the whole batch. Expects `symbol`, `timestamp`, `open`,
+        `high`, `low`, `close` and `volume` columns, raises `KeyError` when
+        one is missing, `duration` and `adjusted` are optional. Timestamps
+        are unix seconds or datetimes. Arrow tables are accepted as well.
+        Returns the number of bars applied.
+        """
+        if hasattr(frame, "to_pandas"):
+            frame = frame.to_pandas()
+        required = ("symbol", "timestamp", *BAR_COLUMNS)
+        missing = [name for name in required if name not in frame]
+        if missing:
+            raise KeyError(f"missing bar columns {missing}")
+        n = len(frame)
+        timestamps = frame["timestamp"]
+        if pd.api.types.is_datetime64_any_dtype(timestamps):
+            timestamps = (timestamps - pd.Timestamp(0, tz=timestamps.dt.tz)) / pd.Timedelta(
+                seconds=1
+            )
+
+        def column(name, dtype, default=None) -> np.ndarray:
+            if name in frame:
+                values = frame[name].to_numpy(dtype=dtype)
+            else:
+                values = np.full(n, default, dtype=dtype)
+            return np.ascontiguousarray(values)
+
+        return super().update_equities_batch(
+            frame["symbol"].astype(str).tolist(),
+            np.ascontiguousarray(np.asarray(timestamps, dtype=np.float64)),
+            column("duration", np.float64, duration),
+            column("adjusted", np.bool_, True),
+            column("open", np.float64),
+            column("high", np.float64),
+            column("low", np.float64),
+            column("close", np.float64),
+            column("volume", np.float64),
+        )
+
     def add_currency(self, symbol: str, capacity: int) -> None:
         super().add_currency(symbol, capacity)
 
@@ -50,4 +141,11 @@ class HeteroGraphWrapper(HeteroGraph):
         super().add_bond(symbol, interest_rate, maturity, capacity)
 
     def add_option(self, symbol: str, strike: float, capacity: int) -> None:
-        super().add_option(symbol, strike, capacity)
\ No newline at end of file
+        super().add_option(symbol, strike, capacity)
+
+    def publish(self, writer) -> int:
+        """
+        Publishes the exported arrays through a `SharedGraphWriter`, returns
+        the published version
+        """
+        return writer.publish(*super().to_pyg())
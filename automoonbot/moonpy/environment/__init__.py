@@ -1 +1 @@
-from automoonbot.moonpy.environment.environment import Environment
\ No newline at end of file
+from automoonbot.moonpy.environment.environment import Environment, Observation
\ No newline at end of file
@@ -1,18 +1,199 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
 
+from automoonbot.moonpy.data import HeteroGraphWrapper, Streamer
+from automoonbot.moonpy.data.wrapper import BAR_COLUMNS
+from automoonbot.moonpy.session import BatchPortfolio
+
+
+class Observation:
+    """
+    State of every environment after one step. The graph is exported only
+    when `graph` is first read, and only while the environment has not
+    stepped past it
+    """
+
+    def __init__(
+        self,
+        env: "Environment",
+        step: int,
+        version: int,
+        timestamp: int | None,
+        quotes: np.ndarray,
+        weights: np.ndarray,
+    ) -> None:
+        self._env = env
+        self._graph = None
+        self.step = step
+        self._version = version
+        self.timestamp = timestamp
+        self.quotes = quotes
+        self.weights = weights
+
+    @property
+    def graph(self) -> Any:
+        if self._graph is None:
+            if self._env.version != self._version:
+                raise RuntimeError("stale observation, the environment stepped")
+            self._graph = self._env.graph.to_pyg() if self._env.graph else None
+        return self._graph
 
 
 class Environment:
-    def __init__(self) -> None:
-        pass
+    """
+    Steps `envs` portfolios in lockstep over the bars replayed by `streamer`,
+    each item being a frame of bars with `symbol`, `timestamp` and `close`
+    columns. All environments see the same market, so quotes are computed
+    once per step and broadcast. While the policy computes its action the
+    next item is taken from the streamer and turned into quotes on a
+    background worker. Frames that also carry `open`, `high`, `low` and
+    `volume` are fed to `graph` as they are replayed, close-only frames
+    leave it untouched. Its export is left to `Observation.graph`
+    """
 
-    def reset(self):
-        pass
+    def __init__(
+        self,
+        streamer: Streamer,
+        fiat: str,
+        tradables: List[str],
+        envs: int = 1,
+        graph: HeteroGraphWrapper | None = None,
+        timeout: float = 0.1,
+    ) -> None:
+        self.streamer = streamer
+        self.graph = graph
+        self.portfolio = BatchPortfolio(fiat, tradables, envs)
+        self.steps = 0
+        self.version = 0
+        self._timeout = timeout
+        self._fiat = self.portfolio.fiat
+        self._quotes = np.ones(len(tradables), dtype=np.float64)
+        self._seen = np.zeros(len(tradables), dtype=np.bool_)
+        self._seen[self._fiat] = True
+        self._worker = ThreadPoolExecutor(max_workers=1)
+        self._pending: Future | None = None
 
-    def step(self, state, action):
-        pass
+    @property
+    def envs(self) -> int:
+        return self.portfolio.envs
+
+    def _next_frame(self) -> pd.DataFrame | None:
+        while True:
+            batch = self.streamer.next_batch(1, self._timeout)
+            if batch:
+                return batch[0]
+            if self.streamer.exhausted or not self.streamer.running:
+                return None
+
+    def _load(self) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray, int] | None:
+        """
+        Next frame with the latest close of every asset quoted in it, as
+        asset indexes and prices
+        """
+        frame = self._next_frame()
+        if frame is None:
+            return None
+        latest = frame.sort_values("timestamp", kind="stable")
+        latest = latest.groupby("symbol").last()
+        known = latest.index.isin(list(self.portfolio.index_map))
+        latest = latest[known]
+        assets = self.portfolio.indexes(latest.index.tolist())
+        prices = latest["close"].to_numpy(dtype=np.float64)
+        timestamp = int(frame["timestamp"].max()) if len(frame) else None
+        return frame, assets, prices, timestamp
+
+    def _prefetch(self) -> None:
+        self._pending = self._worker.submit(self._load)
+
+    def _advance(self) -> Tuple[np.ndarray, int | None] | None:
+        """
+        Takes the prefetched item, feeds it to the graph and starts fetching
+        the next one. Returns the growth of every asset since the last quotes
+        """
+        loaded = self._pending.result() if self._pending else self._load()
+        if loaded is None:
+            self._pending = None
+            return None
+        self._prefetch()
+        self.version += 1
+        frame, assets, prices, timestamp = loaded
+        bars = len(frame) and all(name in frame for name in BAR_COLUMNS)
+        if self.graph is not None and bars:
+            self.graph.update_equities_batch(frame)
+        fresh = assets[~self._seen[assets]]
+        self._seen[assets] = True
+        self._quotes[assets] = prices
+        self._quotes[self._fiat] = 1.0
+        self.portfolio.update_quotes(self._quotes)
+        u = self.portfolio.growth()
+        u[:, fresh] = 1.0
+        return u, timestamp
+
+    def _observe(self, timestamp: int | None) -> Observation:
+        return Observation(
+            self,
+            self.steps,
+            self.version,
+            timestamp,
+            self._quotes.copy(),
+            self.portfolio.weights(),
+        )
+
+    def reset(self) -> Observation | None:
+        """
+        Resets every portfolio to fiat and returns the observation of the
+        next replayed item, or `None` once the replay is over
+        """
+        if not self.streamer.running and not self.streamer.exhausted:
+            self.streamer.start()
+        self.portfolio.reset()
+        self.steps = 0
+        advanced = self._advance()
+        if advanced is None:
+            return None
+        return self._observe(advanced[1])
+
+    def step(
+        self, action: np.ndarray | None = None
+    ) -> Tuple[Observation | None, np.ndarray, bool, Dict[str, Any]]:
+        """
+        Applies `action` at the current quotes, then replays the next item.
+        `action` is either `(envs, assets)` target weights, rebalanced to
+        without cost, or a structured `BATCH_TRANSFER` array. Returns the
+        next observation, the log return of every environment, whether the
+        replay is over and the total values
+        """
+        portfolio = self.portfolio
+        if action is not None and action.dtype.names:
+            portfolio.transact(action)
+        elif action is not None:
+            weights = np.broadcast_to(action, portfolio.values.shape)
+            if (weights < 0).any():
+                raise ValueError("target weights must be non-negative")
+            sums = weights.sum(axis=1, keepdims=True)
+            if (sums == 0).any():
+                raise ValueError("target weights must not sum to zero")
+            weights = weights / sums
+            portfolio.values[:] = portfolio.total()[:, None] * weights
+        before = portfolio.total()
+        advanced = self._advance()
+        if advanced is None:
+            return None, np.zeros(self.envs), True, {"total": before}
+        u, timestamp = advanced
+        portfolio.apply(u)
+        after = portfolio.total()
+        self.steps += 1
+        reward = np.log(after / before)
+        return self._observe(timestamp), reward, False, {"total": after}
+
+    def close(self) -> None:
+        self.streamer.stop()
+        self._worker.shutdown(wait=True, cancel_futures=True)
 
     def train(self):
         pass
 
     def validate(self):
-        pass
\ No newline at end of file
+        pass
@@ -1 +1,6 @@
-from automoonbot.moonpy.session.portfolio import Portfolio
\ No newline at end of file
+from automoonbot.moonpy.session.portfolio import (
+    Portfolio,
+    BatchPortfolio,
+    TRANSFER,
+    BATCH_TRANSFER,
+)
\ No newline at end of file
@@ -1,6 +1,72 @@
 import numpy as np
 from enum import Enum
-from typing import List, Dict
+from typing import Any, Dict, List, Tuple
+
+# A transfer moves the fraction `size` of the value of `src` to `tgt`
+TRANSFER = np.dtype([("src", np.intp), ("tgt", np.intp), ("size", np.float64)])
+BATCH_TRANSFER = np.dtype(
+    [("env", np.intp), ("src", np.intp), ("tgt", np.intp), ("size", np.float64)]
+)
+
+
+def transfer(
+    values: np.ndarray,
+    src: np.ndarray | Tuple[np.ndarray, ...],
+    tgt: np.ndarray | Tuple[np.ndarray, ...],
+    size: np.ndarray,
+    u: np.ndarray | None = None,
+) -> None:
+    """
+    Grows `values` by `u` in place and moves `values[src] * size` to
+    `values[tgt]`, fractions are of the values before growth. Equivalent to
+    `values @ (diag(u) + T)` at the cost of the number of transfers
+    """
+    amount = values[src] * size
+    if u is not None:
+        values *= u
+    np.add.at(values, src, -amount)
+    np.add.at(values, tgt, amount)
+
+
+def as_transfers(transfers: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    """
+    `transfers` with the fields of `dtype`, matched by name rather than the
+    positional assignment numpy uses between structured dtypes
+    """
+    if transfers.dtype == dtype:
+        return transfers
+    out = np.empty(len(transfers), dtype=dtype)
+    for name in dtype.names:
+        out[name] = transfers[name]
+    return out
+
+
+def validate_transfers(
+    transfers: np.ndarray,
+    assets: int,
+    envs: int | None = None,
+) -> None:
+    """
+    Raises `ValueError` unless every index is in range, every size is a
+    fraction, no transfer is from an asset to itself and no asset gives
+    away more than its whole value
+    """
+    src, tgt, size = transfers["src"], transfers["tgt"], transfers["size"]
+    if not np.isfinite(size).all() or (size < 0).any() or (size > 1).any():
+        raise ValueError("transfer sizes must be fractions within [0, 1]")
+    if ((src < 0) | (src >= assets) | (tgt < 0) | (tgt >= assets)).any():
+        raise ValueError("transfer asset index out of range")
+    if (src == tgt).any():
+        raise ValueError("transfer source and target must differ")
+    slots = src
+    if envs is not None:
+        env = transfers["env"]
+        if ((env < 0) | (env >= envs)).any():
+            raise ValueError("transfer environment index out of range")
+        slots = env * assets + src
+    given = np.bincount(slots, weights=size, minlength=(envs or 1) * assets)
+    if (given > 1 + 1e-12).any():
+        raise ValueError("transfers exceed the value of their source")
 
 
 class Portfolio:
@@ -22,7 +88,7 @@ class Portfolio:
         fiat: str,
         tradables: List[str],
     ) -> None:
-        self.index_map = {t: i for t, i in enumerate(tradables)}
+        self.index_map = {t: i for i, t in enumerate(tradables)}
         self.fiat = self.index_map[fiat]
         self._portfolio = self._reset_portfolio(self.fiat, len(tradables))
 
@@ -43,35 +109,31 @@ class Portfolio:
         portfolio[
             :,
             [
-                self.__class__.ColAttr.LogQuote,
-                self.__class__.ColAttr.LagQuote,
+                self.__class__.ColAttr.LogQuote.value,
+                self.__class__.ColAttr.LagQuote.value,
             ],
         ] = [1.0, 1.0]
-        portfolio[fiat, self.__class__.ColAttr.Value] = 1.0
+        portfolio[fiat, self.__class__.ColAttr.Value.value] = 1.0
         return portfolio
 
     def _reset_lag(self) -> None:
         self._portfolio[
             :,
-            self.__class__.ColAttr.LagQuote,
-        ] = self._portfolio[:, self.__class__.ColAttr.LogQuote]
+            self.__class__.ColAttr.LagQuote.value,
+        ] = self._portfolio[:, self.__class__.ColAttr.LogQuote.value]
 
     @property
+    def values(self) -> np.ndarray:
+        return self._portfolio[:, self.__class__.ColAttr.Value.value]
+
     def U(
         self,
         diag: bool = False,
     ) -> np.ndarray:
         u = np.exp(
-            np.diff(
-                self._portfolio[
-                    :,
-                    [
-                        self.__class__.ColAttr.LagQuote,
-                        self.__class__.ColAttr.LogQuote,
-                    ],
-                ]
-            )
-        )[:, 0]
+            self._portfolio[:, self.__class__.ColAttr.LogQuote.value]
+            - self._portfolio[:, self.__class__.ColAttr.LagQuote.value]
+        )
         self._reset_lag()
         if diag:
             return np.diag(u)
@@ -87,48 +149,191 @@ class Portfolio:
         self._reset_lag()
         self._portfolio[
             index,
-            self.__class__.ColAttr.LogQuote,
+            self.__class__.ColAttr.LogQuote.value,
         ] = value
 
-    def _value_transfer(
-        self,
-        src: List[int] | int,
-        tgt: List[int] | int,
-        size: np.ndarray | np.float64,
-    ) -> np.ndarray:
-        t = self.U(diag=True)
-        t[src, src] -= size
-        t[src, tgt] += size
-        return t
-
     def _build_transaction(
         self,
-        transactions: Dict[str, float],
+        transactions: List[Dict[str, Any]] | np.ndarray,
     ) -> np.ndarray:
-        src, tgt, size = [], [], []
-        for transaction in transactions:
-            if transaction["type"] == "buy":
-                src.append(self.fiat)
-                tgt.append(self.index_map[transaction["asset"]])
-                size.append(transaction["size"])
-            elif transaction["type"] == "sell":
-                src.append(self.index_map[transaction["asset"]])
-                tgt.append(self.fiat)
-                size.append(transaction["size"])
-        size = np.array(size, dtype=np.float64)
-        return self._value_transfer(src, tgt, size)
+        """
+        Validated `TRANSFER` array of a structured array of transfers, or of
+        `{"type": "buy" | "sell", "asset": str, "size": float}` dicts, where
+        a buy moves `size` of the fiat value into `asset` and a sell moves
+        `size` of the value of `asset` into fiat
+        """
+        if isinstance(transactions, np.ndarray) and transactions.dtype.names:
+            transfers = as_transfers(transactions, TRANSFER)
+        else:
+            transfers = np.zeros(len(transactions), dtype=TRANSFER)
+            for i, transaction in enumerate(transactions):
+                asset = self.index_map[transaction["asset"]]
+                if transaction["type"] == "buy":
+                    transfers[i] = (self.fiat, asset, transaction["size"])
+                elif transaction["type"] == "sell":
+                    transfers[i] = (asset, self.fiat, transaction["size"])
+                else:
+                    raise ValueError(
+                        f"unknown transaction type: {transaction['type']!r}"
+                    )
+        validate_transfers(transfers, len(self.index_map))
+        return transfers
 
     def apply_transaction(
         self,
         transaction: np.ndarray,
     ) -> None:
-        self._portfolio[
-            :,
-            self.__class__.ColAttr.Value,
-        ] = (
-            self._portfolio[
-                :,
-                self.__class__.ColAttr.Value,
-            ]
-            @ transaction
+        """
+        Applies the growth since the last quotes together with `transaction`,
+        a structured array of transfers. A dense `(assets, assets)` transfer
+        matrix is still multiplied through as is
+        """
+        values = self.values
+        if transaction.dtype.names is None:
+            values[:] = values @ transaction
+            return
+        transaction = self._build_transaction(transaction)
+        transfer(
+            values,
+            transaction["src"],
+            transaction["tgt"],
+            transaction["size"],
+            self.U(),
         )
+
+
+class BatchPortfolio:
+    """
+    `envs` independent portfolios over the same tradables, stored as one
+    `(envs, assets, cols)` array whose columns follow `Portfolio.ColAttr`.
+    Quote updates, growth and value transfers of every environment are a
+    handful of elementwise and scatter-add operations, no `(assets, assets)`
+    transfer matrix is ever built
+    """
+
+    ColAttr = Portfolio.ColAttr
+
+    def __init__(
+        self,
+        fiat: str,
+        tradables: List[str],
+        envs: int,
+    ) -> None:
+        self.index_map = {t: i for i, t in enumerate(tradables)}
+        self.fiat = self.index_map[fiat]
+        self.envs = envs
+        self.assets = len(tradables)
+        self._portfolio = np.zeros(
+            (envs, self.assets, len(self.ColAttr)),
+            dtype=np.float64,
+        )
+        self.reset()
+
+    @property
+    def portfolio(self) -> np.ndarray:
+        return self._portfolio
+
+    @property
+    def values(self) -> np.ndarray:
+        """
+        `(envs, assets)` view of the value column
+        """
+        return self._portfolio[:, :, self.ColAttr.Value.value]
+
+    def total(self) -> np.ndarray:
+        return self.values.sum(axis=1)
+
+    def weights(self) -> np.ndarray:
+        return self.values / self.total()[:, None]
+
+    def reset(self, envs: np.ndarray | None = None) -> None:
+        """
+        Resets the portfolios of `envs`, all of them by default, to hold one
+        unit of fiat and no quote history
+        """
+        envs = slice(None) if envs is None else envs
+        self._portfolio[envs] = 0.0
+        self._portfolio[envs, self.fiat, self.ColAttr.Value.value] = 1.0
+
+    def indexes(self, assets: List[str]) -> np.ndarray:
+        return np.fromiter(
+            (self.index_map[asset] for asset in assets),
+            dtype=np.intp,
+            count=len(assets),
+        )
+
+    def update_quotes(
+        self,
+        quotes: np.ndarray,
+        assets: np.ndarray | None = None,
+    ) -> None:
+        """
+        Shifts the quotes of every asset into the lag column and records
+        `quotes`, shaped `(envs, len(assets))` or broadcast to it, for the
+        asset indexes `assets`, all assets by default
+        """
+        log, lag = self.ColAttr.LogQuote.value, self.ColAttr.LagQuote.value
+        self._portfolio[:, :, lag] = self._portfolio[:, :, log]
+        assets = slice(None) if assets is None else assets
+        self._portfolio[:, assets, log] = np.log(quotes)
+
+    def growth(self) -> np.ndarray:
+        """
+        `(envs, assets)` price ratios since the previous quotes, the quote
+        change is consumed
+        """
+        log, lag = self.ColAttr.LogQuote.value, self.ColAttr.LagQuote.value
+        u = np.exp(self._portfolio[:, :, log] - self._portfolio[:, :, lag])
+        self._portfolio[:, :, lag] = self._portfolio[:, :, log]
+        return u
+
+    def apply(
+        self,
+        u: np.ndarray | None = None,
+        env: np.ndarray | None = None,
+        src: np.ndarray | None = None,
+        tgt: np.ndarray | None = None,
+        size: np.ndarray | None = None,
+    ) -> None:
+        """
+        Grows the values by `u` and moves the fraction `size[k]` of the value
+        of `src[k]` to `tgt[k]` within environment `env[k]`. Fractions are
+        of the values before growth, as with the transfer matrix
+        `diag(u) + T` of `Portfolio`
+        """
+        values = self.values
+        if size is None or not len(size):
+            if u is not None:
+                values *= u
+            return
+        transfer(values, (env, src), (env, tgt), size, u)
+
+    def transact(
+        self,
+        transfers: np.ndarray,
+        u: np.ndarray | None = None,
+    ) -> None:
+        """
+        `apply` for a structured `BATCH_TRANSFER` array, validated first
+        """
+        transfers = as_transfers(transfers, BATCH_TRANSFER)
+        validate_transfers(transfers, self.assets, self.envs)
+        self.apply(
+            u, transfers["env"], transfers["src"], transfers["tgt"], transfers["size"]
+        )
+
+    def step(
+        self,
+        quotes: np.ndarray,
+        env: np.ndarray | None = None,
+        src: np.ndarray | None = None,
+        tgt: np.ndarray | None = None,
+        size: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """
+        Records new quotes of all assets, applies the resulting growth and
+        the transfers to every environment and returns the total values
+        """
+        self.update_quotes(quotes)
+        self.apply(self.growth(), env, src, tgt, size)
+        return self.total()
@@ -0,0 +1,27 @@
+import json
+from automoonbot.moonpy.benchmark import compare, run
+
+
+def test_run_and_compare():
+    results = run(["portfolio", "streamer"], quick=True)
+    assert results["meta"]["quick"]
+    entries = results["results"]
+    assert {entry["name"] for entry in entries} == {"portfolio", "streamer"}
+    assert all(entry["ops_per_sec"] > 0 for entry in entries)
+    json.dumps(results)
+
+    assert compare(results, results) == []
+    slower = json.loads(json.dumps(results))
+    for entry in slower["results"]:
+        entry["ops_per_sec"] /= 2
+    regressions = compare(results, slower)
+    assert len(regressions) == len(entries)
+    assert all(abs(entry["ratio"] - 0.5) < 1e-9 for entry in regressions)
+
+
+def test_failures_are_reported():
+    results = run(["time_series"], quick=True)
+    entries = results["results"]
+    assert entries and all(
+        "error" in entry or entry["ops_per_sec"] > 0 for entry in entries
+    )
@@ -0,0 +1,103 @@
+import time
+import asyncio
+from aiohttp import web
+from automoonbot.moonpy.data import AsyncStreamer
+from automoonbot.moonpy.data.api import AsyncAlphaVantage, parse_response
+
+
+async def serve(handler):
+    app = web.Application()
+    app.router.add_get("/query", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/query?"
+
+
+def test_parse_response():
+    down = parse_response("<html>Bad Gateway</html>", False, 502, "Bad Gateway")
+    assert not down["ok"]
+    assert (down["status_code"], down["error_message"]) == (502, "Bad Gateway")
+    assert down["content"] == "<html>Bad Gateway</html>"
+
+    garbled = parse_response("not json", True, 200, "OK")
+    assert not garbled["ok"]
+    assert (garbled["status_code"], garbled["error_message"]) == (
+        200,
+        "Failed to parse JSON",
+    )
+
+    for body in ("[1, 2]", '"text"', "null"):
+        wrapped = parse_response(body, True, 200, "OK")
+        assert not wrapped["ok"]
+        assert wrapped["content"] == body
+
+
+def test_async_alphavantage():
+    inflight = {"now": 0, "max": 0}
+
+    async def handler(request):
+        inflight["now"] += 1
+        inflight["max"] = max(inflight["max"], inflight["now"])
+        await asyncio.sleep(0.05)
+        inflight["now"] -= 1
+        if request.query["symbol"] == "BAD":
+            return web.Response(status=500, text="{}")
+        return web.json_response(
+            {
+                "function": request.query["function"],
+                "symbol": request.query["symbol"],
+            }
+        )
+
+    async def main():
+        runner, url = await serve(handler)
+        symbols = [f"S{i}" for i in range(20)] + ["BAD"]
+        try:
+            async with AsyncAlphaVantage("key", "100/second", base_url=url) as client:
+                start = time.perf_counter()
+                results = await client.intraday_many(symbols, "1min", "2024-01")
+                elapsed = time.perf_counter() - start
+                options = await client.options_many(["S0"], "2024-01-02")
+        finally:
+            await runner.cleanup()
+        return results, options, elapsed
+
+    results, options, elapsed = asyncio.run(main())
+    assert set(results) == {f"S{i}" for i in range(20)} | {"BAD"}
+    assert results["S3"]["symbol"] == "S3"
+    assert results["S3"]["function"] == "TIME_SERIES_INTRADAY"
+    assert results["S3"]["ok"]
+    assert not results["BAD"]["ok"]
+    assert results["BAD"]["status_code"] == 500
+    assert options["S0"]["function"] == "HISTORICAL_OPTIONS"
+    assert inflight["max"] > 1
+    assert elapsed < 20 * 0.05
+
+
+def test_async_streamer():
+    async def source():
+        for i in range(100):
+            yield i
+
+    async def main():
+        received = []
+        async with AsyncStreamer(8, data=source()) as streamer:
+            async for item in streamer:
+                received.append(item)
+        return received
+
+    assert asyncio.run(main()) == list(range(100))
+
+    async def dropping():
+        streamer = AsyncStreamer(4, data=range(10), policy="drop-oldest")
+        streamer.start()
+        await asyncio.sleep(0.05)
+        received = [item async for item in streamer]
+        return received, streamer.stats
+
+    received, stats = asyncio.run(dropping())
+    assert received == [6, 7, 8, 9]
+    assert stats["dropped"] == 6
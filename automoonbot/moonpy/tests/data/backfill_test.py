@@ -0,0 +1,75 @@
+import asyncio
+from aiohttp import web
+from automoonbot.moonpy.data import Backfill, BarStore, plan_backfill
+from automoonbot.moonpy.data.api import AsyncAlphaVantage
+from automoonbot.moonpy.tests.data.api_test import serve
+
+
+def intraday(symbol, month):
+    series = {
+        f"{month}-02 09:3{i}:00": {
+            "1. open": "1.0",
+            "2. high": "2.0",
+            "3. low": "0.5",
+            "4. close": str(1.0 + i),
+            "5. volume": "100",
+        }
+        for i in range(5)
+    }
+    return {
+        "Meta Data": {"2. Symbol": symbol, "6. Time Zone": "US/Eastern"},
+        "Time Series (1min)": series,
+    }
+
+
+def test_plan_backfill():
+    chunks = plan_backfill(["A", "B"], "2024-01-01", "2024-03-01")
+    assert len(chunks) == 6
+    assert chunks[0] == ("A", "2024-01")
+    assert chunks[-1] == ("B", "2024-03")
+
+
+def test_backfill_resume(tmp_path):
+    requests = []
+    failing = {
+        ("B", "2024-02"): {"Note": "rate limited"},
+        ("C", "2024-03"): {"Information": "daily limit reached"},
+    }
+
+    async def handler(request):
+        chunk = (request.query["symbol"], request.query["month"])
+        requests.append(chunk)
+        await asyncio.sleep(0.01)
+        if chunk in failing:
+            return web.json_response(failing[chunk])
+        return web.json_response(intraday(*chunk))
+
+    store = BarStore(str(tmp_path / "bars.db"))
+
+    async def run():
+        runner, url = await serve(handler)
+        try:
+            async with AsyncAlphaVantage("key", "100/second", base_url=url) as client:
+                backfill = Backfill(client, store, workers=4)
+                return await backfill.run(["A", "B", "C"], "2024-01-01", "2024-03-01")
+        finally:
+            await runner.cleanup()
+
+    stats = asyncio.run(run())
+    assert stats["fetched"] == 7
+    assert sorted(stats["failed"]) == [("B", "2024-02"), ("C", "2024-03")]
+    assert stats["rows"] == 35
+    assert len(requests) == 9
+    assert store.count() == 35
+
+    bars = store.between("A", 0, 2**31)
+    assert bars["timestamp"].iloc[0] == 1704205800
+    assert bars["close"].tolist()[:5] == [1.0, 2.0, 3.0, 4.0, 5.0]
+
+    failing.clear()
+    requests.clear()
+    stats = asyncio.run(run())
+    assert sorted(requests) == [("B", "2024-02"), ("C", "2024-03")]
+    assert stats["fetched"] == 2 and not stats["failed"]
+    assert store.count() == 45
+    store.close()
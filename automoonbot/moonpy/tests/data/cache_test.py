@@ -0,0 +1,132 @@
+import json
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from aiohttp import web
+from automoonbot.moonpy.data import DiskCache, ResponseCache, api
+from automoonbot.moonpy.data.api import AsyncAlphaVantage, CachedLimiterSession
+from automoonbot.moonpy.data.cache import cache_key
+from automoonbot.moonpy.tests.data.api_test import serve
+
+
+def test_response_cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"), ttl={"NEWS_SENTIMENT": 0})
+    payload = json.dumps({"values": [1.0] * 1000}).encode()
+    cache.set("a", payload, "TIME_SERIES_INTRADAY")
+    assert cache.get("a") == payload
+    assert cache.get("b") is None
+    assert cache.stats()["bytes"] < len(payload) // 10
+
+    cache.set("news", payload, "NEWS_SENTIMENT")
+    assert "news" not in cache
+    assert cache.get("news") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expired"]) == (1, 2, 1)
+    assert stats["entries"] == 1
+    assert cache.ttl("TIME_SERIES_DAILY_ADJUSTED") == cache.ttl("TIME_SERIES_*")
+    cache.close()
+
+    reopened = ResponseCache(str(tmp_path / "cache.db"))
+    assert reopened.get("a") == payload
+    assert reopened.stats()["bytes"] == stats["bytes"]
+
+
+def test_lru_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"), max_bytes=350, level=0)
+    for key in "abc":
+        cache.set(key, b"x" * 100)
+    cache.get("a")
+    cache.set("d", b"x" * 100)
+    assert "b" not in cache
+    assert all(key in cache for key in "acd")
+    assert cache.stats()["evicted"] == 1
+    assert cache.stats()["bytes"] <= 350
+
+
+def test_expired_eviction(tmp_path):
+    cache = ResponseCache(
+        str(tmp_path / "cache.db"), ttl={"NEWS_SENTIMENT": 0}, max_bytes=250, level=0
+    )
+    cache.set("a", b"x" * 100)
+    cache.set("news", b"x" * 100, "NEWS_SENTIMENT")
+    cache.set("b", b"x" * 100)
+    assert all(key in cache for key in "ab")
+    stats = cache.stats()
+    assert (stats["expired"], stats["evicted"]) == (1, 0)
+
+
+def test_cache_key():
+    a = "http://host/query?function=F&apikey=one&symbol=S"
+    b = "http://host/query?symbol=S&function=F&apikey=two"
+    assert cache_key(a) == cache_key(b)
+    assert cache_key(a) != cache_key(a.replace("S", "T"))
+
+
+def test_cached_limiter_session(tmp_path, monkeypatch):
+    calls, parsed = [], []
+    parse_response = api.parse_response
+    monkeypatch.setattr(
+        api, "parse_response", lambda *args: parsed.append(1) or parse_response(*args)
+    )
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            calls.append(self.path)
+            body = json.dumps({"function": "TIME_SERIES_INTRADAY"}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/query?"
+    backend = DiskCache(str(tmp_path / "http.db"))
+    session = CachedLimiterSession(url, "key", "100/second", cache_backend=backend)
+    try:
+        request = url + "function=TIME_SERIES_INTRADAY&symbol=S"
+        first = session.make_request(request)
+        second = session.make_request(request)
+    finally:
+        server.shutdown()
+    assert first == second
+    assert first["ok"]
+    assert len(calls) == 1
+    assert len(parsed) == 2
+    assert backend.stats()["hits"] == 1
+
+
+def test_async_cache(tmp_path):
+    calls = []
+
+    async def handler(request):
+        calls.append(request.query["symbol"])
+        if request.query["symbol"] == "BUSY":
+            return web.json_response({"Note": "call frequency exceeded"})
+        return web.json_response({"symbol": request.query["symbol"]})
+
+    cache = ResponseCache(str(tmp_path / "cache.db"))
+
+    async def main():
+        runner, url = await serve(handler)
+        try:
+            async with AsyncAlphaVantage(
+                "key", "100/second", base_url=url, cache=cache
+            ) as client:
+                symbols = ["A", "B", "BUSY"]
+                first = await client.intraday_many(symbols, "1min", "2024-01")
+                second = await client.intraday_many(symbols, "1min", "2024-01")
+        finally:
+            await runner.cleanup()
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first == second
+    assert second["A"] == {"symbol": "A", "ok": True}
+    assert sorted(calls) == ["A", "B", "BUSY", "BUSY"]
+    assert cache.stats()["hits"] == 2
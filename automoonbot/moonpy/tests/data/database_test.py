@@ -0,0 +1,80 @@
+import sqlite3
+import pandas as pd
+import pytest
+from automoonbot.moonpy.data import BarStore, DBInterface
+
+START = 1_700_000_000
+
+
+@pytest.fixture
+def frame():
+    n = 100
+    return pd.DataFrame(
+        {
+            "symbol": ["foo", "bar"] * n,
+            "timestamp": [START + 60 * (i // 2) for i in range(2 * n)],
+            "open": [float(i) for i in range(2 * n)],
+            "high": [float(i) for i in range(2 * n)],
+            "low": [float(i) for i in range(2 * n)],
+            "close": [float(i) for i in range(2 * n)],
+            "volume": [100.0] * (2 * n),
+        }
+    )
+
+
+def test_bar_store(tmp_path, frame):
+    store = BarStore(str(tmp_path / "bars.db"))
+    assert store.insert(frame) == len(frame)
+    assert store.insert(frame.head(10)) == 10
+    assert store.count() == len(frame)
+    assert sorted(store.symbols()) == ["bar", "foo"]
+    assert store.latest("foo") == START + 60 * 99
+    assert store.latest("baz") is None
+
+    data = store.between("foo", START + 60 * 10, START + 60 * 19)
+    assert len(data) == 10
+    assert data["timestamp"].is_monotonic_increasing
+    assert (data["symbol"] == "foo").all()
+
+    chunks = list(store.iter_between(["foo", "bar"], START, START + 60 * 99, 64))
+    assert [len(chunk) for chunk in chunks] == [64, 64, 64, 8]
+    assert pd.concat(chunks)["timestamp"].is_monotonic_increasing
+
+    plan = store.connection.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM bars "
+        "WHERE symbol = ? AND timestamp BETWEEN ? AND ?",
+        ["foo", START, START + 60],
+    ).fetchall()
+    assert any("PRIMARY KEY" in row[-1] for row in plan)
+    mode = store.connection.execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode == "wal"
+    store.close()
+
+
+def test_db_interface(tmp_path):
+    database = str(tmp_path / "tables.db")
+    con = sqlite3.connect(database)
+    for table in ("a", "b"):
+        con.execute(f"CREATE TABLE {table} (timestamp INTEGER, value REAL)")
+        con.executemany(
+            f"INSERT INTO {table} VALUES (?, ?)", [(i, float(i)) for i in range(10)]
+        )
+    con.commit()
+    con.close()
+
+    interface = DBInterface(database, "timestamp", ["a", "b"], 0, 1)
+    assert len(interface.get_one(3, "a")) == 1
+    assert len(interface.get_one(3)) == 2
+    assert interface.get_one(30) is None
+    assert len(interface.get_between(2, 5, "b")) == 4
+    chunks = list(interface.get_between(2, 5, chunksize=3))
+    assert [len(chunk) for chunk in chunks] == [3, 3, 2]
+
+    with pytest.raises(ValueError):
+        DBInterface(database, "timestamp; DROP TABLE a", ["a"], 0, 1)
+
+    con = sqlite3.connect(database)
+    assert con.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    indexes = con.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    assert indexes.fetchall() == []
+    con.close()
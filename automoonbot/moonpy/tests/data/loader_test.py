@@ -0,0 +1,35 @@
+from automoonbot.moonpy.data import NeighbourLoader
+
+
+class Graph:
+    def __init__(self):
+        self.calls = []
+
+    def sample(self, seeds, fanouts, seed):
+        self.calls.append((seeds, fanouts, seed))
+        return seeds
+
+
+def test_batches():
+    graph = Graph()
+    seeds = [f"s{i}" for i in range(10)]
+    loader = NeighbourLoader(graph, seeds, [5, 2], batch_size=4)
+    assert len(loader) == 3
+    batches = list(loader)
+    assert batches == [seeds[:4], seeds[4:8], seeds[8:]]
+    assert all(fanouts == [5, 2] for _, fanouts, _ in graph.calls)
+    assert len({seed for _, _, seed in graph.calls}) == 3
+
+
+def test_shuffle():
+    seeds = [f"s{i}" for i in range(10)]
+
+    def batches():
+        return list(
+            NeighbourLoader(Graph(), seeds, [2], batch_size=3, shuffle=True, seed=1)
+        )
+
+    first, again = batches(), batches()
+    assert first == again
+    assert sorted(sum(first, [])) == sorted(seeds)
+    assert sum(first, []) != seeds
@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+from automoonbot.moonpy.data.parsing import (
+    ColumnStore,
+    parse_news,
+    parse_options,
+    parse_series,
+)
+
+
+def intraday():
+    return {
+        "Meta Data": {"6. Time Zone": "US/Eastern"},
+        "Time Series (1min)": {
+            f"2024-01-02 09:3{i}:00": {
+                "1. open": f"{i}.5",
+                "2. high": "2.0",
+                "3. low": "0.5",
+                "4. close": "1.25",
+                "5. volume": str(100 * i),
+            }
+            for i in reversed(range(5))
+        },
+    }
+
+
+def test_parse_series():
+    columns = parse_series(intraday())
+    assert columns["timestamp"].dtype == np.int64
+    assert columns["timestamp"][0] == 1704205800
+    assert (np.diff(columns["timestamp"]) == 60).all()
+    assert columns["open"].dtype == np.float64
+    assert columns["open"].tolist() == [0.5, 1.5, 2.5, 3.5, 4.5]
+    assert columns["volume"].tolist() == [0.0, 100.0, 200.0, 300.0, 400.0]
+
+    daily = parse_series(
+        {
+            "Meta Data": {"5. Time Zone": "US/Eastern"},
+            "Time Series (Daily)": {
+                "2024-01-03": {"4. close": "2", "5. adjusted close": "1.9"},
+                "2024-01-02": {"4. close": "1", "5. adjusted close": "0.9"},
+            },
+        }
+    )
+    assert daily["adjusted_close"].tolist() == [0.9, 1.9]
+    assert parse_series({"Note": "busy"})["timestamp"].size == 0
+
+
+def test_parse_news():
+    payload = {
+        "feed": [
+            {
+                "title": "a",
+                "time_published": "20240102T093000",
+                "overall_sentiment_score": 0.25,
+                "ticker_sentiment": [
+                    {"ticker": "X", "relevance_score": "0.5"},
+                    {"ticker": "Y", "relevance_score": "0.1"},
+                ],
+            },
+            {
+                "title": "b",
+                "time_published": "20240103T000000",
+                "overall_sentiment_score": "bad",
+                "ticker_sentiment": [{"ticker": "X", "relevance_score": "1"}],
+            },
+        ]
+    }
+    news = parse_news(payload)
+    articles, tickers = news["articles"], news["tickers"]
+    assert articles["timestamp"].tolist() == [1704187800, 1704240000]
+    assert articles["overall_sentiment_score"][0] == 0.25
+    assert np.isnan(articles["overall_sentiment_score"][1])
+    assert tickers["article"].tolist() == [0, 0, 1]
+    assert tickers["ticker"].tolist() == ["X", "Y", "X"]
+    assert tickers["relevance_score"].tolist() == [0.5, 0.1, 1.0]
+    assert np.isnan(tickers["ticker_sentiment_score"]).all()
+
+
+def test_parse_options():
+    payload = {
+        "data": [
+            {
+                "contractID": "X240119C00100000",
+                "symbol": "X",
+                "type": "call",
+                "expiration": "2024-01-19",
+                "date": "2024-01-02",
+                "strike": "100.00",
+                "delta": "0.5",
+            }
+        ]
+    }
+    columns = parse_options(payload)
+    assert columns["expiration"].tolist() == [1705622400]
+    assert columns["strike"].tolist() == [100.0]
+    assert columns["type"].tolist() == ["call"]
+    assert np.isnan(columns["vega"][0])
+
+
+def test_column_store(tmp_path):
+    pytest.importorskip("pyarrow")
+    store = ColumnStore(str(tmp_path))
+    columns = parse_series(intraday())
+    assert ("S", "1min", "2024-01") not in store
+    store.save(columns, "S", "1min", "2024-01")
+    assert ("S", "1min", "2024-01") in store
+    loaded = store.load("S", "1min", "2024-01")
+    assert set(loaded) == set(columns)
+    for name, column in columns.items():
+        assert np.array_equal(loaded[name], column)
+    assert store.load("S", "1min", "2024-02") is None
@@ -0,0 +1,119 @@
+import multiprocessing as mp
+from multiprocessing import resource_tracker
+import numpy as np
+import pytest
+from automoonbot.moonpy.data import SharedGraphReader, SharedGraphWriter
+
+RELATION = ("Equity", "Influences", "Equity")
+
+
+def arrays(n, scale=1.0):
+    x = {"Equity": scale * np.arange(5 * n, dtype=np.float64).reshape(n, 5)}
+    edge_index = {RELATION: np.stack([np.arange(n), np.arange(n)[::-1]])}
+    edge_attr = {RELATION: np.full((n, 3), scale)}
+    return x, edge_index, edge_attr
+
+
+@pytest.fixture
+def writer():
+    with SharedGraphWriter(capacity=1024) as writer:
+        yield writer
+
+
+def test_round_trip(writer):
+    x, edge_index, edge_attr = arrays(4)
+    assert writer.publish(x, edge_index, edge_attr) == 1
+    with SharedGraphReader(writer.name) as reader:
+        version, rx, redge_index, redge_attr = reader.read()
+        assert version == 1
+        np.testing.assert_array_equal(rx["Equity"], x["Equity"])
+        np.testing.assert_array_equal(redge_index[RELATION], edge_index[RELATION])
+        np.testing.assert_array_equal(redge_attr[RELATION], edge_attr[RELATION])
+        assert redge_index[RELATION].dtype == np.int64
+        assert not rx["Equity"].flags.writeable
+        with pytest.raises(ValueError):
+            rx["Equity"][0, 0] = 1.0
+        del rx, redge_index, redge_attr
+
+
+def test_versions(writer):
+    with SharedGraphReader(writer.name) as reader:
+        writer.publish(*arrays(2))
+        version, x, _, _ = reader.read()
+        assert reader.valid(version)
+
+        writer.publish(*arrays(2, scale=2.0))
+        assert reader.version == 2
+        assert reader.valid(version)
+        assert x["Equity"][1, 0] == 5.0
+
+        writer.publish(*arrays(200, scale=3.0))
+        assert not reader.valid(version)
+        version, x, _, edge_attr = reader.read()
+        assert version == 3
+        assert x["Equity"].shape == (200, 5)
+        assert edge_attr[RELATION][-1, -1] == 3.0
+        del x, edge_attr
+
+
+def test_to_pyg(writer):
+    torch = pytest.importorskip("torch")
+    pytest.importorskip("torch_geometric")
+    writer.publish(*arrays(3))
+    with SharedGraphReader(writer.name) as reader:
+        version, data = reader.to_pyg()
+        assert version == 1
+        assert data["Equity"].x.dtype == torch.float64
+        assert data[RELATION].edge_index.shape == (2, 3)
+        del data
+
+
+def test_untracked(writer, monkeypatch):
+    posixshmem = pytest.importorskip("_posixshmem")
+    writer.publish(*arrays(2))
+    registered, intact = [], []
+
+    def register(*args):
+        registered.append(args)
+
+    def shm_open(*args, **kwargs):
+        intact.append(resource_tracker.register is register)
+        return open_segment(*args, **kwargs)
+
+    open_segment = posixshmem.shm_open
+    monkeypatch.setattr(resource_tracker, "register", register)
+    monkeypatch.setattr(posixshmem, "shm_open", shm_open)
+    with SharedGraphReader(writer.name) as reader:
+        version, x, _, _ = reader.read()
+        assert (version, x["Equity"].shape) == (1, (2, 5))
+        del x
+    assert registered == []
+    assert intact and all(intact)
+
+
+def test_unpublished(writer):
+    with SharedGraphReader(writer.name, timeout=0.01) as reader:
+        with pytest.raises(TimeoutError):
+            reader.read()
+
+
+def total(name, queue):
+    with SharedGraphReader(name) as reader:
+        version, x, _, edge_attr = reader.read()
+        queue.put((version, float(x["Equity"].sum() + edge_attr[RELATION].sum())))
+        del x, edge_attr
+
+
+def test_processes(writer):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    writer.publish(*arrays(8))
+    workers = [ctx.Process(target=total, args=(writer.name, queue)) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    results = [queue.get(timeout=60) for _ in workers]
+    for worker in workers:
+        worker.join(timeout=60)
+    x, _, edge_attr = arrays(8)
+    expected = float(x["Equity"].sum() + edge_attr[RELATION].sum())
+    assert results == [(1, expected)] * 2
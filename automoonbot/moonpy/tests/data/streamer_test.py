@@ -1,6 +1,7 @@
 import time
+import sqlite3
 import pytest
-from automoonbot.moonpy.data import Streamer
+from automoonbot.moonpy.data import Streamer, DBStreamer, RingBuffer
 
 DATA_SIZE = 10
 QUEUE_SIZE = 1
@@ -49,4 +50,78 @@ def test_iterator_protocol(data):
     assert val == 1, "queue should have data"
     with pytest.raises(StopIteration):
         next(streamer)
-    streamer.stop()
\ No newline at end of file
+    streamer.stop()
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / "replay.db")
+    con = sqlite3.connect(path)
+    for table in ("a", "b"):
+        con.execute(f"CREATE TABLE {table} (timestamp INTEGER, value REAL)")
+        con.executemany(
+            f"INSERT INTO {table} VALUES (?, ?)",
+            [(i, float(i)) for i in range(0, 100, 3)],
+        )
+    con.commit()
+    con.close()
+    return path
+
+
+def test_db_streamer_windows(database):
+    streamer = DBStreamer(2, database, "timestamp", ["a", "b"], 10, 10, 60, chunksize=4)
+    streamer.prefill()
+    first, second = next(streamer), next(streamer)
+    assert sorted(first["timestamp"]) == [12, 12, 15, 15, 18, 18]
+    assert list(first.columns) == ["timestamp", "value"]
+    assert second["timestamp"].between(20, 29).all()
+
+    windows = []
+    while (data := streamer.get_data()) is not None:
+        windows.append(data)
+    assert len(windows) == 3
+    assert windows[-1]["timestamp"].max() == 57
+    assert streamer.starts == 50
+
+
+def test_db_streamer_thread(database):
+    streamer = DBStreamer(2, database, "timestamp", ["a"], 0, 10)
+    windows = []
+    deadline = time.time() + 5
+    with streamer:
+        while len(windows) < 10 and time.time() < deadline:
+            data = next(streamer)
+            if data is not None:
+                windows.append(data)
+    assert len(windows) == 10
+    assert sum(len(window) for window in windows) == 34
+
+
+@pytest.mark.parametrize(
+    "policy, expected",
+    [("drop-oldest", [2, 3, 4]), ("coalesce-latest", [0, 1, 4]), ("block", [0, 1, 2])],
+)
+def test_ring_buffer_policies(policy, expected):
+    ring = RingBuffer(3, policy)
+    accepted = ring.put_many(range(5), timeout=0.01)
+    assert ring.get_many() == expected
+    stats = ring.stats()
+    assert stats["consumed"] == 3
+    assert accepted == (3 if policy == "block" else 5)
+    assert stats["dropped"] == (2 if policy == "drop-oldest" else 0)
+    assert stats["coalesced"] == (2 if policy == "coalesce-latest" else 0)
+
+
+def test_batched_throughput():
+    n = 50_000
+    streamer = Streamer(1024, data=range(n))
+    received = []
+    deadline = time.time() + 30
+    with streamer:
+        while len(received) < n and time.time() < deadline:
+            received.extend(streamer.next_batch(timeout=0.1))
+    assert received == list(range(n))
+    stats = streamer.stats
+    assert stats["dropped"] == 0
+    assert stats["consumed"] == n
+    assert stats["latency_max"] >= stats["latency_mean"] >= 0
@@ -1,5 +1,12 @@
+import time
+import torch
+import pandas as pd
 import pytest
-from automoonbot.moonpy.data import HeteroGraphWrapper
+from automoonbot.moonpy.data import (
+    HeteroGraphWrapper,
+    SharedGraphReader,
+    SharedGraphWriter,
+)
 
 
 def test_basics():
@@ -9,3 +16,214 @@ def test_basics():
     wrapper.add_article("title", "summary", 1.0, "publisher", 1, {})
     assert wrapper.node_count() == 2
     assert wrapper.edge_count() == 1
+
+
+def test_to_pyg():
+    wrapper = HeteroGraphWrapper()
+    wrapper.add_equity("foo", "", 10)
+    wrapper.add_equity("bar", "", 10)
+    for symbol in ("foo", "bar"):
+        wrapper.update_equity(
+            symbol=symbol,
+            timestamp=time.time(),
+            duration=60,
+            adjusted=True,
+            open=1.0,
+            high=1.1,
+            low=0.9,
+            close=1.0,
+            volume=100,
+        )
+
+    data = wrapper.to_pyg()
+    assert data["Equity"].x.shape == (2, 5)
+    assert data["Equity"].x.dtype == torch.float64
+    relation = ("Equity", "Influences", "Equity")
+    assert data[relation].edge_index.shape == (2, 2)
+    assert data[relation].edge_index.dtype == torch.int64
+    assert data[relation].edge_attr.size(0) == 2
+
+
+def test_to_pyg_snapshot():
+    wrapper = HeteroGraphWrapper()
+    wrapper.enable_snapshot()
+    for symbol, price in (("foo", 1.0), ("bar", 2.0), ("baz", 3.0)):
+        wrapper.add_equity(symbol, "", 10)
+        wrapper.update_equity(
+            symbol=symbol,
+            timestamp=time.time(),
+            duration=60,
+            adjusted=True,
+            open=price,
+            high=price,
+            low=price,
+            close=price,
+            volume=100,
+        )
+
+    data = wrapper.to_pyg()
+    assert data["Equity"].x.shape == (3, 5)
+
+    wrapper.remove_node("foo")
+    data = wrapper.to_pyg()
+    assert data["Equity"].x.shape == (2, 5)
+    relation = ("Equity", "Influences", "Equity")
+    index = data[relation].edge_index
+    assert int(index.max()) < 2
+    assert torch.all(index[0] != index[1])
+
+
+def test_update_equities_batch():
+    wrapper = HeteroGraphWrapper()
+    wrapper.add_equities(["foo", "bar"], capacity=10)
+    now = time.time()
+    frame = pd.DataFrame(
+        {
+            "symbol": ["foo", "bar", "foo", "bar", "baz"],
+            "timestamp": [now, now, now + 60, now + 60, now],
+            "open": [1.0, 2.0, 1.1, 2.1, 3.0],
+            "high": [1.0, 2.0, 1.1, 2.1, 3.0],
+            "low": [1.0, 2.0, 1.1, 2.1, 3.0],
+            "close": [1.0, 2.0, 1.1, 2.1, 3.0],
+            "volume": [100, 200, 100, 200, 300],
+        }
+    )
+    assert wrapper.update_equities_batch(frame) == 4
+    assert wrapper.node_count() == 2
+    assert wrapper.edge_count() == 2
+
+    data = wrapper.to_pyg()
+    assert data["Equity"].x.shape == (2, 5)
+
+
+def test_stat_features():
+    wrapper = HeteroGraphWrapper()
+    wrapper.add_equity("foo", "", 10)
+    wrapper.enable_stat_features(3, 1)
+    now = time.time()
+    for i in range(5):
+        price = float(i * i)
+        wrapper.update_equity(
+            symbol="foo",
+            timestamp=now + 60 * i,
+            duration=60,
+            adjusted=True,
+            open=price,
+            high=price,
+            low=price,
+            close=price,
+            volume=100,
+        )
+
+    stats = wrapper.rolling_stats("foo", 3, 1)
+    assert set(stats) == {"zscore", "skew", "kurtosis", "momentum", "autocorrelation"}
+    assert stats["momentum"][3] == 16.0 - 1.0
+
+    data = wrapper.to_pyg()
+    assert data["Equity"].x.shape == (1, 30)
+
+
+def test_eviction():
+    wrapper = HeteroGraphWrapper()
+    wrapper.add_equity("foo", "", 10)
+    wrapper.enable_eviction(0.5, capacity=2)
+    start = 1_700_000_000.0
+    for i, publisher in enumerate(["a", "b", "a"]):
+        wrapper.add_article(
+            f"article {i}", "summary", 0.5, publisher, 1, {"foo": 0.5}, start + 60 * i
+        )
+    assert wrapper.node_count() == 5
+    assert wrapper.edge_count() == 4
+    assert wrapper.article_decay("article 2", start + 60 * 2) > 0.99
+
+    assert wrapper.prune(start + 60) == 0
+    assert wrapper.prune(start + 1e6) == 2
+    assert wrapper.node_count() == 1
+    with pytest.raises(ValueError):
+        wrapper.enable_eviction(1.5)
+
+
+def test_sample():
+    wrapper = HeteroGraphWrapper()
+    symbols = [f"s{i}" for i in range(8)]
+    wrapper.add_equities(symbols, capacity=10)
+    start = 1_700_000_000.0
+    frame = pd.DataFrame(
+        {
+            "symbol": symbols * 4,
+            "timestamp": [start + 60 * t for t in range(4) for _ in symbols],
+            "open": 1.0,
+            "high": 1.1,
+            "low": 0.9,
+            "close": [1.0 + (t * (i + 1) % 5) / 10 for t in range(4) for i in range(8)],
+            "volume": 100.0,
+        }
+    )
+    wrapper.update_equities_batch(frame)
+
+    data = wrapper.sample(["s0", "s1"], [2, 2], seed=3)
+    assert data["Equity"].batch_size == 2
+    assert data["Equity"].names[:2] == ["s0", "s1"]
+    assert data["Equity"].x.size(0) == len(data["Equity"].names) <= 2 + 4 + 8
+    relation = ("Equity", "Influences", "Equity")
+    assert data[relation].edge_index.size(1) <= 2 * 2 + 4 * 2
+    assert int(data[relation].edge_index.max()) < data["Equity"].x.size(0)
+
+    data = wrapper.sample(["s0"], [-1])
+    assert data[relation].edge_index.size(1) == 7
+    with pytest.raises(ValueError):
+        wrapper.sample(["missing"], [1])
+
+
+def bars(symbols, start, periods):
+    return pd.DataFrame(
+        {
+            "symbol": symbols * periods,
+            "timestamp": [start + 60 * t for t in range(periods) for _ in symbols],
+            "open": 1.0,
+            "high": 1.1,
+            "low": 0.9,
+            "close": [
+                1.0 + (t * (i + 1) % 5) / 10
+                for t in range(periods)
+                for i in range(len(symbols))
+            ],
+            "volume": 100.0,
+        }
+    )
+
+
+def assert_same_graph(data, expected):
+    assert set(data.node_types) == set(expected.node_types)
+    assert set(data.edge_types) == set(expected.edge_types)
+    for cls in expected.node_types:
+        assert torch.equal(data[cls].x, expected[cls].x)
+    for relation in expected.edge_types:
+        assert torch.equal(data[relation].edge_index, expected[relation].edge_index)
+        assert torch.equal(data[relation].edge_attr, expected[relation].edge_attr)
+
+
+def test_publish():
+    wrapper = HeteroGraphWrapper()
+    symbols = ["foo", "bar", "baz"]
+    wrapper.add_equities(symbols, capacity=10)
+    start = 1_700_000_000.0
+    wrapper.update_equities_batch(bars(symbols, start, 4))
+    with SharedGraphWriter() as writer, SharedGraphReader(writer.name) as reader:
+        assert wrapper.publish(writer) == 1
+        version, data = reader.to_pyg()
+        assert version == 1
+        expected = wrapper.to_pyg()
+        assert "Equity" in expected.node_types
+        assert ("Equity", "Influences", "Equity") in expected.edge_types
+        assert_same_graph(data, expected)
+        del data
+
+        wrapper.update_equities_batch(bars(symbols, start + 240, 1))
+        assert wrapper.publish(writer) == 2
+        version, data = reader.to_pyg()
+        assert version == 2
+        updated = wrapper.to_pyg()
+        assert not torch.equal(updated["Equity"].x, expected["Equity"].x)
+        assert_same_graph(data, updated)
+        del data
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+import pytest
+from automoonbot.moonpy.data import HeteroGraphWrapper, Streamer
+from automoonbot.moonpy.environment import Environment
+from automoonbot.moonpy.session import BATCH_TRANSFER
+
+TRADABLES = ["USD", "AMD", "SPY"]
+
+
+class Graph:
+    def __init__(self):
+        self.updates = 0
+        self.exports = 0
+
+    def update_equities_batch(self, frame):
+        self.updates += 1
+        return len(frame)
+
+    def to_pyg(self):
+        self.exports += 1
+        return self.updates
+
+
+class Wrapper(HeteroGraphWrapper):
+    def __init__(self):
+        super().__init__()
+        self.batches = 0
+
+    def update_equities_batch(self, frame, duration=60):
+        self.batches += 1
+        return super().update_equities_batch(frame, duration)
+
+
+def frames(closes, bars=True):
+    result = []
+    for t, (amd, spy) in enumerate(closes):
+        frame = pd.DataFrame(
+            {
+                "symbol": ["AMD", "SPY", "AMD"],
+                "timestamp": [60 * t, 60 * t, 60 * t - 30],
+                "close": [amd, spy, -1.0],
+            }
+        )
+        if bars:
+            for name in ["open", "high", "low"]:
+                frame[name] = frame["close"]
+            frame["volume"] = 1000.0
+        result.append(frame)
+    return result
+
+
+@pytest.fixture
+def closes():
+    return [(100.0, 500.0), (110.0, 500.0), (99.0, 550.0), (99.0, 550.0)]
+
+
+def test_environment_steps(closes):
+    graph = Graph()
+    streamer = Streamer(2, data=frames(closes), policy="block", sleep=0)
+    env = Environment(streamer, "USD", TRADABLES, envs=3, graph=graph)
+    observation = env.reset()
+    assert observation.quotes.tolist() == [1.0, 100.0, 500.0]
+    assert observation.graph == 1
+    assert graph.exports == 1
+
+    action = np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.5, 0.5]])
+    rewards = []
+    done, steps = False, 0
+    while not done:
+        observation, reward, done, info = env.step(action)
+        if not done:
+            rewards.append(reward)
+            steps += 1
+    assert steps == len(closes) - 1
+    assert graph.updates == len(closes)
+    assert graph.exports == 1
+    total = np.exp(np.sum(rewards, axis=0))
+    rebalanced = (1.1 + 1.0) / 2 * (0.9 + 1.1) / 2
+    assert np.allclose(total, [1.0, 99 / 100, rebalanced])
+    assert np.allclose(info["total"], total)
+    env.close()
+
+
+def test_environment_transfers(closes):
+    streamer = Streamer(2, data=frames(closes), policy="block", sleep=0)
+    env = Environment(streamer, "USD", TRADABLES, envs=2)
+    first = env.reset()
+    transfers = np.array([(1, 0, 1, 0.5)], dtype=BATCH_TRANSFER)
+    observation, reward, done, _ = env.step(transfers)
+    assert not done
+    assert np.allclose(reward, [0.0, np.log(0.5 + 0.5 * 1.1)])
+    assert np.allclose(observation.weights.sum(axis=1), 1.0)
+    assert observation.graph is None
+    with pytest.raises(RuntimeError):
+        first.graph
+    with pytest.raises(ValueError):
+        env.step(np.array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0]]))
+    assert np.isfinite(env.portfolio.values).all()
+    env.close()
+
+
+def test_environment_bars(closes):
+    graph = Wrapper()
+    graph.add_equities(["AMD", "SPY"], capacity=8)
+    with pytest.raises(KeyError):
+        graph.update_equities_batch(frames(closes, bars=False)[0])
+    graph.batches = 0
+
+    streamer = Streamer(2, data=frames(closes, bars=False), policy="block", sleep=0)
+    env = Environment(streamer, "USD", TRADABLES, graph=graph)
+    observation = env.reset()
+    assert observation.quotes.tolist() == [1.0, 100.0, 500.0]
+    while not env.step(np.array([[1.0, 0.0, 0.0]]))[2]:
+        pass
+    assert graph.batches == 0
+    env.close()
+
+    streamer = Streamer(2, data=frames(closes), policy="block", sleep=0)
+    env = Environment(streamer, "USD", TRADABLES, graph=graph)
+    env.reset()
+    while not env.step(np.array([[1.0, 0.0, 0.0]]))[2]:
+        pass
+    assert graph.batches == len(closes)
+    env.close()
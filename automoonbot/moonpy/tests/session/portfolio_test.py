@@ -0,0 +1,138 @@
+import numpy as np
+import pytest
+from automoonbot.moonpy.session import (
+    BATCH_TRANSFER,
+    TRANSFER,
+    BatchPortfolio,
+    Portfolio,
+)
+
+TRADABLES = ["USD", "BTC", "AMD", "SPY"]
+
+
+def dense_step(values, u, transfers):
+    """
+    Reference step of one portfolio through the transfer matrix diag(u) + T
+    """
+    t = np.diag(u)
+    for src, tgt, size in transfers:
+        t[src, src] -= size
+        t[src, tgt] += size
+    return values @ t
+
+
+def test_batch_portfolio():
+    envs = 64
+    rng = np.random.default_rng(0)
+    portfolio = BatchPortfolio("USD", TRADABLES, envs)
+    assert portfolio.portfolio.shape == (envs, 4, 3)
+    assert np.allclose(portfolio.total(), 1.0)
+
+    expected = portfolio.values.copy()
+    prices = np.ones((envs, 4))
+    portfolio.update_quotes(prices)
+    for _ in range(10):
+        prices = prices * np.exp(rng.normal(0, 0.01, (envs, 4)))
+        prices[:, 0] = 1.0
+        n = 32
+        env = rng.integers(0, envs, n)
+        src = rng.integers(0, 4, n)
+        tgt = (src + rng.integers(1, 4, n)) % 4
+        size = rng.uniform(0, 0.1, n)
+
+        log = portfolio.portfolio[:, :, BatchPortfolio.ColAttr.LogQuote.value]
+        u = prices / np.exp(log)
+        for e in range(envs):
+            mask = env == e
+            transfers = zip(src[mask], tgt[mask], size[mask])
+            expected[e] = dense_step(expected[e], u[e], transfers)
+        totals = portfolio.step(prices, env, src, tgt, size)
+        assert np.allclose(portfolio.values, expected)
+        assert np.allclose(totals, expected.sum(axis=1))
+
+
+def test_batch_portfolio_transfers():
+    portfolio = BatchPortfolio("USD", TRADABLES, 2)
+    index = portfolio.indexes(["USD", "AMD"])
+    portfolio.apply(
+        env=np.array([0, 1]),
+        src=index[[0, 0]],
+        tgt=index[[1, 1]],
+        size=np.array([0.5, 0.25]),
+    )
+    assert portfolio.values[0].tolist() == [0.5, 0.0, 0.5, 0.0]
+    assert portfolio.values[1].tolist() == [0.75, 0.0, 0.25, 0.0]
+
+    portfolio.update_quotes(np.array([1.0, 1.0, 200.0, 1.0]))
+    portfolio.update_quotes(np.array([1.0, 1.0, 220.0, 1.0]))
+    portfolio.apply(portfolio.growth())
+    assert np.allclose(portfolio.values[:, 2], [0.55, 0.275])
+    assert np.allclose(portfolio.growth(), 1.0)
+
+    portfolio.reset(np.array([1]))
+    assert portfolio.values[1].tolist() == [1.0, 0.0, 0.0, 0.0]
+    assert np.isclose(portfolio.values[0, 2], 0.55)
+    assert np.allclose(portfolio.weights().sum(axis=1), 1.0)
+
+
+def test_portfolio_transactions():
+    portfolio = Portfolio("USD", TRADABLES)
+    portfolio.update_quotes({"BTC": 50000.0, "AMD": 200.0, "SPY": 500.0})
+    transaction = portfolio._build_transaction(
+        [{"type": "buy", "asset": "AMD", "size": 0.5}]
+    )
+    assert transaction.dtype == TRANSFER
+    portfolio.apply_transaction(transaction)
+    assert np.allclose(portfolio.values, [0.5, 0.0, 0.5, 0.0])
+
+    portfolio.update_quotes({"BTC": 45000.0, "AMD": 205.0, "SPY": 510.0})
+    transfers = np.array([(0, 1, 0.2), (2, 0, 0.4)], dtype=TRANSFER)
+    portfolio.apply_transaction(transfers)
+    amd = 0.5 * 205.0 / 200.0
+    assert np.allclose(portfolio.values, [0.5 - 0.1 + 0.2, 0.1, amd - 0.2, 0.0])
+
+    dense = np.eye(4)
+    dense[0, 0], dense[0, 3] = 0.5, 0.5
+    before = portfolio.values.copy()
+    portfolio.apply_transaction(dense)
+    assert np.allclose(portfolio.values, before @ dense)
+
+    reordered = np.array(
+        [(0.1, 2, 0)], dtype=[("size", float), ("src", int), ("tgt", int)]
+    )
+    assert portfolio._build_transaction(reordered)[0].tolist() == (2, 0, 0.1)
+
+
+@pytest.mark.parametrize(
+    "transfers",
+    [
+        [(0, 1, 1.5)],
+        [(0, 1, -0.1)],
+        [(0, 1, np.nan)],
+        [(0, 4, 0.1)],
+        [(1, 1, 0.1)],
+        [(0, 1, 0.6), (0, 2, 0.6)],
+    ],
+)
+def test_invalid_transfers(transfers):
+    portfolio = Portfolio("USD", TRADABLES)
+    with pytest.raises(ValueError):
+        portfolio.apply_transaction(np.array(transfers, dtype=TRANSFER))
+
+
+def test_batch_transact():
+    portfolio = BatchPortfolio("USD", TRADABLES, 3)
+    transfers = np.array(
+        [(0, 0, 2, 0.5), (2, 0, 1, 0.5), (2, 0, 3, 0.5)], dtype=BATCH_TRANSFER
+    )
+    portfolio.transact(transfers)
+    assert portfolio.values.tolist() == [
+        [0.5, 0.0, 0.5, 0.0],
+        [1.0, 0.0, 0.0, 0.0],
+        [0.0, 0.5, 0.0, 0.5],
+    ]
+    with pytest.raises(ValueError):
+        portfolio.transact(np.array([(3, 0, 1, 0.1)], dtype=BATCH_TRANSFER))
+    with pytest.raises(ValueError):
+        overdrawn = np.array([(1, 0, 1, 0.6), (1, 0, 2, 0.6)], dtype=BATCH_TRANSFER)
+        portfolio.transact(overdrawn)
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from automoonbot.moonpy.utils.timing import (
+    DecayTable,
+    compute_time_decay,
+    decay_table,
+)
+
+
+def scalar_decay(start, end, shift=7, alpha=0.5):
+    if start > end:
+        return 0
+    elapsed = max(end - start, 1e-3)
+    return 1 - 1 / (1 + np.exp(-alpha * (np.log(elapsed) - shift)))
+
+
+@pytest.fixture
+def starts():
+    rng = np.random.default_rng(0)
+    return 1.7e9 - rng.uniform(-600, 1e7, 1000)
+
+
+def test_scalar():
+    assert compute_time_decay(0, np.exp(7)) == pytest.approx(0.5)
+    assert compute_time_decay(10, 5) == 0.0
+    assert isinstance(compute_time_decay(0.0, 60.0), float)
+
+
+def test_vectorised(starts):
+    decay = compute_time_decay(starts, 1.7e9, shift=6, alpha=0.8)
+    expected = [scalar_decay(start, 1.7e9, shift=6, alpha=0.8) for start in starts]
+    np.testing.assert_allclose(decay, expected, rtol=0, atol=1e-12)
+    assert (decay[starts > 1.7e9] == 0).all()
+
+    grid = compute_time_decay(starts[:3, None], starts[None, :4] + 3600)
+    assert grid.shape == (3, 4)
+
+
+def test_table(starts):
+    exact = compute_time_decay(starts, 1.7e9)
+    np.testing.assert_allclose(
+        compute_time_decay(starts, 1.7e9, table=True), exact, rtol=0, atol=1e-6
+    )
+    assert decay_table(7, 0.5) is decay_table(7, 0.5)
+    table = DecayTable(7, 0.5, size=64)
+    assert table(0, np.exp(7)) == pytest.approx(0.5, abs=1e-3)
+    assert table(0, 1e15) == pytest.approx(table(0, 1e9))
+    assert table(1, 0) == 0.0
@@ -2,21 +2,69 @@ import dateparser
 import humanfriendly
 import numpy as np
 from typing import List
+from functools import lru_cache
 from dateutil.relativedelta import relativedelta
 
 
+# Range of the decay tables in log seconds, from a millisecond to ~30 years
+LOG_MIN = np.log(1e-3)
+LOG_MAX = np.log(1e9)
+
+
+def _decay(log_time: np.ndarray, shift: float, alpha: float) -> np.ndarray:
+    return 1 - 1 / (1 + np.exp(-alpha * (log_time - shift)))
+
+
 def compute_time_decay(
-    start: float, end: float, shift: float = 7, alpha: float = 0.5
-) -> float:
-    if start > end:
-        return 0
+    start, end, shift: float = 7, alpha: float = 0.5, table: bool = False
+):
+    """
+    Weight of items started at `start` as of `end`, both in seconds, which
+    falls from 1 to 0 along a sigmoid of the log elapsed time. Scalars and
+    arrays broadcast against each other, items from the future weigh 0.
+    With `table` the weights are read from the `DecayTable` of the setting
+    """
+    if table:
+        return decay_table(shift, alpha)(start, end)
+    elapsed = np.subtract(end, start, dtype=np.float64)
+    decay = _decay(np.log(np.maximum(elapsed, 1e-3)), shift, alpha)
+    decay = np.where(elapsed < 0, 0.0, decay)
+    return decay if decay.ndim else float(decay)
+
+
+class DecayTable:
+    """
+    `compute_time_decay` for one setting, tabulated over the log elapsed
+    time and read back by linear interpolation, which trades the `exp` of
+    every item for an index. Ages past ~30 years read as the last entry
+    """
+
+    def __init__(self, shift: float = 7, alpha: float = 0.5, size: int = 4096) -> None:
+        self.shift = shift
+        self.alpha = alpha
+        self._scale = (size - 1) / (LOG_MAX - LOG_MIN)
+        grid = np.linspace(LOG_MIN, LOG_MAX, size)
+        # One extra entry so that the last index interpolates without a branch
+        values = _decay(grid, shift, alpha)
+        self._values = np.append(values, values[-1])
+
+    def __call__(self, start, end):
+        elapsed = np.subtract(end, start, dtype=np.float64)
+        position = (np.log(np.maximum(elapsed, 1e-3)) - LOG_MIN) * self._scale
+        position = np.minimum(position, len(self._values) - 2)
+        index = position.astype(np.intp)
+        weight = position - index
+        decay = self._values[index] * (1 - weight) + self._values[index + 1] * weight
+        decay = np.where(elapsed < 0, 0.0, decay)
+        return decay if decay.ndim else float(decay)
 
-    sigmoid = lambda x, alpha: 1 / (1 + np.exp(-alpha * x))
 
-    time_delta = max(end - start, 1e-3)
-    log_time = np.log(time_delta)
-    shifted = log_time - shift
-    return 1 - sigmoid(shifted, alpha)
+@lru_cache(maxsize=16)
+def decay_table(shift: float = 7, alpha: float = 0.5) -> DecayTable:
+    """
+    Shared `DecayTable` of a setting, built on first use
+    """
+    return DecayTable(shift, alpha)
 
 
 class Timing:
@@ -0,0 +1,162 @@
+use crate::data::*;
+
+/// Borrowed `(rows, cols)` view into a `Columns` store.
+pub type ColumnsView<'a> = na::DMatrixView<'a, f64, na::Dyn, na::Dyn>;
+
+/// Fixed capacity window of numeric rows stored column by column. Each
+/// column owns a preallocated run of `stride` values, larger than the
+/// capacity, and the live rows occupy `start..start + len` in every run.
+/// Evicting a row only advances `start`; once a run is exhausted the live
+/// rows are moved back to its front, which costs `O(capacity)` once every
+/// `stride - capacity` pushes. The live rows are therefore always contiguous
+/// per column, so matrix and column views are borrowed without copying.
+#[derive(Debug, Clone, Default)]
+pub struct Columns {
+    cols: usize,
+    capacity: usize,
+    stride: usize,
+    start: usize,
+    len: usize,
+    data: Vec<f64>,
+    row: Vec<f64>,
+}
+
+impl Columns {
+    pub fn new(capacity: usize) -> Self {
+        Self {
+            capacity,
+            stride: capacity + (capacity / 2).max(1),
+            ..Default::default()
+        }
+    }
+
+    pub fn rows(&self) -> usize {
+        self.len
+    }
+
+    pub fn cols(&self) -> usize {
+        self.cols
+    }
+
+    pub fn clear(&mut self) {
+        self.start = 0;
+        self.len = 0;
+    }
+
+    /// Appends the columns of `item`, evicting the oldest row at capacity.
+    /// The first row pushed fixes the column count, rows of another width
+    /// are ignored.
+    pub fn push<T: Row>(&mut self, item: &T) {
+        if self.capacity == 0 {
+            return;
+        }
+        let mut row = std::mem::take(&mut self.row);
+        row.clear();
+        item.write_row(&mut row);
+        if self.cols == 0 && !row.is_empty() {
+            self.cols = row.len();
+            self.data = vec![0.0; self.cols * self.stride];
+        }
+        if row.len() == self.cols && self.cols > 0 {
+            if self.len == self.capacity {
+                self.start += 1;
+                self.len -= 1;
+            }
+            if self.start + self.len == self.stride {
+                self.compact();
+            }
+            let offset = self.start + self.len;
+            for (j, value) in row.iter().enumerate() {
+                self.data[j * self.stride + offset] = *value;
+            }
+            self.len += 1;
+        }
+        self.row = row;
+    }
+
+    fn compact(&mut self) {
+        for j in 0..self.cols {
+            let base = j * self.stride;
+            self.data
+                .copy_within(base + self.start..base + self.start + self.len, base);
+        }
+        self.start = 0;
+    }
+
+    /// Live values of column `j`, oldest first.
+    pub fn column(&self, j: usize) -> Option<&[f64]> {
+        if j >= self.cols {
+            return None;
+        }
+        let base = j * self.stride + self.start;
+        Some(&self.data[base..base + self.len])
+    }
+
+    /// Overwrites `out` with row `i`, oldest first.
+    pub fn read_row(&self, i: usize, out: &mut Vec<f64>) -> bool {
+        out.clear();
+        if i >= self.len {
+            return false;
+        }
+        let offset = self.start + i;
+        out.extend((0..self.cols).map(|j| self.data[j * self.stride + offset]));
+        true
+    }
+
+    pub fn row(&self, i: usize) -> Option<na::RowDVector<f64>> {
+        if i >= self.len {
+            return None;
+        }
+        let offset = self.start + i;
+        Some(na::RowDVector::from_iterator(
+            self.cols,
+            (0..self.cols).map(|j| self.data[j * self.stride + offset]),
+        ))
+    }
+
+    /// Borrowed view of rows `a..b`.
+    pub fn view(&self, a: usize, b: usize) -> Option<ColumnsView<'_>> {
+        if a >= b || b > self.len || self.cols == 0 {
+            return None;
+        }
+        Some(ColumnsView::from_slice_with_strides(
+            &self.data[self.start + a..],
+            b - a,
+            self.cols,
+            1,
+            self.stride,
+        ))
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_wraparound() {
+        let mut columns = Columns::new(4);
+        for i in 0..23 {
+            let value = i as f64;
+            columns.push(&vec![value, -value]);
+        }
+        assert_eq!(columns.rows(), 4);
+        assert_eq!(columns.cols(), 2);
+        assert_eq!(columns.column(0), Some(&[19.0, 20.0, 21.0, 22.0][..]));
+        assert_eq!(columns.column(1), Some(&[-19.0, -20.0, -21.0, -22.0][..]));
+
+        let view = columns.view(1, 3).unwrap();
+        assert_eq!(view.shape(), (2, 2));
+        assert_eq!(view[(0, 0)], 20.0);
+        assert_eq!(view[(1, 1)], -21.0);
+
+        let mut row = Vec::new();
+        assert!(columns.read_row(3, &mut row));
+        assert_eq!(row, vec![22.0, -22.0]);
+        assert!(columns.view(0, 5).is_none());
+
+        columns.clear();
+        assert!(columns.view(0, 1).is_none());
+        assert_eq!(columns.column(0), Some(&[][..]));
+    }
+}
@@ -1,11 +1,16 @@
 mod aggregates;
 mod buffer;
+mod columns;
 mod common;
 mod queue;
+mod records;
+mod stats;
 
 use crate::*;
 
 pub use buffer::*;
+pub use columns::*;
 pub use common::*;
 pub use queue::*;
+pub use stats::*;
 pub use aggregates::*;
\ No newline at end of file
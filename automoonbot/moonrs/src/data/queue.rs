@@ -1,13 +1,18 @@
 use crate::data::*;
+use crate::utils::codec::*;
 use aggregates::Aggregates;
-use indexmap::IndexMap;
-use std::collections::VecDeque;
+use std::{collections::VecDeque, io};
 
+/// Bounded series of items keyed by strictly increasing timestamps. The
+/// timestamps are kept in a ring aligned with the items, so lookups by time
+/// are binary searches and pushing or evicting a row is `O(1)`.
 #[derive(Debug, Clone)]
 pub struct TimeSeries<T> {
     deque: VecDeque<T>,
-    index: IndexMap<Instant, usize>,
+    index: VecDeque<Instant>,
     capacity: usize,
+    columns: Columns,
+    stats: RollingStats,
 }
 
 impl<T> DataBuffer for TimeSeries<T>
@@ -16,9 +21,11 @@ where
 {
     fn new(capacity: usize) -> Self {
         TimeSeries {
-            index: IndexMap::with_capacity(capacity),
+            index: VecDeque::with_capacity(capacity),
             deque: VecDeque::with_capacity(capacity),
             capacity,
+            columns: Columns::new(capacity),
+            stats: RollingStats::default(),
         }
     }
 
@@ -31,24 +38,36 @@ where
     }
 
     fn clear(&mut self) {
-        self.deque.clear()
+        self.deque.clear();
+        self.index.clear();
+        self.columns.clear();
+        self.stats.clear();
     }
 }
 
 impl<T> RingIndexBuffer<Instant, T> for TimeSeries<T>
 where
-    T: Clone,
+    T: Clone + Row,
 {
+    /// Appends `item`, evicting the oldest row at capacity. Items stamped
+    /// at or before the latest stored timestamp are rejected.
     fn push(&mut self, id: Instant, item: T) -> bool {
-        if self.index.contains_key(&id) {
+        if self.capacity == 0 || self.index.back().is_some_and(|last| *last >= id) {
             return false;
         }
+        let mut evicted = None;
         if self.deque.len() == self.capacity {
-            self.deque.pop_front();
-            self.index.shift_remove_index(0);
+            evicted = self.deque.pop_front();
+            self.index.pop_front();
         }
         self.deque.push_back(item);
-        self.index.insert(id, self.deque.len() - 1);
+        self.index.push_back(id);
+        if let Some(item) = self.deque.back() {
+            self.columns.push(item);
+        }
+        if self.stats.is_tracking() {
+            self.stats.on_push(&self.deque, evicted.as_ref());
+        }
         true
     }
 
@@ -65,11 +84,7 @@ where
     }
 
     fn loc(&self, key: &Instant) -> Option<&T> {
-        if let Some(&index) = self.index.get(key) {
-            self.get(index)
-        } else {
-            None
-        }
+        self.get(self.position(key)?)
     }
 
     fn to_vec(&self) -> Vec<&T> {
@@ -85,31 +100,49 @@ where
     }
 
     fn between(&self, i: &Instant, j: &Instant) -> Option<Vec<&T>> {
-        let a = self
-            .index
-            .iter()
-            .find(|(key, _)| *key >= i)
-            .map(|(_, &index)| index)?;
-        let b = self
-            .index
-            .iter()
-            .rev()
-            .find(|(key, _)| *key <= j)
-            .map(|(_, &index)| index)?;
-        if a >= b || b > self.deque.len() {
+        let (a, b) = self.bounds(i, j)?;
+        Some(self.deque.range(a..=b).collect())
+    }
+
+    fn slice(&mut self, a: usize, b: usize) -> Option<&[T]> {
+        if a > b || b > self.deque.len() {
+            return None;
+        }
+        Some(&self.deque.make_contiguous()[a..b])
+    }
+}
+
+impl<T> TimeSeries<T>
+where
+    T: Clone,
+{
+    /// Positions of the first and last rows stamped within `i..=j`.
+    fn bounds(&self, i: &Instant, j: &Instant) -> Option<(usize, usize)> {
+        let a = self.index.partition_point(|key| key < i);
+        let b = self.index.partition_point(|key| key <= j).checked_sub(1)?;
+        if a >= b || b >= self.deque.len() {
             None
         } else {
-            Some(self.deque.range(a..=b).collect())
+            Some((a, b))
         }
     }
 
-    fn slice(&mut self, a: usize, b: usize) -> Option<&[T]> {
-        self.deque.make_contiguous();
-        if let (slice, &[]) = self.deque.as_slices() {
-            Some(&slice[a..b])
-        } else {
-            None
+    /// Timestamps of the stored rows, oldest first.
+    pub fn timestamps(&self) -> impl Iterator<Item = &Instant> + '_ {
+        self.index.iter()
+    }
+
+    /// Position of the row stamped `key`.
+    pub fn position(&self, key: &Instant) -> Option<usize> {
+        self.index.binary_search(key).ok()
+    }
+
+    /// The entry the next `push` would evict, if the buffer is full.
+    pub fn evicts(&self) -> Option<(&Instant, &T)> {
+        if self.deque.len() < self.capacity {
+            return None;
         }
+        Some((self.index.front()?, self.deque.front()?))
     }
 }
 
@@ -122,50 +155,119 @@ where
     }
 
     fn cols(&self) -> usize {
-        self.deque
-            .front()
-            .map_or(0, |item| item.into_iter().count())
+        self.columns.cols()
     }
 
     fn mat(&self) -> Option<na::DMatrix<f64>> {
-        let rows = self.rows();
-        let cols = self.cols();
-        if rows == 0 || cols == 0 {
-            return None;
-        }
-        let data: Vec<f64> = self.deque.iter().flat_map(|item| item.to_vec()).collect();
-        Some(na::DMatrix::from_row_slice(rows, cols, &data))
+        Some(self.view()?.into_owned())
     }
 }
 
 impl<T> TimeSeries<T>
 where
-    T: Aggregates,
+    T: Clone + Row,
 {
-    fn autocorrelation(&self, lag: usize) -> na::DVector<f64> {
-        todo!()
+    /// Borrowed `(rows, cols)` view of every stored row, oldest first.
+    pub fn view(&self) -> Option<ColumnsView<'_>> {
+        self.columns.view(0, self.columns.rows())
     }
 
-    fn zscore(&self, period: usize) -> na::DVector<f64> {
-        todo!()
+    /// Borrowed view of rows `a..b`, like `range`.
+    pub fn view_range(&self, a: usize, b: usize) -> Option<ColumnsView<'_>> {
+        self.columns.view(a, b)
     }
 
-    fn skew(&self, period: usize) -> na::DVector<f64> {
-        todo!()
+    /// Borrowed view of the rows stamped within `i..=j`, like `between`.
+    pub fn view_between(&self, i: &Instant, j: &Instant) -> Option<ColumnsView<'_>> {
+        let (a, b) = self.bounds(i, j)?;
+        self.columns.view(a, b + 1)
     }
 
-    fn kurtosis(&self, period: usize) -> na::DVector<f64> {
-        todo!()
+    /// Stored values of column `j`, oldest first.
+    pub fn column(&self, j: usize) -> Option<&[f64]> {
+        self.columns.column(j)
     }
 
-    fn momentum(&self, period: usize) -> na::DVector<f64> {
-        todo!()
+    /// Overwrites `out` with the columns of row `i`, without touching the
+    /// stored item.
+    pub fn read_row(&self, i: usize, out: &mut Vec<f64>) -> bool {
+        self.columns.read_row(i, out)
+    }
+
+    pub fn row(&self, i: usize) -> Option<na::RowDVector<f64>> {
+        self.columns.row(i)
+    }
+
+    /// Keeps running sums for `zscore`, `skew` and `kurtosis` over `period`
+    /// so that they cost `O(cols)` per push instead of a rescan.
+    pub fn track_period(&mut self, period: usize) {
+        self.stats.track_period(&self.deque, period);
+    }
+
+    /// Keeps running sums for `autocorrelation` at `lag`.
+    pub fn track_lag(&mut self, lag: usize) {
+        self.stats.track_lag(&self.deque, lag);
+    }
+
+    pub fn autocorrelation(&self, lag: usize) -> na::DVector<f64> {
+        self.stats.autocorrelation(&self.deque, lag)
+    }
+
+    pub fn zscore(&self, period: usize) -> na::DVector<f64> {
+        self.stats.zscore(&self.deque, period)
+    }
+
+    pub fn skew(&self, period: usize) -> na::DVector<f64> {
+        self.stats.skew(&self.deque, period)
+    }
+
+    pub fn kurtosis(&self, period: usize) -> na::DVector<f64> {
+        self.stats.kurtosis(&self.deque, period)
+    }
+
+    pub fn momentum(&self, period: usize) -> na::DVector<f64> {
+        momentum(&self.deque, period)
+    }
+}
+
+/// Capacity and stored rows, oldest first. The columns and the rolling
+/// sums are derived from the rows, so they are rebuilt by pushing the rows
+/// back rather than stored.
+impl<T> Record for TimeSeries<T>
+where
+    T: Clone + Row + Record,
+{
+    fn encode(&self, out: &mut Encoder) {
+        out.usize(self.capacity);
+        out.usize(self.deque.len());
+        for (timestamp, item) in self.index.iter().zip(self.deque.iter()) {
+            out.instant(timestamp);
+            out.record(item);
+        }
+    }
+
+    fn decode(input: &mut Decoder) -> io::Result<Self> {
+        let capacity = input.usize()?;
+        let rows = input.len(8)?;
+        if rows > capacity {
+            return Err(invalid("more rows than the series capacity"));
+        }
+        let mut series = TimeSeries::new(capacity);
+        for _ in 0..rows {
+            let timestamp = input.instant()?;
+            let item = input.record()?;
+            if !series.push(timestamp, item) {
+                return Err(invalid("rows out of order"));
+            }
+        }
+        Ok(series)
     }
 }
 
 #[cfg(test)]
 mod tests {
     use super::*;
+    use crate::utils::helpers::instant_from_timestamp;
 
     #[test]
     fn test_new() {
@@ -220,6 +322,46 @@ mod tests {
         assert_eq!(buffer.loc(&(now + Duration::new(3, 0))), None);
     }
 
+    #[test]
+    fn test_loc_after_eviction() {
+        let mut buffer = TimeSeries::new(3);
+        let now = Instant::now();
+
+        for i in 0..5 {
+            buffer.push(now + Duration::new(i, 0), i as i32);
+        }
+
+        assert_eq!(buffer.loc(&now), None);
+        assert_eq!(buffer.loc(&(now + Duration::new(3, 0))), Some(&3));
+        assert_eq!(buffer.loc(&(now + Duration::new(4, 0))), Some(&4));
+        assert_eq!(buffer.evicts().map(|(_, item)| *item), Some(2));
+    }
+
+    #[test]
+    fn test_wraparound() {
+        let mut buffer = TimeSeries::new(4);
+        let now = Instant::now();
+        let at = |i: u64| now + Duration::new(i, 0);
+
+        for i in 0..11u64 {
+            assert!(buffer.push(at(i), i as i32));
+        }
+        assert!(!buffer.push(at(10), 11));
+        assert!(!buffer.push(at(5), 5));
+        assert_eq!(buffer.len(), 4);
+
+        assert_eq!(buffer.loc(&at(6)), None);
+        assert_eq!(buffer.loc(&at(7)), Some(&7));
+        assert_eq!(buffer.position(&at(10)), Some(3));
+        assert_eq!(buffer.between(&at(0), &at(8)), Some(vec![&7, &8]));
+        assert_eq!(
+            buffer.between(&(at(8) - Duration::new(0, 1)), &at(20)),
+            Some(vec![&8, &9, &10])
+        );
+        assert_eq!(buffer.between(&at(11), &at(20)), None);
+        assert_eq!(buffer.between(&at(0), &at(6)), None);
+    }
+
     #[test]
     fn test_range() {
         let mut buffer = TimeSeries::new(3);
@@ -296,4 +438,127 @@ mod tests {
         assert_eq!(mat[(1, 3)], 1.6, "unmatched value at (1, 3)");
         assert_eq!(mat[(1, 4)], 200.0, "unmatched value at (1, 4)");
     }
+
+    #[test]
+    fn test_views() {
+        let mut buffer = TimeSeries::new(3);
+        let now = Instant::now();
+        let span = Duration::new(60, 0);
+
+        for i in 0..5u32 {
+            let value = i as f64;
+            let aggregate = PriceAggregate::new(
+                now + span * i,
+                span,
+                true,
+                value,
+                value + 1.0,
+                value - 1.0,
+                value,
+                10.0 * value,
+            );
+            buffer.push(aggregate.timestamp(), aggregate);
+        }
+
+        let view = buffer.view().unwrap();
+        assert_eq!(view.shape(), (3, 5));
+        assert_eq!(view[(0, 0)], 2.0);
+        assert_eq!(view[(2, 4)], 40.0);
+        assert_eq!(buffer.mat().unwrap(), view.into_owned());
+        assert_eq!(buffer.column(1), Some(&[3.0, 4.0, 5.0][..]));
+
+        let view = buffer
+            .view_between(&(now + span * 3), &(now + span * 4))
+            .unwrap();
+        assert_eq!(view.shape(), (2, 5));
+        assert_eq!(view[(0, 0)], 3.0);
+        assert!(buffer.view_between(&now, &(now + span)).is_none());
+    }
+
+    #[test]
+    fn test_record() {
+        let mut buffer = TimeSeries::new(3);
+        let now = instant_from_timestamp(1_700_000_000.0);
+        for i in 0..5u64 {
+            buffer.push(now + Duration::new(i, 0), i as f64);
+        }
+        let mut out = Encoder::new();
+        out.record(&buffer);
+        let bytes = out.into_bytes();
+        let restored: TimeSeries<f64> = Decoder::new(&bytes).record().unwrap();
+        assert_eq!(restored.capacity, 3);
+        assert_eq!(restored.to_vec(), buffer.to_vec());
+        assert_eq!(restored.position(&(now + Duration::new(4, 0))), Some(2));
+        assert_eq!(restored.column(0), buffer.column(0));
+        assert!(Decoder::new(&bytes[..bytes.len() - 1])
+            .record::<TimeSeries<f64>>()
+            .is_err());
+    }
+
+    #[test]
+    fn test_rolling_stats() {
+        let mut tracked = TimeSeries::new(8);
+        let mut scanned = TimeSeries::new(8);
+        tracked.track_period(5);
+        tracked.track_lag(2);
+        let now = Instant::now();
+
+        for i in 0..30u64 {
+            let value = ((i * 7) % 11) as f64 + 0.1 * i as f64;
+            tracked.push(now + Duration::new(i, 0), value);
+            scanned.push(now + Duration::new(i, 0), value);
+
+            let pairs = [
+                (tracked.zscore(5), scanned.zscore(5)),
+                (tracked.skew(5), scanned.skew(5)),
+                (tracked.kurtosis(5), scanned.kurtosis(5)),
+                (tracked.autocorrelation(2), scanned.autocorrelation(2)),
+            ];
+            for (a, b) in pairs.iter() {
+                assert_eq!(a.len(), b.len());
+                for (x, y) in a.iter().zip(b.iter()) {
+                    assert!((x - y).abs() < 1e-9, "{} != {} at step {}", x, y, i);
+                }
+            }
+        }
+
+        let last = *tracked.last().unwrap();
+        let past = *tracked.get(tracked.len() - 4).unwrap();
+        assert_eq!(tracked.momentum(3)[0], last - past);
+        assert_eq!(tracked.momentum(8)[0], 0.0);
+
+        tracked.clear();
+        assert_eq!(tracked.zscore(5).len(), 0);
+    }
+
+    #[test]
+    fn test_rolling_stats_short_capacity() {
+        let mut tracked = TimeSeries::new(4);
+        let mut scanned = TimeSeries::new(4);
+        tracked.track_period(10);
+        let now = Instant::now();
+
+        for i in 0..25u64 {
+            let value = ((i * 5) % 9) as f64 + 0.3 * i as f64;
+            tracked.push(now + Duration::new(i, 0), value);
+            scanned.push(now + Duration::new(i, 0), value);
+
+            let pairs = [
+                (tracked.zscore(10), scanned.zscore(10)),
+                (tracked.skew(10), scanned.skew(10)),
+                (tracked.kurtosis(10), scanned.kurtosis(10)),
+            ];
+            for (a, b) in pairs.iter() {
+                for (x, y) in a.iter().zip(b.iter()) {
+                    assert!(
+                        (x - y).abs() < 1e-9 || (x.is_nan() && y.is_nan()),
+                        "{} != {} at step {}",
+                        x,
+                        y,
+                        i
+                    );
+                }
+            }
+        }
+    }
 }
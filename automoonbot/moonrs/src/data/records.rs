@@ -0,0 +1,197 @@
+use crate::data::*;
+use crate::utils::codec::*;
+use std::io;
+
+/// Implements `Record` for an aggregate as its timestamp, duration, flags
+/// and values in declaration order.
+macro_rules! record {
+    ($name:ident, [$($flag:ident),*], [$($value:ident),* $(,)?]) => {
+        impl Record for $name {
+            fn encode(&self, out: &mut Encoder) {
+                out.instant(&self.timestamp);
+                out.duration(&self.duration);
+                $(out.bool(self.$flag);)*
+                $(out.f64(self.$value);)*
+            }
+
+            fn decode(input: &mut Decoder) -> io::Result<Self> {
+                Ok($name {
+                    timestamp: input.instant()?,
+                    duration: input.duration()?,
+                    $($flag: input.bool()?,)*
+                    $($value: input.f64()?,)*
+                })
+            }
+        }
+    };
+}
+
+record!(
+    IncomeStatement,
+    [],
+    [
+        gross_profit,
+        total_revenue,
+        cost_of_revenue,
+        cost_of_goods_and_services_sold,
+        operating_income,
+        selling_general_and_administrative,
+        research_and_development,
+        operating_expenses,
+        investment_income_net,
+        net_interest_income,
+        interest_income,
+        interest_expense,
+        non_interest_income,
+        other_non_operating_income,
+        depreciation,
+        depreciation_and_amortization,
+        income_before_tax,
+        income_tax_expense,
+        interest_and_debt_expense,
+        net_income_from_continuing_operations,
+        comprehensive_income_net_of_tax,
+        ebit,
+        ebitda,
+        net_income,
+    ]
+);
+
+record!(
+    BalanceSheet,
+    [],
+    [
+        total_assets,
+        total_current_assets,
+        cash_and_cash_equivalents_at_carrying_value,
+        cash_and_short_term_investments,
+        inventory,
+        current_net_receivables,
+        total_non_current_assets,
+        property_plant_equipment,
+        accumulated_depreciation_amortization_ppe,
+        intangible_assets,
+        intangible_assets_excluding_goodwill,
+        goodwill,
+        investments,
+        long_term_investments,
+        short_term_investments,
+        other_current_assets,
+        other_non_current_assets,
+        total_liabilities,
+        total_current_liabilities,
+        current_accounts_payable,
+        deferred_revenue,
+        current_debt,
+        short_term_debt,
+        total_non_current_liabilities,
+        capital_lease_obligations,
+        long_term_debt,
+        current_long_term_debt,
+        long_term_debt_noncurrent,
+        short_long_term_debt_total,
+        other_current_liabilities,
+        other_non_current_liabilities,
+        total_shareholder_equity,
+        treasury_stock,
+        retained_earnings,
+        common_stock,
+        common_stock_shares_outstanding,
+    ]
+);
+
+record!(
+    CashFlow,
+    [],
+    [
+        operating_cashflow,
+        payments_for_operating_activities,
+        proceeds_from_operating_activities,
+        change_in_operating_liabilities,
+        change_in_operating_assets,
+        depreciation_depletion_and_amortization,
+        capital_expenditures,
+        change_in_receivables,
+        change_in_inventory,
+        profit_loss,
+        cashflow_from_investment,
+        cashflow_from_financing,
+        proceeds_from_repayments_of_short_term_debt,
+        payments_for_repurchase_of_common_stock,
+        payments_for_repurchase_of_equity,
+        payments_for_repurchase_of_preferred_stock,
+        dividend_payout,
+        dividend_payout_common_stock,
+        dividend_payout_preferred_stock,
+        proceeds_from_issuance_of_common_stock,
+        proceeds_from_issuance_of_long_term_debt_and_capital_securities_net,
+        proceeds_from_issuance_of_preferred_stock,
+        proceeds_from_repurchase_of_equity,
+        proceeds_from_sale_of_treasury_stock,
+        change_in_cash_and_cash_equivalents,
+        change_in_exchange_rate,
+        net_income,
+    ]
+);
+
+record!(
+    Earnings,
+    [after_hours],
+    [reported_eps, estimated_eps, surprise,]
+);
+
+record!(
+    PriceAggregate,
+    [adjusted],
+    [open, high, low, close, volume,]
+);
+
+record!(
+    OptionsAggregate,
+    [],
+    [
+        last,
+        mark,
+        bid,
+        bid_size,
+        ask,
+        ask_size,
+        volume,
+        open_interest,
+        implied_volatility,
+        delta,
+        gamma,
+        theta,
+        vega,
+        rho,
+    ]
+);
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::utils::helpers::instant_from_timestamp;
+
+    #[test]
+    fn test_record() {
+        let now = instant_from_timestamp(1_700_000_000.0);
+        let span = Duration::from_secs(60);
+        let bar = PriceAggregate::new(now, span, true, 1.0, 2.0, 0.5, 1.5, 100.0);
+        let earnings = Earnings::new(now, span, true, 1.2, 1.0, 0.2);
+        let mut out = Encoder::new();
+        out.record(&bar);
+        out.record(&earnings);
+        let bytes = out.into_bytes();
+
+        let mut input = Decoder::new(&bytes);
+        let restored: PriceAggregate = input.record().unwrap();
+        assert_eq!(restored.timestamp, now);
+        assert_eq!(restored.duration, span);
+        assert!(restored.adjusted);
+        assert_eq!(restored.to_vec(), bar.to_vec());
+        let restored: Earnings = input.record().unwrap();
+        assert!(restored.after_hours);
+        assert_eq!(restored.to_vec(), earnings.to_vec());
+        assert_eq!(input.remaining(), 0);
+    }
+}
@@ -0,0 +1,383 @@
+use crate::data::*;
+use aggregates::Aggregates;
+use std::collections::VecDeque;
+
+/// Numeric columns of an item held by a `TimeSeries`.
+pub trait Row {
+    fn write_row(&self, out: &mut Vec<f64>);
+
+    fn to_row(&self) -> Vec<f64> {
+        let mut out = Vec::new();
+        self.write_row(&mut out);
+        out
+    }
+}
+
+impl<T> Row for T
+where
+    T: Aggregates,
+{
+    fn write_row(&self, out: &mut Vec<f64>) {
+        out.extend(self.into_iter());
+    }
+}
+
+impl Row for f64 {
+    fn write_row(&self, out: &mut Vec<f64>) {
+        out.push(*self);
+    }
+}
+
+impl Row for Vec<f64> {
+    fn write_row(&self, out: &mut Vec<f64>) {
+        out.extend_from_slice(self);
+    }
+}
+
+impl Row for i32 {
+    fn write_row(&self, out: &mut Vec<f64>) {
+        out.push(*self as f64);
+    }
+}
+
+fn read_row<T: Row>(item: &T, out: &mut Vec<f64>) {
+    out.clear();
+    item.write_row(out);
+}
+
+/// Relative tolerance below which a variance is treated as zero.
+const TOLERANCE: f64 = 1e-12;
+
+/// Power sums of the last `period` rows, shifted by a reference row so that
+/// the sums stay small relative to the values.
+#[derive(Debug, Clone, Default)]
+struct Moments {
+    n: usize,
+    shift: Vec<f64>,
+    sums: [Vec<f64>; 4],
+}
+
+impl Moments {
+    fn scan<T: Row>(deque: &VecDeque<T>, period: usize, row: &mut Vec<f64>) -> Self {
+        let mut moments = Moments::default();
+        let start = deque.len().saturating_sub(period);
+        for item in deque.range(start..) {
+            read_row(item, row);
+            moments.update(row, 1.0);
+        }
+        moments
+    }
+
+    fn update(&mut self, row: &[f64], sign: f64) {
+        if self.n == 0 && sign > 0.0 {
+            self.shift = row.to_vec();
+            self.sums = std::array::from_fn(|_| vec![0.0; row.len()]);
+        }
+        if row.len() != self.shift.len() || (self.n == 0 && sign < 0.0) {
+            return;
+        }
+        for (j, x) in row.iter().enumerate() {
+            let d = x - self.shift[j];
+            let mut power = d;
+            for sum in self.sums.iter_mut() {
+                sum[j] += sign * power;
+                power *= d;
+            }
+        }
+        if sign > 0.0 {
+            self.n += 1;
+        } else {
+            self.n -= 1;
+        }
+    }
+
+    /// Mean and the second to fourth central moments of column `j`.
+    fn central(&self, j: usize) -> (f64, f64, f64, f64) {
+        let n = self.n as f64;
+        let [s1, s2, s3, s4] = [
+            self.sums[0][j] / n,
+            self.sums[1][j] / n,
+            self.sums[2][j] / n,
+            self.sums[3][j] / n,
+        ];
+        let m2 = s2 - s1 * s1;
+        let m3 = s3 - 3.0 * s1 * s2 + 2.0 * s1.powi(3);
+        let m4 = s4 - 4.0 * s1 * s3 + 6.0 * s1 * s1 * s2 - 3.0 * s1.powi(4);
+        (self.shift[j] + s1, m2, m3, m4)
+    }
+
+    fn cols(&self) -> usize {
+        if self.n == 0 {
+            0
+        } else {
+            self.shift.len()
+        }
+    }
+
+    fn map<F>(&self, f: F) -> na::DVector<f64>
+    where
+        F: Fn(usize, f64, f64, f64, f64) -> f64,
+    {
+        let values: Vec<f64> = (0..self.cols())
+            .map(|j| {
+                let (mean, m2, m3, m4) = self.central(j);
+                if m2 <= TOLERANCE * (1.0 + mean * mean) {
+                    0.0
+                } else {
+                    f(j, mean, m2, m3, m4)
+                }
+            })
+            .collect();
+        na::DVector::from_vec(values)
+    }
+}
+
+/// Sums over the pairs `(x[t], x[t - lag])` held in the buffer.
+#[derive(Debug, Clone, Default)]
+struct LagSums {
+    n: usize,
+    shift: Vec<f64>,
+    sx: Vec<f64>,
+    sy: Vec<f64>,
+    sxx: Vec<f64>,
+    syy: Vec<f64>,
+    sxy: Vec<f64>,
+}
+
+impl LagSums {
+    fn scan<T: Row>(
+        deque: &VecDeque<T>,
+        lag: usize,
+        row: &mut Vec<f64>,
+        other: &mut Vec<f64>,
+    ) -> Self {
+        let mut sums = LagSums::default();
+        for t in lag..deque.len() {
+            read_row(&deque[t], row);
+            read_row(&deque[t - lag], other);
+            sums.update(row, other, 1.0);
+        }
+        sums
+    }
+
+    fn update(&mut self, lead: &[f64], lagged: &[f64], sign: f64) {
+        if self.n == 0 && sign > 0.0 {
+            let cols = lead.len();
+            self.shift = lead.to_vec();
+            self.sx = vec![0.0; cols];
+            self.sy = vec![0.0; cols];
+            self.sxx = vec![0.0; cols];
+            self.syy = vec![0.0; cols];
+            self.sxy = vec![0.0; cols];
+        }
+        if lead.len() != self.shift.len() || (self.n == 0 && sign < 0.0) {
+            return;
+        }
+        for j in 0..lead.len() {
+            let (x, y) = (lead[j] - self.shift[j], lagged[j] - self.shift[j]);
+            self.sx[j] += sign * x;
+            self.sy[j] += sign * y;
+            self.sxx[j] += sign * x * x;
+            self.syy[j] += sign * y * y;
+            self.sxy[j] += sign * x * y;
+        }
+        if sign > 0.0 {
+            self.n += 1;
+        } else {
+            self.n -= 1;
+        }
+    }
+
+    fn correlation(&self) -> na::DVector<f64> {
+        if self.n == 0 {
+            return na::DVector::from_vec(Vec::new());
+        }
+        let n = self.n as f64;
+        let values: Vec<f64> = (0..self.shift.len())
+            .map(|j| {
+                let vx = n * self.sxx[j] - self.sx[j] * self.sx[j];
+                let vy = n * self.syy[j] - self.sy[j] * self.sy[j];
+                let scale = 1.0 + self.shift[j] * self.shift[j];
+                if vx <= TOLERANCE * n * n * scale || vy <= TOLERANCE * n * n * scale {
+                    0.0
+                } else {
+                    (n * self.sxy[j] - self.sx[j] * self.sy[j]) / (vx * vy).sqrt()
+                }
+            })
+            .collect();
+        na::DVector::from_vec(values)
+    }
+}
+
+#[derive(Debug, Clone)]
+struct TrackedPeriod {
+    period: usize,
+    moments: Moments,
+    updates: usize,
+}
+
+#[derive(Debug, Clone)]
+struct TrackedLag {
+    lag: usize,
+    sums: LagSums,
+    updates: usize,
+}
+
+/// Incremental statistics over a `TimeSeries`. Registered periods keep
+/// running power sums and registered lags keep running cross sums, both are
+/// updated in `O(cols)` per push and rebuilt from the buffer once per window
+/// to shed accumulated rounding error. Statistics for anything that is not
+/// registered are computed by scanning the buffer.
+#[derive(Debug, Clone, Default)]
+pub struct RollingStats {
+    periods: Vec<TrackedPeriod>,
+    lags: Vec<TrackedLag>,
+    row: Vec<f64>,
+    other: Vec<f64>,
+}
+
+impl RollingStats {
+    pub fn track_period<T: Row>(&mut self, deque: &VecDeque<T>, period: usize) {
+        if period == 0 || self.periods.iter().any(|p| p.period == period) {
+            return;
+        }
+        let moments = Moments::scan(deque, period, &mut self.row);
+        self.periods.push(TrackedPeriod {
+            period,
+            moments,
+            updates: 0,
+        });
+    }
+
+    pub fn track_lag<T: Row>(&mut self, deque: &VecDeque<T>, lag: usize) {
+        if lag == 0 || self.lags.iter().any(|l| l.lag == lag) {
+            return;
+        }
+        let sums = LagSums::scan(deque, lag, &mut self.row, &mut self.other);
+        self.lags.push(TrackedLag {
+            lag,
+            sums,
+            updates: 0,
+        });
+    }
+
+    pub fn is_tracking(&self) -> bool {
+        !self.periods.is_empty() || !self.lags.is_empty()
+    }
+
+    pub fn clear(&mut self) {
+        for tracked in self.periods.iter_mut() {
+            tracked.moments = Moments::default();
+            tracked.updates = 0;
+        }
+        for tracked in self.lags.iter_mut() {
+            tracked.sums = LagSums::default();
+            tracked.updates = 0;
+        }
+    }
+
+    /// Accounts for the item just pushed to the back of `deque`, and for
+    /// the item evicted from its front by that push, if any.
+    pub fn on_push<T: Row>(&mut self, deque: &VecDeque<T>, evicted: Option<&T>) {
+        let len = deque.len();
+        let (row, other) = (&mut self.row, &mut self.other);
+        for tracked in self.periods.iter_mut() {
+            let period = tracked.period;
+            tracked.updates += 1;
+            if tracked.updates >= period {
+                tracked.moments = Moments::scan(deque, period, row);
+                tracked.updates = 0;
+                continue;
+            }
+            // A buffer shorter than the period holds the whole window, so the
+            // evicted row, if any, is the one leaving it
+            let leaving = if len > period {
+                deque.get(len - period - 1)
+            } else {
+                evicted
+            };
+            if let Some(item) = leaving {
+                read_row(item, row);
+                tracked.moments.update(row, -1.0);
+            }
+            if let Some(item) = deque.back() {
+                read_row(item, row);
+                tracked.moments.update(row, 1.0);
+            }
+        }
+        for tracked in self.lags.iter_mut() {
+            let lag = tracked.lag;
+            tracked.updates += 1;
+            if tracked.updates >= len.max(lag + 1) {
+                tracked.sums = LagSums::scan(deque, lag, row, other);
+                tracked.updates = 0;
+                continue;
+            }
+            if let Some(item) = evicted {
+                if len > lag {
+                    read_row(&deque[lag - 1], row);
+                    read_row(item, other);
+                    tracked.sums.update(row, other, -1.0);
+                }
+            }
+            if len > lag {
+                read_row(&deque[len - 1], row);
+                read_row(&deque[len - 1 - lag], other);
+                tracked.sums.update(row, other, 1.0);
+            }
+        }
+    }
+
+    fn moments<T: Row>(&self, deque: &VecDeque<T>, period: usize) -> Moments {
+        match self.periods.iter().find(|p| p.period == period) {
+            Some(tracked) => tracked.moments.clone(),
+            None => Moments::scan(deque, period, &mut Vec::new()),
+        }
+    }
+
+    /// Z-score of the latest row against the last `period` rows.
+    pub fn zscore<T: Row>(&self, deque: &VecDeque<T>, period: usize) -> na::DVector<f64> {
+        let mut last = Vec::new();
+        if let Some(item) = deque.back() {
+            item.write_row(&mut last);
+        }
+        self.moments(deque, period)
+            .map(|j, mean, m2, _, _| (last[j] - mean) / m2.sqrt())
+    }
+
+    /// Population skewness over the last `period` rows.
+    pub fn skew<T: Row>(&self, deque: &VecDeque<T>, period: usize) -> na::DVector<f64> {
+        self.moments(deque, period)
+            .map(|_, _, m2, m3, _| m3 / m2.powf(1.5))
+    }
+
+    /// Excess kurtosis over the last `period` rows.
+    pub fn kurtosis<T: Row>(&self, deque: &VecDeque<T>, period: usize) -> na::DVector<f64> {
+        self.moments(deque, period)
+            .map(|_, _, m2, _, m4| m4 / (m2 * m2) - 3.0)
+    }
+
+    /// Correlation of the buffer with itself shifted by `lag` rows.
+    pub fn autocorrelation<T: Row>(&self, deque: &VecDeque<T>, lag: usize) -> na::DVector<f64> {
+        match self.lags.iter().find(|l| l.lag == lag) {
+            Some(tracked) => tracked.sums.correlation(),
+            None => LagSums::scan(deque, lag, &mut Vec::new(), &mut Vec::new()).correlation(),
+        }
+    }
+}
+
+/// Difference between the latest row and the row `period` rows before it,
+/// zero while the buffer is shorter than that.
+pub fn momentum<T: Row>(deque: &VecDeque<T>, period: usize) -> na::DVector<f64> {
+    let (mut last, mut past) = (Vec::new(), Vec::new());
+    if let Some(item) = deque.back() {
+        item.write_row(&mut last);
+    }
+    if period > 0 && deque.len() > period {
+        deque[deque.len() - 1 - period].write_row(&mut past);
+    } else {
+        past = vec![0.0; last.len()];
+        last.fill(0.0);
+    }
+    na::DVector::from_vec(last.iter().zip(past.iter()).map(|(a, b)| a - b).collect())
+}
@@ -53,6 +53,48 @@ impl From<Derives> for EdgeType {
     }
 }
 
+impl EdgeType {
+    /// Rolling covariance state of the edges maintained bar by bar.
+    pub fn rolling_mut(&mut self) -> Option<&mut RollingCovariance> {
+        match self {
+            EdgeType::Influences(edge) => Some(&mut edge.state),
+            EdgeType::Derives(edge) => Some(&mut edge.state),
+            _ => None,
+        }
+    }
+
+    /// Refreshes the covariance and correlation read from the rolling state.
+    pub fn sync(&mut self) {
+        let (state, covariance, correlation) = match self {
+            EdgeType::Influences(edge) => {
+                (&edge.state, &mut edge.covariance, &mut edge.correlation)
+            }
+            EdgeType::Derives(edge) => (&edge.state, &mut edge.covariance, &mut edge.correlation),
+            _ => return,
+        };
+        *covariance = state.covariance();
+        *correlation = state.correlation();
+    }
+}
+
+/// Pairs the bars of two series by timestamp.
+pub(super) fn align_series<S, T>(src: &TimeSeries<S>, tgt: &TimeSeries<T>) -> RollingCovariance
+where
+    S: Aggregates,
+    T: Aggregates,
+{
+    let mut state = RollingCovariance::new(src.cols(), tgt.cols());
+    let (mut row, mut other) = (Vec::new(), Vec::new());
+    for (i, timestamp) in src.timestamps().enumerate() {
+        if let Some(j) = tgt.position(timestamp) {
+            src.read_row(i, &mut row);
+            tgt.read_row(j, &mut other);
+            state.add(&row, &other);
+        }
+    }
+    state
+}
+
 #[derive(Debug)]
 pub struct Published {
     pub(super) src_index: NodeIndex,
@@ -86,6 +128,7 @@ pub struct Influences {
     pub(super) tgt_index: NodeIndex,
     pub(super) covariance: Option<na::DMatrix<f64>>,
     pub(super) correlation: Option<na::DMatrix<f64>>,
+    pub(super) state: RollingCovariance,
 }
 
 #[derive(Debug)]
@@ -94,6 +137,7 @@ pub struct Derives {
     pub(super) tgt_index: NodeIndex,
     pub(super) covariance: Option<na::DMatrix<f64>>,
     pub(super) correlation: Option<na::DMatrix<f64>>,
+    pub(super) state: RollingCovariance,
 }
 
 impl Published {
@@ -179,8 +223,8 @@ impl Issues {
         }
 
         if company.symbols().contains(equity.name()) {
-            let covariance = compute_covariance(company.mat()?, equity.mat()?);
-            let correlation = compute_correlation(company.mat()?, equity.mat()?);
+            let (covariance, correlation) =
+                compute_moments(company.mat()?, equity.mat()?).unwrap_or((None, None));
             Some(Issues {
                 src_index,
                 tgt_index,
@@ -204,14 +248,17 @@ impl Influences {
             return None;
         }
 
-        let covariance = compute_covariance(src_node.mat()?, tgt_node.mat()?);
-        let correlation = compute_correlation(src_node.mat()?, tgt_node.mat()?);
+        if src_node.history().empty() || tgt_node.history().empty() {
+            return None;
+        }
 
+        let state = align_series(src_node.history(), tgt_node.history());
         Some(Influences {
             src_index,
             tgt_index,
-            covariance,
-            correlation,
+            covariance: state.covariance(),
+            correlation: state.correlation(),
+            state,
         })
     }
 }
@@ -228,13 +275,16 @@ impl Derives {
         }
 
         if option.underlying() == equity.name() {
-            let covariance = compute_covariance(equity.mat()?, option.mat()?);
-            let correlation = compute_correlation(equity.mat()?, option.mat()?);
+            if equity.history().empty() || option.history().empty() {
+                return None;
+            }
+            let state = align_series(equity.history(), option.history());
             Some(Derives {
                 src_index,
                 tgt_index,
-                covariance,
-                correlation,
+                covariance: state.covariance(),
+                correlation: state.correlation(),
+                state,
             })
         } else {
             None
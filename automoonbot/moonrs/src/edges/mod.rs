@@ -2,6 +2,7 @@ mod backward;
 mod common;
 mod forward;
 mod mutual;
+mod records;
 mod statics;
 mod tests;
 
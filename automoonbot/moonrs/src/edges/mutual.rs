@@ -25,25 +25,17 @@ impl MutualDynEdge<Equity, Equity, Instant, PriceAggregate, PriceAggregate> for
     }
 
     fn compute_covariance(&self, src: &Equity, tgt: &Equity) -> Option<na::DMatrix<f64>> {
-        let src_mat = src.mat()?;
-        let tgt_mat = tgt.mat()?;
-        compute_covariance(src_mat, tgt_mat)
+        align_series(src.history(), tgt.history()).covariance()
     }
 
     fn compute_correlation(&self, src: &Equity, tgt: &Equity) -> Option<na::DMatrix<f64>> {
-        let src_mat = src.mat()?;
-        let tgt_mat = tgt.mat()?;
-        compute_correlation(src_mat, tgt_mat)
+        align_series(src.history(), tgt.history()).correlation()
     }
 
     fn update(&mut self, src: &Equity, tgt: &Equity) {
-        if let (Some(covariance), Some(correlation)) = (
-            self.compute_covariance(src, tgt),
-            self.compute_correlation(src, tgt),
-        ) {
-            self.covariance = Some(covariance);
-            self.correlation = Some(correlation);
-        }
+        self.state = align_series(src.history(), tgt.history());
+        self.covariance = self.state.covariance();
+        self.correlation = self.state.correlation();
     }
 }
 
@@ -57,25 +49,17 @@ impl MutualDynEdge<Equity, Options, Instant, PriceAggregate, OptionsAggregate> f
     }
 
     fn compute_covariance(&self, src: &Equity, tgt: &Options) -> Option<na::DMatrix<f64>> {
-        let src_mat = src.mat()?;
-        let tgt_mat = tgt.mat()?;
-        compute_covariance(src_mat, tgt_mat)
+        align_series(src.history(), tgt.history()).covariance()
     }
 
     fn compute_correlation(&self, src: &Equity, tgt: &Options) -> Option<na::DMatrix<f64>> {
-        let src_mat = src.mat()?;
-        let tgt_mat = tgt.mat()?;
-        compute_correlation(src_mat, tgt_mat)
+        align_series(src.history(), tgt.history()).correlation()
     }
 
     fn update(&mut self, src: &Equity, tgt: &Options) {
-        if let (Some(covariance), Some(correlation)) = (
-            self.compute_covariance(src, tgt),
-            self.compute_correlation(src, tgt),
-        ) {
-            self.covariance = Some(covariance);
-            self.correlation = Some(correlation);
-        }
+        self.state = align_series(src.history(), tgt.history());
+        self.covariance = self.state.covariance();
+        self.correlation = self.state.correlation();
     }
 }
 
@@ -101,12 +85,11 @@ impl MutualDynEdge<Company, Equity, Instant, FinancialStatement, PriceAggregate>
     }
 
     fn update(&mut self, src: &Company, tgt: &Equity) {
-        if let (Some(covariance), Some(correlation)) = (
-            self.compute_covariance(src, tgt),
-            self.compute_correlation(src, tgt),
-        ) {
-            self.covariance = Some(covariance);
-            self.correlation = Some(correlation);
+        if let (Some(src_mat), Some(tgt_mat)) = (src.mat(), tgt.mat()) {
+            if let Some((covariance, correlation)) = compute_moments(src_mat, tgt_mat) {
+                self.covariance = covariance;
+                self.correlation = correlation;
+            }
         }
     }
 }
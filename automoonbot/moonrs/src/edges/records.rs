@@ -0,0 +1,93 @@
+use crate::edges::*;
+use crate::utils::codec::*;
+use std::io;
+
+impl EdgeType {
+    /// Writes a variant tag followed by the fields of the edge, without its
+    /// endpoints, which the graph stores on its own. Rolling edges keep
+    /// their co-moment state, their covariance and correlation are read
+    /// back from it.
+    pub fn encode(&self, out: &mut Encoder) {
+        match self {
+            EdgeType::TestEdge(edge) => {
+                out.u8(0);
+                out.f64(edge.value);
+                out.matrix(edge.covariance.as_ref());
+                out.matrix(edge.correlation.as_ref());
+            }
+            EdgeType::Published(_) => out.u8(1),
+            EdgeType::Mentioned(_) => out.u8(2),
+            EdgeType::Referenced(edge) => {
+                out.u8(3);
+                out.f64(edge.sentiment);
+            }
+            EdgeType::Issues(edge) => {
+                out.u8(4);
+                out.matrix(edge.covariance.as_ref());
+                out.matrix(edge.correlation.as_ref());
+            }
+            EdgeType::Influences(edge) => {
+                out.u8(5);
+                out.record(&edge.state);
+            }
+            EdgeType::Derives(edge) => {
+                out.u8(6);
+                out.record(&edge.state);
+            }
+        }
+    }
+
+    /// Reads an edge written by `encode` between `src_index` and
+    /// `tgt_index`.
+    pub fn decode(
+        input: &mut Decoder,
+        src_index: NodeIndex,
+        tgt_index: NodeIndex,
+    ) -> io::Result<Self> {
+        let mut edge = match input.u8()? {
+            0 => EdgeType::TestEdge(TestEdge {
+                src_index,
+                tgt_index,
+                value: input.f64()?,
+                covariance: input.matrix()?,
+                correlation: input.matrix()?,
+            }),
+            1 => EdgeType::Published(Published {
+                src_index,
+                tgt_index,
+            }),
+            2 => EdgeType::Mentioned(Mentioned {
+                src_index,
+                tgt_index,
+            }),
+            3 => EdgeType::Referenced(Referenced {
+                src_index,
+                tgt_index,
+                sentiment: input.f64()?,
+            }),
+            4 => EdgeType::Issues(Issues {
+                src_index,
+                tgt_index,
+                covariance: input.matrix()?,
+                correlation: input.matrix()?,
+            }),
+            5 => EdgeType::Influences(Influences {
+                src_index,
+                tgt_index,
+                covariance: None,
+                correlation: None,
+                state: input.record()?,
+            }),
+            6 => EdgeType::Derives(Derives {
+                src_index,
+                tgt_index,
+                covariance: None,
+                correlation: None,
+                state: input.record()?,
+            }),
+            _ => return Err(invalid("unknown edge type")),
+        };
+        edge.sync();
+        Ok(edge)
+    }
+}
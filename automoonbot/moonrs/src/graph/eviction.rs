@@ -0,0 +1,244 @@
+use crate::graph::*;
+
+/// When articles leave the graph, see `HeteroGraph::enable_eviction`.
+#[derive(Debug, Clone, Copy, PartialEq)]
+pub struct Eviction {
+    /// Decay below which an article is dropped.
+    pub threshold: f64,
+    /// Articles kept at most, the oldest go first.
+    pub capacity: Option<usize>,
+    pub shift: f64,
+    pub alpha: f64,
+}
+
+impl Default for Eviction {
+    fn default() -> Self {
+        Eviction {
+            threshold: 0.05,
+            capacity: None,
+            shift: 7.0,
+            alpha: 0.5,
+        }
+    }
+}
+
+impl Eviction {
+    /// Weight of an article published at `published`, as of `now`.
+    pub fn decay(&self, published: Instant, now: Instant) -> f64 {
+        let elapsed = match now.checked_duration_since(published) {
+            Some(elapsed) => elapsed.as_secs_f64(),
+            None => -(published - now).as_secs_f64(),
+        };
+        time_decay(elapsed, self.shift, self.alpha)
+    }
+
+    /// Age past which an article decays below the threshold.
+    pub fn horizon(&self) -> Duration {
+        decay_horizon(self.threshold, self.shift, self.alpha)
+    }
+}
+
+/// Articles ordered by publication time. They all share one horizon, so
+/// this is also the order in which they expire, and pruning only visits
+/// the articles it removes.
+#[derive(Debug, Default)]
+pub struct Expiry {
+    queue: BTreeSet<(Instant, NodeIndex)>,
+}
+
+impl Expiry {
+    pub fn insert(&mut self, index: NodeIndex, node: &NodeType) {
+        if let NodeType::Article(article) = node {
+            self.queue.insert((article.published(), index));
+        }
+    }
+
+    pub fn remove(&mut self, index: NodeIndex, node: &NodeType) {
+        if let NodeType::Article(article) = node {
+            self.queue.remove(&(article.published(), index));
+        }
+    }
+
+    pub fn len(&self) -> usize {
+        self.queue.len()
+    }
+
+    pub fn oldest(&self) -> Option<(Instant, NodeIndex)> {
+        self.queue.first().copied()
+    }
+
+    pub fn newest(&self) -> Option<Instant> {
+        self.queue.last().map(|(published, _)| *published)
+    }
+
+    /// Publication time and index of every article, oldest first.
+    pub fn iter(&self) -> impl Iterator<Item = (Instant, NodeIndex)> + '_ {
+        self.queue.iter().copied()
+    }
+}
+
+impl HeteroGraph {
+    /// Drops articles, with their `Published`, `Mentioned` and `Referenced`
+    /// edges, once their decay falls below the threshold or once there are
+    /// more than `capacity` of them. Publishers left without articles are
+    /// dropped along. Applied on every `add_article` and on `prune`.
+    pub fn enable_eviction(&mut self, eviction: Eviction) {
+        self.eviction = Some(eviction);
+    }
+
+    pub fn disable_eviction(&mut self) {
+        self.eviction = None;
+    }
+
+    pub fn eviction(&self) -> Option<&Eviction> {
+        self.eviction.as_ref()
+    }
+
+    /// Decay of the article at `index` as of `now`, with the settings of
+    /// `enable_eviction` or the default ones.
+    pub fn article_decay(&self, index: NodeIndex, now: Instant) -> Option<f64> {
+        match self.get_node(index)? {
+            NodeType::Article(article) => Some(
+                self.eviction
+                    .unwrap_or_default()
+                    .decay(article.published(), now),
+            ),
+            _ => None,
+        }
+    }
+
+    /// Decay of every article as of `now`, oldest first, in one pass over
+    /// the expiry index.
+    pub fn article_decays(&self, now: Instant) -> Vec<(NodeIndex, f64)> {
+        let eviction = self.eviction.unwrap_or_default();
+        self.expiry
+            .iter()
+            .map(|(published, index)| (index, eviction.decay(published, now)))
+            .collect()
+    }
+
+    /// Removes the articles expired as of `now` and the oldest ones past
+    /// the capacity, returns how many were removed.
+    pub fn prune(&mut self, now: Instant) -> usize {
+        let eviction = match self.eviction {
+            Some(eviction) => eviction,
+            None => return 0,
+        };
+        let cutoff = now.checked_sub(eviction.horizon());
+        let mut removed = 0;
+        while let Some((published, index)) = self.expiry.oldest() {
+            let expired = cutoff.is_some_and(|cutoff| published < cutoff);
+            let excess = eviction
+                .capacity
+                .is_some_and(|capacity| self.expiry.len() > capacity);
+            if !expired && !excess {
+                break;
+            }
+            self.remove_article(index);
+            removed += 1;
+        }
+        removed
+    }
+
+    fn remove_article(&mut self, index: NodeIndex) {
+        let publisher = match self.get_node(index) {
+            Some(NodeType::Article(article)) => article.publisher().clone(),
+            _ => return,
+        };
+        self.remove_node(index);
+        if self.indexes.articles_of(&publisher) == 0 {
+            self.remove_node_by_name(publisher);
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn add_article(graph: &mut HeteroGraph, title: &str, publisher: &str, timestamp: f64) {
+        let tickers = HashMap::from([("foo".to_owned(), 0.5)]);
+        graph.add_article(
+            title.to_owned(),
+            "summary".to_owned(),
+            0.5,
+            publisher.to_owned(),
+            4,
+            Some(tickers),
+            instant_from_timestamp(timestamp),
+        );
+    }
+
+    #[test]
+    fn test_prune() {
+        let mut graph = HeteroGraph::new();
+        graph.add_equity("foo".to_owned(), None, 4);
+        let eviction = Eviction {
+            threshold: 0.5,
+            ..Eviction::default()
+        };
+        let horizon = eviction.horizon().as_secs_f64();
+        graph.enable_eviction(eviction);
+
+        let start = 1_700_000_000.0;
+        add_article(&mut graph, "a", "reuters", start);
+        add_article(&mut graph, "b", "bloomberg", start + 60.0);
+        add_article(&mut graph, "c", "reuters", start + 120.0);
+        assert_eq!(graph.node_count(), 6);
+        assert_eq!(graph.edge_count(), 6);
+        let index = *graph.get_node_index("a".to_owned()).unwrap();
+        let now = instant_from_timestamp(start + horizon);
+        assert!((graph.article_decay(index, now).unwrap() - 0.5).abs() < 1e-6);
+        let decays = graph.article_decays(now);
+        assert_eq!(decays.len(), 3);
+        assert_eq!(decays[0].0, index);
+        assert!(decays.windows(2).all(|pair| pair[0].1 < pair[1].1));
+
+        assert_eq!(
+            graph.prune(instant_from_timestamp(start + horizon - 1.0)),
+            0
+        );
+        assert_eq!(
+            graph.prune(instant_from_timestamp(start + horizon + 90.0)),
+            2
+        );
+        assert!(graph.get_node_by_name("a".to_owned()).is_none());
+        assert!(graph.get_node_by_name("bloomberg".to_owned()).is_none());
+        assert!(graph.get_node_by_name("reuters".to_owned()).is_some());
+        assert_eq!(graph.node_count(), 3);
+        assert_eq!(graph.edge_count(), 2);
+
+        add_article(&mut graph, "d", "reuters", start + 2.0 * horizon);
+        assert!(graph.get_node_by_name("c".to_owned()).is_none());
+        assert_eq!(graph.expiry.len(), 1);
+    }
+
+    #[test]
+    fn test_capacity() {
+        let mut graph = HeteroGraph::new();
+        graph.enable_snapshot();
+        graph.add_equity("foo".to_owned(), None, 4);
+        graph.enable_eviction(Eviction {
+            capacity: Some(2),
+            ..Eviction::default()
+        });
+        let start = 1_700_000_000.0;
+        for (i, title) in ["b", "a", "d", "c"].iter().enumerate() {
+            let shuffled = [1.0, 0.0, 3.0, 2.0][i];
+            add_article(&mut graph, title, "reuters", start + 60.0 * shuffled);
+        }
+        assert_eq!(graph.expiry.len(), 2);
+        assert!(graph.get_node_by_name("c".to_owned()).is_some());
+        assert!(graph.get_node_by_name("d".to_owned()).is_some());
+
+        assert_eq!(graph.edge_cls_memo()["Referenced"].len(), 2);
+        assert_eq!(graph.edge_cls_memo()["Published"].len(), 2);
+        let (x, _, _) = graph.snapshot().to_blocks();
+        assert_eq!(x["Article"].shape, (2, 1));
+
+        graph.disable_eviction();
+        add_article(&mut graph, "e", "reuters", start);
+        assert_eq!(graph.expiry.len(), 3);
+        assert_eq!(graph.prune(instant_from_timestamp(start + 1e9)), 0);
+    }
+}
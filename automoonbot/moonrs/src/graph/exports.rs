@@ -1,5 +1,46 @@
 use crate::graph::*;
 
+/// Fewest candidate edges given to one worker thread, below this the
+/// spawn costs more than the correlation work it would take over.
+const PAR_CHUNK: usize = 4;
+
+/// Edge relation in `torch_geometric` form, `(source, edge, target)`.
+pub type EdgeKey = (String, String, String);
+
+/// Row-major `(rows, cols)` block of values, laid out so that it can be
+/// moved into a `numpy` array without copying.
+#[derive(Debug, Clone, PartialEq, Default)]
+pub struct Block<T> {
+    pub shape: (usize, usize),
+    pub data: Vec<T>,
+}
+
+impl<T> Block<T>
+where
+    T: na::Scalar,
+{
+    pub fn to_matrix(&self) -> na::DMatrix<T> {
+        na::DMatrix::from_row_slice(self.shape.0, self.shape.1, &self.data)
+    }
+}
+
+/// Feature row of `node`, followed by its rolling statistics over
+/// `(period, lag)` when given.
+pub fn node_feature(
+    node: &NodeType,
+    stat_features: Option<(usize, usize)>,
+) -> Option<na::RowDVector<f64>> {
+    let feature = node.feature()?;
+    let stats = match stat_features.and_then(|(period, lag)| node.stats(period, lag)) {
+        Some(stats) => stats,
+        None => return Some(feature),
+    };
+    let mut row = Vec::with_capacity(feature.len() + stats.len());
+    row.extend(feature.iter());
+    row.extend(stats);
+    Some(na::RowDVector::from_vec(row))
+}
+
 impl HeteroGraph {
     pub fn to_pyg(
         &self,
@@ -8,92 +49,281 @@ impl HeteroGraph {
         HashMap<String, na::DMatrix<i64>>,
         HashMap<String, na::DMatrix<f64>>,
     ) {
-        let mut x: HashMap<String, na::DMatrix<f64>> = HashMap::new();
-        let mut edge_index: HashMap<String, na::DMatrix<i64>> = HashMap::new();
-        let mut edge_attr: HashMap<String, na::DMatrix<f64>> = HashMap::new();
-        let mut temp: HashMap<NodeIndex, (String, usize)> = HashMap::new();
-        for (cls, indices) in self.node_cls_memo() {
-            if indices.is_empty() {
-                continue;
-            }
+        let (x, edge_index, edge_attr) = self.to_blocks();
+        (
+            x.into_iter()
+                .map(|(cls, block)| (cls, block.to_matrix()))
+                .collect(),
+            edge_index
+                .into_iter()
+                .map(|((_, cls, _), block)| (cls, block.to_matrix()))
+                .collect(),
+            edge_attr
+                .into_iter()
+                .map(|((_, cls, _), block)| (cls, block.to_matrix()))
+                .collect(),
+        )
+    }
 
-            if let Some(&sample_index) = indices.iter().next() {
-                if let Some(sample_node) = self.get_node(sample_index) {
-                    if let Some(feature) = sample_node.feature() {
-                        x.insert(
-                            cls.clone(),
-                            na::DMatrix::zeros(indices.len(), feature.len()),
-                        );
-                        if let Some(matrix) = x.get_mut(cls) {
-                            for (i, &index) in indices.iter().enumerate() {
-                                if let Some(_) = self.get_node(index) {
-                                    matrix.row_mut(i).copy_from(&feature);
-                                    temp.insert(index, (cls.clone(), i));
-                                }
-                            }
-                        }
+    /// Exports node features, edge indices and edge features per class as
+    /// contiguous row-major blocks. Node classes without any feature are
+    /// skipped along with the edges that touch them, nodes and edges that
+    /// have no feature yet are zero-filled.
+    pub fn to_blocks(
+        &self,
+    ) -> (
+        HashMap<String, Block<f64>>,
+        HashMap<EdgeKey, Block<i64>>,
+        HashMap<EdgeKey, Block<f64>>,
+    ) {
+        self.build_blocks(
+            self.node_cls_memo()
+                .iter()
+                .map(|(cls, indices)| (cls.as_str(), indices.iter().copied())),
+            self.edge_cls_memo()
+                .iter()
+                .map(|(cls, indices)| (cls.as_str(), indices.iter().copied())),
+        )
+    }
+
+    /// Blocks of the given nodes and edges by class, nodes of a class are
+    /// numbered in the order given. Classes without features are left out,
+    /// and so are the edges that touch them.
+    pub(super) fn build_blocks<'a, N, E>(
+        &self,
+        nodes: impl Iterator<Item = (&'a str, N)>,
+        edges: impl Iterator<Item = (&'a str, E)>,
+    ) -> (
+        HashMap<String, Block<f64>>,
+        HashMap<EdgeKey, Block<i64>>,
+        HashMap<EdgeKey, Block<f64>>,
+    )
+    where
+        N: Iterator<Item = NodeIndex>,
+        E: Iterator<Item = EdgeIndex>,
+    {
+        let mut x: HashMap<String, Block<f64>> = HashMap::new();
+        let mut edge_index: HashMap<EdgeKey, Block<i64>> = HashMap::new();
+        let mut edge_attr: HashMap<EdgeKey, Block<f64>> = HashMap::new();
+        let mut temp: HashMap<NodeIndex, (&str, usize)> = HashMap::new();
+
+        for (cls, indices) in nodes {
+            let features: Vec<(NodeIndex, Option<na::RowDVector<f64>>)> = indices
+                .filter_map(|index| {
+                    self.get_node(index)
+                        .map(|node| (index, self.node_feature(node)))
+                })
+                .collect();
+            let cols = match features.iter().find_map(|(_, feature)| feature.as_ref()) {
+                Some(feature) => feature.len(),
+                None => continue,
+            };
+
+            let mut data = vec![0.0; features.len() * cols];
+            for (i, (index, feature)) in features.iter().enumerate() {
+                if let Some(feature) = feature {
+                    for (dst, src) in data[i * cols..(i + 1) * cols]
+                        .iter_mut()
+                        .zip(feature.iter())
+                    {
+                        *dst = *src;
                     }
                 }
+                temp.insert(*index, (cls, i));
             }
+            x.insert(
+                cls.to_owned(),
+                Block {
+                    shape: (features.len(), cols),
+                    data,
+                },
+            );
         }
 
-        for (cls, edges) in self.edge_cls_memo() {
-            if edges.is_empty() {
-                continue;
-            }
+        for (cls, indices) in edges {
+            let mut relation: Option<EdgeKey> = None;
+            let mut src_rows: Vec<i64> = Vec::new();
+            let mut tgt_rows: Vec<i64> = Vec::new();
+            let mut features: Vec<Option<na::RowDVector<f64>>> = Vec::new();
 
-            if edge_index.get(cls).is_none() {
-                edge_index.insert(cls.clone(), na::DMatrix::zeros(2, edges.len()));
-            }
-            if edge_attr.get(cls).is_none() {
-                if let Some(index) = edges.iter().next() {
-                    if let Some(edge) = self.get_edge(*index) {
-                        if let Some(feature) = edge.feature() {
-                            edge_attr.insert(
-                                cls.clone(),
-                                na::DMatrix::zeros(edges.len(), feature.len()),
-                            );
-                        }
+            for index in indices {
+                if let Some(edge) = self.get_edge(index) {
+                    if let (Some(&(src_cls, src_row)), Some(&(tgt_cls, tgt_row))) =
+                        (temp.get(edge.src_index()), temp.get(edge.tgt_index()))
+                    {
+                        relation.get_or_insert_with(|| {
+                            (src_cls.to_owned(), cls.to_owned(), tgt_cls.to_owned())
+                        });
+                        src_rows.push(src_row as i64);
+                        tgt_rows.push(tgt_row as i64);
+                        features.push(edge.feature());
                     }
                 }
             }
 
-            if let Some(edge_index_matrix) = edge_index.get_mut(cls) {
-                if let Some(edge_attr_matrix) = edge_attr.get_mut(cls) {
-                    for (i, &edge_index) in edges.iter().enumerate() {
-                        if let Some(edge) = self.get_edge(edge_index) {
-                            let src = edge.src_index();
-                            let tgt = edge.tgt_index();
-
-                            if let (Some(&(_, src_index)), Some(&(_, tgt_index))) =
-                                (temp.get(&src), temp.get(&tgt))
-                            {
-                                if let Some(edge_feature) = edge.feature() {
-                                    edge_index_matrix[(0, i)] = src_index as i64;
-                                    edge_index_matrix[(1, i)] = tgt_index as i64;
-                                    edge_attr_matrix.row_mut(i).copy_from(&edge_feature);
-                                }
-                            }
+            let relation = match relation {
+                Some(relation) => relation,
+                None => continue,
+            };
+            let rows = src_rows.len();
+            src_rows.extend(tgt_rows);
+            edge_index.insert(
+                relation.clone(),
+                Block {
+                    shape: (2, rows),
+                    data: src_rows,
+                },
+            );
+
+            if let Some(cols) = features
+                .iter()
+                .flatten()
+                .next()
+                .map(|feature| feature.len())
+            {
+                let mut data = vec![0.0; rows * cols];
+                for (i, feature) in features.iter().enumerate() {
+                    if let Some(feature) = feature {
+                        for (dst, src) in data[i * cols..(i + 1) * cols]
+                            .iter_mut()
+                            .zip(feature.iter())
+                        {
+                            *dst = *src;
                         }
                     }
                 }
+                edge_attr.insert(
+                    relation,
+                    Block {
+                        shape: (rows, cols),
+                        data,
+                    },
+                );
             }
         }
 
         (x, edge_index, edge_attr)
     }
 
-    fn compute_all_edges(&mut self, src: NodeIndex) {
-        let indices: Vec<NodeIndex> = self.graph.node_indices().collect();
-        for tgt in indices.into_iter() {
-            self.try_add_edge(src, tgt);
-            self.try_add_edge(tgt, src);
+    /// Tries to add the missing edges of a node, only the pairs listed by
+    /// the typed indexes are tested.
+    fn compute_all_edges(&mut self, index: NodeIndex) {
+        self.compute_new_edges(&[index]);
+    }
+
+    /// Tries to add the missing edges of the nodes. Candidate pairs are
+    /// read-only to compute, so they are spread over the worker threads
+    /// and the resulting edges added in order afterwards.
+    fn compute_new_edges(&mut self, indices: &[NodeIndex]) {
+        let mut seen: HashSet<(NodeIndex, NodeIndex)> = HashSet::new();
+        let mut pairs: Vec<(NodeIndex, NodeIndex)> = Vec::new();
+        for &index in indices.iter() {
+            if let Some(node) = self.get_node(index) {
+                pairs.extend(
+                    self.indexes
+                        .candidates(index, node)
+                        .into_iter()
+                        .filter(|pair| !self.edge_memo.contains_key(pair))
+                        .filter(|pair| seen.insert(*pair)),
+                );
+            }
+        }
+        let edges = par_map(&pairs, self.workers(), PAR_CHUNK, |&(src, tgt)| {
+            self.compute_dir_edge(src, tgt)
+        });
+        for ((src, tgt), edge) in pairs.into_iter().zip(edges) {
+            if let Some(edge) = edge {
+                self.add_edge(src, tgt, edge);
+            }
+        }
+    }
+
+    /// Recomputes the existing `Issues` edges touching any of the nodes in
+    /// place, each edge once and spread over the worker threads.
+    /// `Influences` and `Derives` are rolled bar by bar instead, see
+    /// `roll_dyn_edges`.
+    fn compute_dyn_edges(&mut self, indices: &[NodeIndex]) {
+        let mut edges: Vec<(EdgeIndex, NodeIndex, NodeIndex)> = Vec::new();
+        let mut seen: HashSet<EdgeIndex> = HashSet::new();
+        for &index in indices.iter() {
+            edges.extend(
+                self.graph
+                    .edges_directed(index, Direction::Outgoing)
+                    .chain(self.graph.edges_directed(index, Direction::Incoming))
+                    .filter(|edge| matches!(edge.weight(), EdgeType::Issues(_)))
+                    .filter(|edge| seen.insert(edge.id()))
+                    .map(|edge| (edge.id(), edge.source(), edge.target())),
+            );
+        }
+        let weights = par_map(&edges, self.workers(), PAR_CHUNK, |&(_, src, tgt)| {
+            self.compute_dir_edge(src, tgt)
+        });
+        for ((edge, _, _), weight) in edges.into_iter().zip(weights) {
+            if let Some(weight) = weight {
+                if let Some(slot) = self.graph.edge_weight_mut(edge) {
+                    *slot = weight;
+                }
+                self.mark_edge(edge);
+            }
         }
     }
 
-    fn try_add_edge(&mut self, src: NodeIndex, tgt: NodeIndex) {
-        if let Some(edge) = self.compute_dir_edge(src, tgt) {
-            self.add_edge(src, tgt, edge);
+    /// Applies one pushed bar, and the bar it evicted, to the rolling state
+    /// of the edges of a node. A pair of bars is part of an edge's state as
+    /// long as both nodes hold a bar at that timestamp.
+    fn roll_dyn_edges(
+        &mut self,
+        index: NodeIndex,
+        evicted: Option<(Instant, Vec<f64>)>,
+        pushed: (Instant, Vec<f64>),
+        rolled: &mut HashSet<EdgeIndex>,
+    ) {
+        let edges: Vec<(EdgeIndex, NodeIndex, NodeIndex)> = self
+            .graph
+            .edges_directed(index, Direction::Outgoing)
+            .chain(self.graph.edges_directed(index, Direction::Incoming))
+            .filter(|edge| {
+                matches!(
+                    edge.weight(),
+                    EdgeType::Influences(_) | EdgeType::Derives(_)
+                )
+            })
+            .map(|edge| (edge.id(), edge.source(), edge.target()))
+            .collect();
+        for (edge, src, tgt) in edges.into_iter() {
+            let other = if src == index { tgt } else { src };
+            let (removed, added) = match self.get_node(other) {
+                Some(node) => (
+                    evicted
+                        .as_ref()
+                        .and_then(|(timestamp, row)| Some((row, node.row_at(timestamp)?))),
+                    node.row_at(&pushed.0).map(|other| (&pushed.1, other)),
+                ),
+                None => continue,
+            };
+            let state = match self
+                .graph
+                .edge_weight_mut(edge)
+                .and_then(|e| e.rolling_mut())
+            {
+                Some(state) => state,
+                None => continue,
+            };
+            if let Some((row, other)) = removed {
+                if src == index {
+                    state.remove(row, &other);
+                } else {
+                    state.remove(&other, row);
+                }
+            }
+            if let Some((row, other)) = added {
+                if src == index {
+                    state.add(row, &other);
+                } else {
+                    state.add(&other, row);
+                }
+            }
+            rolled.insert(edge);
         }
     }
 
@@ -141,13 +371,24 @@ impl HeteroGraph {
         publisher: String,
         capacity: usize,
         tickers: Option<HashMap<String, f64>>,
+        published: Instant,
     ) {
-        let node = Article::new(title, summary, sentiment, publisher.clone(), tickers);
+        let node = Article::new(
+            title,
+            summary,
+            sentiment,
+            publisher.clone(),
+            tickers,
+            published,
+        );
         let index = self.add_node(node.into());
         self.compute_all_edges(index);
         if self.get_node_index(publisher.clone()).is_none() {
             self.add_publisher(publisher, capacity);
         }
+        if let Some(newest) = self.expiry.newest() {
+            self.prune(newest);
+        }
     }
 
     pub fn add_publisher(&mut self, name: String, capacity: usize) {
@@ -214,39 +455,120 @@ impl HeteroGraph {
     }
 
     pub fn update_currency(&mut self, symbol: String, data: PriceAggregate) {
-        if let Some(index) = self.get_node_index(symbol) {
-            if let Some(node) = self.get_node_mut(*index) {
-                if let NodeType::Currency(ref mut currency) = node {
-                    currency.update(data.timestamp().clone(), data);
-                }
+        if let Some(&index) = self.get_node_index(symbol) {
+            if let Some(NodeType::Currency(ref mut currency)) = self.get_node_mut(index) {
+                currency.update(data.timestamp().clone(), data);
+                self.mark_node(index);
             }
         }
     }
 
     pub fn update_equity(&mut self, symbol: String, data: PriceAggregate) {
-        if let Some(index) = self.get_node_index(symbol) {
-            let index_clone = *index;
-            if let Some(node) = self.get_node_mut(index_clone) {
-                if let NodeType::Equity(ref mut equity) = node {
-                    equity.update(data.timestamp().clone(), data);
-                    self.compute_all_edges(index_clone);
+        self.update_equities(std::iter::once((symbol, data)));
+    }
+
+    pub fn add_equities(
+        &mut self,
+        symbols: Vec<String>,
+        companies: Vec<Option<String>>,
+        capacity: usize,
+    ) {
+        for (symbol, company) in symbols.into_iter().zip(companies.into_iter()) {
+            self.add_equity(symbol, company, capacity);
+        }
+    }
+
+    /// Applies a batch of price updates and recomputes the edges once at the
+    /// end, so every touched edge is computed once per batch rather than once
+    /// per bar. Returns the number of bars applied, unknown symbols are
+    /// skipped.
+    pub fn update_equities<I>(&mut self, items: I) -> usize
+    where
+        I: IntoIterator<Item = (String, PriceAggregate)>,
+    {
+        let mut applied = 0;
+        let mut touched: IndexMap<NodeIndex, bool> = IndexMap::new();
+        let mut rolled: HashSet<EdgeIndex> = HashSet::new();
+        for (symbol, data) in items.into_iter() {
+            let index = match self.get_node_index(symbol) {
+                Some(index) => *index,
+                None => continue,
+            };
+            let (timestamp, row) = (data.timestamp(), data.to_vec());
+            let (first, evicted) = match self.get_node_mut(index) {
+                Some(NodeType::Equity(ref mut equity)) => {
+                    let first = equity.empty();
+                    let evicted = equity
+                        .history()
+                        .evicts()
+                        .map(|(timestamp, item)| (*timestamp, item.to_vec()));
+                    if !equity.update(timestamp, data) {
+                        continue;
+                    }
+                    (first, evicted)
                 }
+                _ => continue,
+            };
+            touched.entry(index).or_insert(first);
+            applied += 1;
+            self.roll_dyn_edges(index, evicted, (timestamp, row), &mut rolled);
+        }
+
+        for edge in rolled.into_iter() {
+            if let Some(weight) = self.graph.edge_weight_mut(edge) {
+                weight.sync();
             }
+            self.mark_edge(edge);
+        }
+        let indices: Vec<NodeIndex> = touched.keys().copied().collect();
+        for &index in indices.iter() {
+            self.mark_node(index);
         }
+        self.compute_dyn_edges(&indices);
+        let first: Vec<NodeIndex> = touched
+            .into_iter()
+            .filter_map(|(index, first)| first.then_some(index))
+            .collect();
+        self.compute_new_edges(&first);
+        applied
     }
 }
 
 #[cfg(feature = "python")]
-fn dmatrix_to_pylist<T>(py: Python, matrix: &na::DMatrix<T>) -> PyObject
+fn block_to_pyarray<T>(py: Python, block: Block<T>) -> PyResult<PyObject>
 where
-    T: ToPyObject + Copy,
+    T: numpy::Element,
 {
-    let list = PyList::empty_bound(py);
-    for row in matrix.row_iter() {
-        let py_row = PyList::new_bound(py, row.iter().cloned());
-        list.append(py_row).unwrap();
+    let (rows, cols) = block.shape;
+    let array = block.data.into_pyarray_bound(py).reshape([rows, cols])?;
+    Ok(array.into_py(py))
+}
+
+/// The `x`, `edge_index` and `edge_attr` dictionaries of `to_pyg`.
+#[cfg(feature = "python")]
+fn blocks_to_py(
+    py: Python,
+    x: HashMap<String, Block<f64>>,
+    edge_index: HashMap<EdgeKey, Block<i64>>,
+    edge_attr: HashMap<EdgeKey, Block<f64>>,
+) -> PyResult<(PyObject, PyObject, PyObject)> {
+    let x_py = PyDict::new_bound(py);
+    for (cls, block) in x {
+        x_py.set_item(cls, block_to_pyarray(py, block)?)?;
+    }
+    let edge_index_py = PyDict::new_bound(py);
+    for (relation, block) in edge_index {
+        edge_index_py.set_item(relation, block_to_pyarray(py, block)?)?;
     }
-    list.into()
+    let edge_attr_py = PyDict::new_bound(py);
+    for (relation, block) in edge_attr {
+        edge_attr_py.set_item(relation, block_to_pyarray(py, block)?)?;
+    }
+    Ok((
+        x_py.into_py(py),
+        edge_index_py.into_py(py),
+        edge_attr_py.into_py(py),
+    ))
 }
 
 #[cfg(feature = "python")]
@@ -262,34 +584,186 @@ impl HeteroGraph {
         "Hello From HeteroGraph"
     }
 
-    pub fn clear(&mut self) {
-        self.graph.clear();
+    #[pyo3(name = "clear")]
+    pub fn clear_py(&mut self) {
+        self.clear();
+    }
+
+    /// Keeps persistent export buffers that are patched with the nodes and
+    /// edges changed since the previous `to_pyg` call.
+    #[pyo3(name = "enable_snapshot")]
+    pub fn enable_snapshot_py(&mut self) {
+        self.enable_snapshot();
+    }
+
+    #[pyo3(name = "disable_snapshot")]
+    pub fn disable_snapshot_py(&mut self) {
+        self.disable_snapshot();
+    }
+
+    /// Appends the z-score, skew, kurtosis and momentum over `period` bars
+    /// and the autocorrelation at `lag` to the features of priced nodes.
+    #[pyo3(name = "enable_stat_features")]
+    pub fn enable_stat_features_py(&mut self, period: usize, lag: usize) {
+        self.enable_stat_features(period, lag);
+    }
+
+    #[pyo3(name = "disable_stat_features")]
+    pub fn disable_stat_features_py(&mut self) {
+        self.disable_stat_features();
+    }
+
+    /// Drops articles once their time decay falls below `threshold` or past
+    /// `capacity` articles, oldest first, see `compute_time_decay`.
+    #[pyo3(
+        name = "enable_eviction",
+        signature = (threshold, capacity=None, shift=7.0, alpha=0.5)
+    )]
+    pub fn enable_eviction_py(
+        &mut self,
+        threshold: f64,
+        capacity: Option<usize>,
+        shift: f64,
+        alpha: f64,
+    ) -> PyResult<()> {
+        if !(threshold > 0.0 && threshold < 1.0) || !(alpha > 0.0) {
+            return Err(PyValueError::new_err(
+                "threshold must be within (0, 1) and alpha positive",
+            ));
+        }
+        self.enable_eviction(Eviction {
+            threshold,
+            capacity,
+            shift,
+            alpha,
+        });
+        Ok(())
+    }
+
+    #[pyo3(name = "disable_eviction")]
+    pub fn disable_eviction_py(&mut self) {
+        self.disable_eviction();
+    }
+
+    /// Removes the articles expired at the unix `timestamp`, returns how
+    /// many were removed.
+    #[pyo3(name = "prune")]
+    pub fn prune_py(&mut self, py: Python, timestamp: f64) -> usize {
+        py.allow_threads(|| self.prune(instant_from_timestamp(timestamp)))
+    }
+
+    /// Time decay of the named article at the unix `timestamp`.
+    #[pyo3(name = "article_decay")]
+    pub fn article_decay_py(&self, title: String, timestamp: f64) -> Option<f64> {
+        let index = *self.get_node_index(title)?;
+        self.article_decay(index, instant_from_timestamp(timestamp))
+    }
+
+    /// Time decay of every article at the unix `timestamp`, keyed by title.
+    #[pyo3(name = "article_decays")]
+    pub fn article_decays_py(&self, timestamp: f64) -> HashMap<String, f64> {
+        self.article_decays(instant_from_timestamp(timestamp))
+            .into_iter()
+            .filter_map(|(index, decay)| Some((self.get_node(index)?.name().clone(), decay)))
+            .collect()
+    }
+
+    /// Rolling statistics of the named node keyed by statistic, with one
+    /// value per feature column.
+    #[pyo3(name = "rolling_stats")]
+    pub fn rolling_stats_py(
+        &self,
+        name: String,
+        period: usize,
+        lag: usize,
+    ) -> Option<HashMap<String, Vec<f64>>> {
+        let stats = self.get_node_by_name(name)?.stats(period, lag)?;
+        let keys = ["zscore", "skew", "kurtosis", "momentum", "autocorrelation"];
+        let cols = stats.len() / keys.len();
+        Some(
+            keys.iter()
+                .zip(stats.chunks(cols.max(1)))
+                .map(|(key, values)| (key.to_string(), values.to_vec()))
+                .collect(),
+        )
     }
 
-    /// This method will be made more efficient upon the stable
-    /// release of `rust-numpy=0.22.0`.`
+    /// Returns `(x, edge_index, edge_attr)` as dictionaries of `numpy`
+    /// arrays, `float64` for features and `int64` for indices. Node
+    /// features are keyed by class and edges by `(source, edge, target)`.
+    /// The blocks are built with the GIL released, then handed over to
+    /// `numpy` without copying, unless the snapshot is enabled, in which
+    /// case they are copied out of it.
     #[pyo3(name = "to_pyg")]
-    pub fn to_pyg_py(&self) -> PyResult<(PyObject, PyObject, PyObject)> {
-        Python::with_gil(|py| {
-            let (x, edge_index, edge_attr) = self.to_pyg();
-            let x_py: HashMap<_, _> = x
-                .into_iter()
-                .map(|(k, v)| (k, dmatrix_to_pylist(py, &v)))
-                .collect();
-            let edge_index_py: HashMap<_, _> = edge_index
-                .into_iter()
-                .map(|(k, v)| (k, dmatrix_to_pylist(py, &v)))
-                .collect();
-            let edge_attr_py: HashMap<_, _> = edge_attr
-                .into_iter()
-                .map(|(k, v)| (k, dmatrix_to_pylist(py, &v)))
-                .collect();
-            Ok((
-                x_py.into_py(py),
-                edge_index_py.into_py(py),
-                edge_attr_py.into_py(py),
-            ))
-        })
+    pub fn to_pyg_py(&mut self, py: Python) -> PyResult<(PyObject, PyObject, PyObject)> {
+        let (x, edge_index, edge_attr) = py.allow_threads(|| {
+            if self.snapshot_enabled() {
+                self.snapshot().to_blocks()
+            } else {
+                self.to_blocks()
+            }
+        });
+        blocks_to_py(py, x, edge_index, edge_attr)
+    }
+
+    /// Samples the neighbourhood of the named `seeds`, up to `fanouts[k]`
+    /// incoming edges per node at hop `k`, all of them for a negative
+    /// fanout. Returns the `to_pyg` dictionaries of the subgraph, the node
+    /// names behind its rows and the number of seed rows, both by class.
+    #[pyo3(name = "sample", signature = (seeds, fanouts, seed=0))]
+    pub fn sample_py(
+        &self,
+        py: Python,
+        seeds: Vec<String>,
+        fanouts: Vec<i64>,
+        seed: u64,
+    ) -> PyResult<(PyObject, PyObject, PyObject, PyObject, PyObject)> {
+        let seeds = seeds
+            .into_iter()
+            .map(|name| match self.get_node_index(name.clone()) {
+                Some(index) => Ok(*index),
+                None => Err(PyValueError::new_err(format!("unknown node {}", name))),
+            })
+            .collect::<PyResult<Vec<NodeIndex>>>()?;
+        let fanouts: Vec<usize> = fanouts
+            .into_iter()
+            .map(|fanout| usize::try_from(fanout).unwrap_or(usize::MAX))
+            .collect();
+        let sample = py.allow_threads(|| self.sample(&seeds, &fanouts, seed));
+        let (x, edge_index, edge_attr) =
+            blocks_to_py(py, sample.x, sample.edge_index, sample.edge_attr)?;
+        Ok((
+            x,
+            edge_index,
+            edge_attr,
+            sample.names.into_py(py),
+            sample.seeds.into_py(py),
+        ))
+    }
+
+    /// Writes the nodes with their time series and the edges with their
+    /// cached moments to `path` in a compact binary format.
+    #[pyo3(name = "save")]
+    pub fn save_py(&self, py: Python, path: String) -> PyResult<()> {
+        Ok(py.allow_threads(|| self.save(&path))?)
+    }
+
+    /// Replaces the graph with the one saved at `path`, keeping the worker
+    /// count. Nothing is replayed, the edges are restored as saved.
+    #[pyo3(name = "load")]
+    pub fn load_py(&mut self, py: Python, path: String) -> PyResult<()> {
+        let graph = py.allow_threads(|| HeteroGraph::load(&path))?;
+        let workers = self.workers;
+        *self = graph;
+        self.workers = workers;
+        Ok(())
+    }
+
+    /// Threads used to compute edges, `0` uses every available core and
+    /// `1` computes them on the calling thread.
+    #[pyo3(name = "set_workers")]
+    pub fn set_workers_py(&mut self, workers: usize) {
+        self.set_workers(workers);
     }
 
     #[pyo3(name = "node_count")]
@@ -312,7 +786,11 @@ impl HeteroGraph {
         self.add_test_node(name, value, capacity);
     }
 
-    #[pyo3(name = "add_article")]
+    /// Adds an article published at the unix `timestamp`, now by default.
+    #[pyo3(
+        name = "add_article",
+        signature = (title, summary, sentiment, publisher, capacity, tickers, timestamp=None)
+    )]
     pub fn add_article_py(
         &mut self,
         title: String,
@@ -321,19 +799,17 @@ impl HeteroGraph {
         publisher: String,
         capacity: usize,
         tickers: HashMap<String, f64>,
+        timestamp: Option<f64>,
     ) {
-        if tickers.is_empty() {
-            self.add_article(title, summary, sentiment, publisher, capacity, None);
+        let tickers = if tickers.is_empty() {
+            None
         } else {
-            self.add_article(
-                title,
-                summary,
-                sentiment,
-                publisher,
-                capacity,
-                Some(tickers),
-            );
-        }
+            Some(tickers)
+        };
+        let published = timestamp.map_or_else(Instant::now, instant_from_timestamp);
+        self.add_article(
+            title, summary, sentiment, publisher, capacity, tickers, published,
+        );
     }
 
     // #[pyo3(name = "add_publisher")]
@@ -342,18 +818,24 @@ impl HeteroGraph {
     // }
 
     #[pyo3(name = "add_company")]
-    pub fn add_company_py(&mut self, name: String, symbols: Vec<String>, capacity: usize) {
-        self.add_company(name, symbols, capacity);
+    pub fn add_company_py(
+        &mut self,
+        py: Python,
+        name: String,
+        symbols: Vec<String>,
+        capacity: usize,
+    ) {
+        py.allow_threads(|| self.add_company(name, symbols, capacity));
     }
 
     #[pyo3(name = "add_equity")]
-    pub fn add_equity_py(&mut self, symbol: String, company: String, capacity: usize) {
+    pub fn add_equity_py(&mut self, py: Python, symbol: String, company: String, capacity: usize) {
         let company = if company.is_empty() {
             None
         } else {
             Some(company)
         };
-        self.add_equity(symbol, company, capacity);
+        py.allow_threads(|| self.add_equity(symbol, company, capacity));
     }
 
     #[pyo3(name = "add_currency")]
@@ -403,6 +885,7 @@ impl HeteroGraph {
     #[pyo3(name = "update_currency")]
     pub fn update_currency_py(
         &mut self,
+        py: Python,
         symbol: String,
         timestamp: f64,
         duration: f64,
@@ -413,27 +896,23 @@ impl HeteroGraph {
         low: f64,
         volume: f64,
     ) {
-        let instant = UNIX_EPOCH + Duration::from_secs_f64(timestamp);
-        let instant_rs = match instant.duration_since(SystemTime::now()) {
-            Ok(duration) => Instant::now() + duration,
-            Err(_) => Instant::now(),
-        };
         let data = PriceAggregate::new(
-            instant_rs,
+            instant_from_timestamp(timestamp),
             Duration::from_secs_f64(duration),
             adjusted,
             open,
-            close,
             high,
             low,
+            close,
             volume,
         );
-        self.update_currency(symbol, data);
+        py.allow_threads(|| self.update_currency(symbol, data));
     }
 
     #[pyo3(name = "update_equity")]
     pub fn update_equity_py(
         &mut self,
+        py: Python,
         symbol: String,
         timestamp: f64,
         duration: f64,
@@ -444,22 +923,105 @@ impl HeteroGraph {
         low: f64,
         volume: f64,
     ) {
-        let instant = UNIX_EPOCH + Duration::from_secs_f64(timestamp);
-        let instant_rs = match instant.duration_since(SystemTime::now()) {
-            Ok(duration) => Instant::now() + duration,
-            Err(_) => Instant::now(),
-        };
         let data = PriceAggregate::new(
-            instant_rs,
+            instant_from_timestamp(timestamp),
             Duration::from_secs_f64(duration),
             adjusted,
             open,
-            close,
             high,
             low,
+            close,
             volume,
         );
-        self.update_equity(symbol, data);
+        py.allow_threads(|| self.update_equity(symbol, data));
+    }
+
+    #[pyo3(name = "add_equities")]
+    pub fn add_equities_py(
+        &mut self,
+        py: Python,
+        symbols: Vec<String>,
+        companies: Vec<String>,
+        capacity: usize,
+    ) {
+        let companies = companies
+            .into_iter()
+            .map(|company| {
+                if company.is_empty() {
+                    None
+                } else {
+                    Some(company)
+                }
+            })
+            .collect();
+        py.allow_threads(|| self.add_equities(symbols, companies, capacity));
+    }
+
+    /// Applies one bar per row of the columnar arrays in a single call,
+    /// timestamps are unix seconds. Returns the number of bars applied.
+    /// The columns are read under the GIL, the bars are then applied and
+    /// the edges recomputed with it released.
+    #[pyo3(name = "update_equities_batch")]
+    pub fn update_equities_batch_py<'py>(
+        &mut self,
+        py: Python<'py>,
+        symbols: Vec<String>,
+        timestamps: PyReadonlyArray1<'py, f64>,
+        durations: PyReadonlyArray1<'py, f64>,
+        adjusted: PyReadonlyArray1<'py, bool>,
+        open: PyReadonlyArray1<'py, f64>,
+        high: PyReadonlyArray1<'py, f64>,
+        low: PyReadonlyArray1<'py, f64>,
+        close: PyReadonlyArray1<'py, f64>,
+        volume: PyReadonlyArray1<'py, f64>,
+    ) -> PyResult<usize> {
+        let (timestamps, durations, adjusted) = (
+            timestamps.as_slice()?,
+            durations.as_slice()?,
+            adjusted.as_slice()?,
+        );
+        let (open, high, low, close, volume) = (
+            open.as_slice()?,
+            high.as_slice()?,
+            low.as_slice()?,
+            close.as_slice()?,
+            volume.as_slice()?,
+        );
+        let n = symbols.len();
+        let lengths = [
+            timestamps.len(),
+            durations.len(),
+            adjusted.len(),
+            open.len(),
+            high.len(),
+            low.len(),
+            close.len(),
+            volume.len(),
+        ];
+        if lengths.iter().any(|&len| len != n) {
+            return Err(PyValueError::new_err(format!(
+                "All columns must have {} rows, got {:?}",
+                n, lengths
+            )));
+        }
+        let items: Vec<(String, PriceAggregate)> = symbols
+            .into_iter()
+            .enumerate()
+            .map(|(i, symbol)| {
+                let data = PriceAggregate::new(
+                    instant_from_timestamp(timestamps[i]),
+                    Duration::from_secs_f64(durations[i]),
+                    adjusted[i],
+                    open[i],
+                    high[i],
+                    low[i],
+                    close[i],
+                    volume[i],
+                );
+                (symbol, data)
+            })
+            .collect();
+        Ok(py.allow_threads(|| self.update_equities(items)))
     }
 }
 
@@ -530,6 +1092,87 @@ mod tests {
         assert_eq!(edge_attr_py, expected_edge_attr);
     }
 
+    #[test]
+    fn test_to_blocks() {
+        let mut graph = HeteroGraph::new();
+        graph.add_equity("foo".to_owned(), None, 10);
+        graph.add_equity("bar".to_owned(), None, 10);
+
+        let timestamp = Instant::now();
+        let duration = Duration::from_secs(60);
+        graph.update_equity(
+            "foo".to_owned(),
+            PriceAggregate::new(timestamp, duration, true, 1.0, 2.0, 3.0, 4.0, 5.0),
+        );
+        graph.update_equity(
+            "bar".to_owned(),
+            PriceAggregate::new(timestamp, duration, true, 1.0, 2.0, 3.0, 4.0, 5.0),
+        );
+
+        let (x, edge_index, edge_attr) = graph.to_blocks();
+        let equity = x.get("Equity").unwrap();
+        assert_eq!(equity.shape, (2, 5));
+        assert_eq!(&equity.data[0..5], &[1.0, 2.0, 3.0, 4.0, 5.0]);
+        assert_eq!(&equity.data[5..10], &[1.0, 2.0, 3.0, 4.0, 5.0]);
+
+        let relation = (
+            "Equity".to_owned(),
+            "Influences".to_owned(),
+            "Equity".to_owned(),
+        );
+        let index = edge_index.get(&relation).unwrap();
+        assert_eq!(index.shape, (2, 2));
+        assert_eq!(index.data.len(), 4);
+        assert_ne!(index.data[0], index.data[2]);
+        assert!(edge_attr
+            .get(&relation)
+            .is_some_and(|attr| attr.shape.0 == 2));
+    }
+
+    #[test]
+    fn test_stat_features() {
+        let mut graph = HeteroGraph::new();
+        graph.enable_snapshot();
+        graph.add_equity("foo".to_owned(), None, 10);
+        graph.enable_stat_features(3, 1);
+        graph.add_equity("bar".to_owned(), None, 10);
+
+        let timestamp = Instant::now();
+        let duration = Duration::from_secs(60);
+        for i in 0..6u64 {
+            let value = (i * i) as f64;
+            for symbol in ["foo", "bar"] {
+                graph.update_equity(
+                    symbol.to_owned(),
+                    PriceAggregate::new(
+                        timestamp + duration * i as u32,
+                        duration,
+                        true,
+                        value,
+                        value,
+                        value,
+                        value,
+                        value,
+                    ),
+                );
+            }
+        }
+
+        let (x, _, _) = graph.to_blocks();
+        let equity = x.get("Equity").unwrap();
+        assert_eq!(equity.shape, (2, 30));
+        let momentum = equity.data[5 + 3 * 5];
+        assert_eq!(momentum, 25.0 - 4.0);
+        assert_eq!(&equity.data[0..30], &equity.data[30..60]);
+
+        let (x, _, _) = graph.snapshot().to_blocks();
+        assert_eq!(x.get("Equity").unwrap(), equity);
+
+        graph.disable_stat_features();
+        let (x, _, _) = graph.snapshot().to_blocks();
+        assert_eq!(x.get("Equity").unwrap().shape, (2, 5));
+    }
+
     #[test]
     fn test_combination_1() {
         let mut graph = HeteroGraph::new();
@@ -540,6 +1183,7 @@ mod tests {
             "test_publisher".to_owned(),
             10,
             None,
+            Instant::now(),
         );
 
         assert_eq!(graph.node_count(), 2);
@@ -623,4 +1267,156 @@ mod tests {
 
         assert_eq!(graph.edge_count(), 2);
     }
+
+    #[test]
+    fn test_update_keeps_edges() {
+        let mut graph = HeteroGraph::new();
+        graph.add_equity("foo".to_owned(), None, 10);
+        graph.add_equity("bar".to_owned(), None, 10);
+        graph.add_currency("USD".to_owned(), 10);
+
+        let duration = Duration::from_secs(60);
+        for i in 0..5 {
+            let price = 100.0 + i as f64;
+            for symbol in ["foo", "bar"] {
+                graph.update_equity(
+                    symbol.to_owned(),
+                    PriceAggregate::new(
+                        Instant::now(),
+                        duration,
+                        true,
+                        price,
+                        price,
+                        price,
+                        price,
+                        1000.0,
+                    ),
+                );
+            }
+        }
+        assert_eq!(graph.edge_count(), 2);
+        assert_eq!(graph.edge_cls_memo()["Influences"].len(), 2);
+
+        graph.remove_node_by_name("bar".to_owned());
+        assert_eq!(graph.edge_count(), 0);
+        assert!(graph.edge_memo.is_empty());
+    }
+
+    #[test]
+    fn test_update_equities() {
+        let mut graph = HeteroGraph::new();
+        let symbols: Vec<String> = ["foo", "bar", "baz"]
+            .iter()
+            .map(|s| s.to_string())
+            .collect();
+        graph.add_equities(symbols.clone(), vec![None; symbols.len()], 10);
+        assert_eq!(graph.node_count(), 3);
+
+        let duration = Duration::from_secs(60);
+        let mut items: Vec<(String, PriceAggregate)> = Vec::new();
+        for i in 0..4 {
+            let timestamp = instant_from_timestamp(1_700_000_000.0 + 60.0 * i as f64);
+            let price = 100.0 + i as f64;
+            for symbol in ["foo", "bar", "baz", "qux"] {
+                items.push((
+                    symbol.to_owned(),
+                    PriceAggregate::new(
+                        timestamp, duration, true, price, price, price, price, 1000.0,
+                    ),
+                ));
+            }
+        }
+        assert_eq!(graph.update_equities(items), 12);
+        assert_eq!(graph.edge_count(), 6);
+
+        let foo = graph.get_node_by_name("foo".to_owned()).unwrap();
+        match foo {
+            NodeType::Equity(equity) => assert_eq!(equity.mat().unwrap().nrows(), 4),
+            _ => panic!("Expected Equity"),
+        }
+    }
+
+    #[test]
+    fn test_parallel_edges() {
+        let symbols: Vec<String> = (0..12).map(|i| format!("sym{}", i)).collect();
+        let duration = Duration::from_secs(60);
+        let mut items: Vec<(String, PriceAggregate)> = Vec::new();
+        for i in 0..8 {
+            let timestamp = instant_from_timestamp(1_700_000_000.0 + 60.0 * i as f64);
+            for (j, symbol) in symbols.iter().enumerate() {
+                let price = 100.0 + ((i * (j + 1)) % 7) as f64;
+                items.push((
+                    symbol.clone(),
+                    PriceAggregate::new(
+                        timestamp, duration, true, price, price, price, price, 1000.0,
+                    ),
+                ));
+            }
+        }
+        let build = |workers: usize| {
+            let mut graph = HeteroGraph::new();
+            graph.set_workers(workers);
+            graph.add_equities(symbols.clone(), vec![None; symbols.len()], 10);
+            graph.update_equities(items.clone());
+            graph
+        };
+        let (serial, parallel) = (build(1), build(4));
+        assert_eq!(serial.workers(), 1);
+        assert_eq!(serial.edge_count(), 12 * 11);
+        assert_eq!(parallel.edge_count(), serial.edge_count());
+        for src in symbols.iter() {
+            for tgt in symbols.iter().filter(|tgt| *tgt != src) {
+                let feature = |graph: &HeteroGraph| {
+                    graph
+                        .get_edge_by_names(src.clone(), tgt.clone())
+                        .and_then(|edge| edge.feature())
+                };
+                assert!(feature(&serial).is_some());
+                assert_eq!(feature(&parallel), feature(&serial));
+            }
+        }
+    }
+
+    #[test]
+    fn test_rolling_edges() {
+        let mut graph = HeteroGraph::new();
+        graph.add_equity("foo".to_owned(), None, 5);
+        graph.add_equity("bar".to_owned(), None, 5);
+
+        let duration = Duration::from_secs(60);
+        for i in 0..12 {
+            let timestamp = instant_from_timestamp(1_700_000_000.0 + 60.0 * i as f64);
+            let x = i as f64;
+            let foo = PriceAggregate::new(timestamp, duration, true, x, x * 1.5, x % 3.0, x, 10.0);
+            graph.update_equity("foo".to_owned(), foo);
+            if i % 4 != 1 {
+                let y = (x * 0.9).cos();
+                let bar = PriceAggregate::new(timestamp, duration, true, y, 2.0 * y, y, x, x * x);
+                graph.update_equity("bar".to_owned(), bar);
+            }
+        }
+
+        let (foo, bar) = (
+            graph.get_node_by_name("foo".to_owned()).unwrap(),
+            graph.get_node_by_name("bar".to_owned()).unwrap(),
+        );
+        let (foo, bar) = match (foo, bar) {
+            (NodeType::Equity(foo), NodeType::Equity(bar)) => (foo, bar),
+            _ => panic!("Expected Equity"),
+        };
+        let edge = graph.get_edge_by_names("foo".to_owned(), "bar".to_owned());
+        match edge {
+            Some(EdgeType::Influences(edge)) => {
+                let rolled = edge.covariance().unwrap();
+                let expected = edge.compute_covariance(foo, bar).unwrap();
+                assert_eq!(rolled.shape(), (5, 5));
+                for i in 0..5 {
+                    for j in 0..5 {
+                        assert!((rolled[(i, j)] - expected[(i, j)]).abs() < 1e-9);
+                    }
+                }
+            }
+            _ => panic!("Expected Influences"),
+        }
+    }
 }
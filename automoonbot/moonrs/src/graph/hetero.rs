@@ -8,6 +8,12 @@ pub struct HeteroGraph {
     pub(super) edge_memo: HashMap<(NodeIndex, NodeIndex), EdgeIndex>,
     pub(super) node_cls_memo: HashMap<String, HashSet<NodeIndex>>,
     pub(super) edge_cls_memo: HashMap<String, HashSet<EdgeIndex>>,
+    pub(super) indexes: NodeIndexes,
+    pub(super) expiry: Expiry,
+    pub(super) eviction: Option<Eviction>,
+    pub(super) snapshot: Option<Snapshot>,
+    pub(super) stat_features: Option<(usize, usize)>,
+    pub(super) workers: usize,
 }
 
 impl HeteroGraph {
@@ -18,6 +24,40 @@ impl HeteroGraph {
             edge_memo: HashMap::new(),
             node_cls_memo: HashMap::new(),
             edge_cls_memo: HashMap::new(),
+            indexes: NodeIndexes::default(),
+            expiry: Expiry::default(),
+            eviction: None,
+            snapshot: None,
+            stat_features: None,
+            workers: 0,
+        }
+    }
+
+    /// Threads used to compute edges, all available cores by default.
+    pub fn workers(&self) -> usize {
+        if self.workers == 0 {
+            default_workers()
+        } else {
+            self.workers
+        }
+    }
+
+    /// Sets the number of threads used to compute edges, `0` uses every
+    /// available core and `1` computes them on the calling thread.
+    pub fn set_workers(&mut self, workers: usize) {
+        self.workers = workers;
+    }
+
+    pub fn clear(&mut self) {
+        self.graph.clear();
+        self.node_memo.clear();
+        self.edge_memo.clear();
+        self.node_cls_memo.clear();
+        self.edge_cls_memo.clear();
+        self.indexes = NodeIndexes::default();
+        self.expiry = Expiry::default();
+        if self.snapshot.is_some() {
+            self.snapshot = Some(Snapshot::default());
         }
     }
 
@@ -72,12 +112,20 @@ impl HeteroGraph {
         self.get_edge_by_pair(*source, *target)
     }
 
-    pub fn add_node(&mut self, node: NodeType) -> NodeIndex {
+    pub fn add_node(&mut self, mut node: NodeType) -> NodeIndex {
+        if let Some((period, lag)) = self.stat_features {
+            node.track_stats(period, lag);
+        }
         let name = node.name().to_string();
         let cls = node.cls().to_string();
         let index = self.graph.add_node(node);
+        if let Some(node) = self.graph.node_weight(index) {
+            self.indexes.insert(index, node);
+            self.expiry.insert(index, node);
+        }
         self.node_memo.entry(name).or_insert(index);
         self.node_cls_memo.entry(cls).or_default().insert(index);
+        self.mark_node(index);
         index
     }
 
@@ -86,15 +134,30 @@ impl HeteroGraph {
         let index = self.graph.add_edge(src, tgt, edge);
         self.edge_memo.entry((src, tgt)).or_insert(index);
         self.edge_cls_memo.entry(cls).or_default().insert(index);
+        self.mark_edge(index);
     }
 
     pub fn remove_node(&mut self, index: NodeIndex) {
+        let incident: Vec<EdgeIndex> = self
+            .graph
+            .edges_directed(index, Direction::Outgoing)
+            .chain(self.graph.edges_directed(index, Direction::Incoming))
+            .map(|edge| edge.id())
+            .collect();
+        for edge in incident {
+            self.remove_edge(edge);
+        }
         if let Some(node) = self.graph.remove_node(index) {
+            self.indexes.remove(index, &node);
+            self.expiry.remove(index, &node);
             self.node_memo.remove(node.name());
             let cls = node.cls().to_string();
             if let Some(cls_set) = self.node_cls_memo.get_mut(&cls) {
                 cls_set.remove(&index);
             }
+            if let Some(snapshot) = self.snapshot.as_mut() {
+                snapshot.drop_node(index, &cls);
+            }
         }
     }
 
@@ -106,9 +169,36 @@ impl HeteroGraph {
             if let Some(cls_set) = self.edge_cls_memo.get_mut(&cls) {
                 cls_set.remove(&index);
             }
+            if let Some(snapshot) = self.snapshot.as_mut() {
+                snapshot.drop_edge(index, &cls);
+            }
+        }
+    }
+
+    /// Appends the rolling statistics of every priced node to its feature
+    /// row, see `NodeType::stats`. The sums behind them are kept up to date
+    /// on every bar from now on, for existing and future nodes alike.
+    pub fn enable_stat_features(&mut self, period: usize, lag: usize) {
+        self.stat_features = Some((period, lag));
+        for node in self.graph.node_weights_mut() {
+            node.track_stats(period, lag);
+        }
+        if self.snapshot.is_some() {
+            self.snapshot = Some(Snapshot::new(&self.graph));
         }
     }
 
+    pub fn disable_stat_features(&mut self) {
+        if self.stat_features.take().is_some() && self.snapshot.is_some() {
+            self.snapshot = Some(Snapshot::new(&self.graph));
+        }
+    }
+
+    /// Feature row of `node` as exported by `to_pyg`.
+    pub fn node_feature(&self, node: &NodeType) -> Option<na::RowDVector<f64>> {
+        node_feature(node, self.stat_features)
+    }
+
     pub fn remove_node_by_name(&mut self, name: String) {
         if let Some(index) = self.get_node_index(name) {
             self.remove_node(*index);
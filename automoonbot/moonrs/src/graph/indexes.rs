@@ -0,0 +1,207 @@
+use crate::graph::*;
+
+type Memo = HashMap<String, HashSet<NodeIndex>>;
+
+fn memo_insert(memo: &mut Memo, key: &str, index: NodeIndex) {
+    memo.entry(key.to_owned()).or_default().insert(index);
+}
+
+fn memo_remove(memo: &mut Memo, key: &str, index: NodeIndex) {
+    if let Some(set) = memo.get_mut(key) {
+        set.remove(&index);
+        if set.is_empty() {
+            memo.remove(key);
+        }
+    }
+}
+
+fn memo_get<'a>(memo: &'a Memo, key: &str) -> impl Iterator<Item = NodeIndex> + 'a {
+    memo.get(key).into_iter().flatten().copied()
+}
+
+/// Typed lookup tables over the nodes of a graph, keyed by the attributes
+/// that `compute_dir_edge` matches on. They narrow the pairs tested for an
+/// edge down to the ones that can actually produce one.
+#[derive(Debug, Default)]
+pub struct NodeIndexes {
+    test_nodes: HashSet<NodeIndex>,
+    equities: Memo,
+    publishers: Memo,
+    articles_by_publisher: Memo,
+    articles_by_ticker: Memo,
+    companies_by_symbol: Memo,
+    options_by_underlying: Memo,
+}
+
+impl NodeIndexes {
+    pub fn insert(&mut self, index: NodeIndex, node: &NodeType) {
+        match node {
+            NodeType::TestNode(_) => {
+                self.test_nodes.insert(index);
+            }
+            NodeType::Equity(equity) => memo_insert(&mut self.equities, equity.name(), index),
+            NodeType::Publisher(publisher) => {
+                memo_insert(&mut self.publishers, publisher.name(), index)
+            }
+            NodeType::Article(article) => {
+                memo_insert(&mut self.articles_by_publisher, article.publisher(), index);
+                for ticker in article.tickers().into_iter().flat_map(|t| t.keys()) {
+                    memo_insert(&mut self.articles_by_ticker, ticker, index);
+                }
+            }
+            NodeType::Company(company) => {
+                for symbol in company.symbols().iter() {
+                    memo_insert(&mut self.companies_by_symbol, symbol, index);
+                }
+            }
+            NodeType::Options(option) => {
+                memo_insert(&mut self.options_by_underlying, option.underlying(), index)
+            }
+            NodeType::Currency(_) | NodeType::Bonds(_) => {}
+        }
+    }
+
+    pub fn remove(&mut self, index: NodeIndex, node: &NodeType) {
+        match node {
+            NodeType::TestNode(_) => {
+                self.test_nodes.remove(&index);
+            }
+            NodeType::Equity(equity) => memo_remove(&mut self.equities, equity.name(), index),
+            NodeType::Publisher(publisher) => {
+                memo_remove(&mut self.publishers, publisher.name(), index)
+            }
+            NodeType::Article(article) => {
+                memo_remove(&mut self.articles_by_publisher, article.publisher(), index);
+                for ticker in article.tickers().into_iter().flat_map(|t| t.keys()) {
+                    memo_remove(&mut self.articles_by_ticker, ticker, index);
+                }
+            }
+            NodeType::Company(company) => {
+                for symbol in company.symbols().iter() {
+                    memo_remove(&mut self.companies_by_symbol, symbol, index);
+                }
+            }
+            NodeType::Options(option) => {
+                memo_remove(&mut self.options_by_underlying, option.underlying(), index)
+            }
+            NodeType::Currency(_) | NodeType::Bonds(_) => {}
+        }
+    }
+
+    /// Number of articles attributed to `publisher`.
+    pub fn articles_of(&self, publisher: &str) -> usize {
+        self.articles_by_publisher
+            .get(publisher)
+            .map_or(0, |set| set.len())
+    }
+
+    /// Directed `(source, target)` pairs that may hold an edge with `node`
+    /// on either end, as matched by `compute_dir_edge`.
+    pub fn candidates(&self, index: NodeIndex, node: &NodeType) -> Vec<(NodeIndex, NodeIndex)> {
+        let mut pairs = Vec::new();
+        match node {
+            NodeType::TestNode(_) => {
+                for &other in self.test_nodes.iter() {
+                    pairs.push((index, other));
+                    pairs.push((other, index));
+                }
+            }
+            NodeType::Publisher(publisher) => {
+                pairs.extend(
+                    memo_get(&self.articles_by_publisher, publisher.name())
+                        .map(|article| (index, article)),
+                );
+            }
+            NodeType::Article(article) => {
+                pairs.extend(
+                    memo_get(&self.publishers, article.publisher())
+                        .map(|publisher| (publisher, index)),
+                );
+                let mut companies: HashSet<NodeIndex> = HashSet::new();
+                for ticker in article.tickers().into_iter().flat_map(|t| t.keys()) {
+                    companies.extend(memo_get(&self.companies_by_symbol, ticker));
+                    pairs.extend(memo_get(&self.equities, ticker).map(|equity| (index, equity)));
+                }
+                pairs.extend(companies.into_iter().map(|company| (index, company)));
+            }
+            NodeType::Company(company) => {
+                let mut articles: HashSet<NodeIndex> = HashSet::new();
+                for symbol in company.symbols().iter() {
+                    articles.extend(memo_get(&self.articles_by_ticker, symbol));
+                    pairs.extend(memo_get(&self.equities, symbol).map(|equity| (index, equity)));
+                }
+                pairs.extend(articles.into_iter().map(|article| (article, index)));
+            }
+            NodeType::Equity(equity) => {
+                let symbol = equity.name();
+                pairs.extend(
+                    memo_get(&self.companies_by_symbol, symbol).map(|company| (company, index)),
+                );
+                pairs.extend(
+                    memo_get(&self.articles_by_ticker, symbol).map(|article| (article, index)),
+                );
+                for other in self.equities.values().flatten().copied() {
+                    pairs.push((index, other));
+                    pairs.push((other, index));
+                }
+                pairs.extend(
+                    memo_get(&self.options_by_underlying, symbol).map(|option| (index, option)),
+                );
+            }
+            NodeType::Options(option) => {
+                pairs.extend(
+                    memo_get(&self.equities, option.underlying()).map(|equity| (equity, index)),
+                );
+            }
+            NodeType::Currency(_) | NodeType::Bonds(_) => {}
+        }
+        pairs.retain(|(src, tgt)| src != tgt);
+        pairs
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_candidates() {
+        let mut indexes = NodeIndexes::default();
+        let nodes: Vec<NodeType> = vec![
+            Equity::new("AAPL".to_owned(), None, 1).into(),
+            Equity::new("MSFT".to_owned(), None, 1).into(),
+            Publisher::new("Reuters".to_owned(), 1).into(),
+            Currency::new("USD".to_owned(), 1).into(),
+        ];
+        for (i, node) in nodes.iter().enumerate() {
+            indexes.insert(NodeIndex::new(i), node);
+        }
+
+        let tickers = HashMap::from([("AAPL".to_owned(), 0.5)]);
+        let article: NodeType = Article::new(
+            "title".to_owned(),
+            "summary".to_owned(),
+            0.5,
+            "Reuters".to_owned(),
+            Some(tickers),
+            Instant::now(),
+        )
+        .into();
+        let index = NodeIndex::new(nodes.len());
+        indexes.insert(index, &article);
+
+        let mut pairs = indexes.candidates(index, &article);
+        pairs.sort();
+        assert_eq!(
+            pairs,
+            vec![(NodeIndex::new(2), index), (index, NodeIndex::new(0))]
+        );
+
+        let pairs = indexes.candidates(NodeIndex::new(0), &nodes[0]);
+        assert_eq!(pairs.len(), 3);
+        assert!(indexes.candidates(NodeIndex::new(3), &nodes[3]).is_empty());
+
+        indexes.remove(index, &article);
+        assert_eq!(indexes.candidates(NodeIndex::new(0), &nodes[0]).len(), 2);
+    }
+}
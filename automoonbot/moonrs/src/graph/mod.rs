@@ -1,9 +1,22 @@
+pub mod eviction;
 pub mod exports;
 pub mod hetero;
+pub mod indexes;
+pub mod persist;
+pub mod sampler;
+pub mod snapshot;
 use crate::{
     data::*,
     edges::{StaticEdge, *},
-    graph::hetero::HeteroGraph,
+    graph::{
+        eviction::{Eviction, Expiry},
+        exports::*,
+        hetero::HeteroGraph,
+        indexes::NodeIndexes,
+        snapshot::Snapshot,
+    },
     nodes::{StaticNode, *},
+    utils::helpers::*,
     *,
 };
+use indexmap::IndexMap;
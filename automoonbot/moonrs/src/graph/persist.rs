@@ -0,0 +1,249 @@
+use crate::graph::*;
+use crate::utils::codec::*;
+use std::{fs, io, path::Path};
+
+/// Leading bytes of a file written by `HeteroGraph::save`.
+const MAGIC: &[u8; 8] = b"MOONGRPH";
+
+/// Layout version, files of any other version are rejected.
+const VERSION: u64 = 2;
+
+impl HeteroGraph {
+    /// Encodes the settings, every node with its time series and every edge
+    /// with its cached moments. Node indices are compacted, edges refer to
+    /// nodes by their position in the file.
+    pub fn to_bytes(&self) -> Vec<u8> {
+        let mut out = Encoder::new();
+        out.raw(MAGIC);
+        out.u64(VERSION);
+        out.bool(self.snapshot_enabled());
+        out.bool(self.stat_features.is_some());
+        if let Some((period, lag)) = self.stat_features {
+            out.usize(period);
+            out.usize(lag);
+        }
+        out.bool(self.eviction.is_some());
+        if let Some(eviction) = self.eviction {
+            out.f64(eviction.threshold);
+            out.bool(eviction.capacity.is_some());
+            out.usize(eviction.capacity.unwrap_or(0));
+            out.f64(eviction.shift);
+            out.f64(eviction.alpha);
+        }
+        let mut positions: HashMap<NodeIndex, usize> = HashMap::new();
+        out.usize(self.graph.node_count());
+        for index in self.graph.node_indices() {
+            positions.insert(index, positions.len());
+            out.record(&self.graph[index]);
+        }
+        out.usize(self.graph.edge_count());
+        for edge in self.graph.edge_indices() {
+            if let Some((src, tgt)) = self.graph.edge_endpoints(edge) {
+                out.usize(positions[&src]);
+                out.usize(positions[&tgt]);
+                self.graph[edge].encode(&mut out);
+            }
+        }
+        out.into_bytes()
+    }
+
+    /// Rebuilds a graph from `to_bytes`. Nodes and edges are inserted as
+    /// stored, nothing is recomputed from the time series.
+    pub fn from_bytes(bytes: &[u8]) -> io::Result<Self> {
+        let mut input = Decoder::new(bytes);
+        if input.raw(MAGIC.len())? != MAGIC {
+            return Err(invalid("not a graph file"));
+        }
+        if input.u64()? != VERSION {
+            return Err(invalid("unsupported graph file version"));
+        }
+        let mut graph = HeteroGraph::new();
+        let snapshot = input.bool()?;
+        if input.bool()? {
+            graph.stat_features = Some((input.usize()?, input.usize()?));
+        }
+        if input.bool()? {
+            let threshold = input.f64()?;
+            let capacity = (input.bool()?, input.usize()?);
+            graph.eviction = Some(Eviction {
+                threshold,
+                capacity: capacity.0.then_some(capacity.1),
+                shift: input.f64()?,
+                alpha: input.f64()?,
+            });
+        }
+        let nodes = input.len(1)?;
+        let mut indices: Vec<NodeIndex> = Vec::with_capacity(nodes);
+        for _ in 0..nodes {
+            let node: NodeType = input.record()?;
+            indices.push(graph.add_node(node));
+        }
+        let edges = input.len(17)?;
+        for _ in 0..edges {
+            let (src, tgt) = (input.usize()?, input.usize()?);
+            let (src, tgt) = match (indices.get(src), indices.get(tgt)) {
+                (Some(src), Some(tgt)) => (*src, *tgt),
+                _ => return Err(invalid("edge endpoint out of range")),
+            };
+            let edge = EdgeType::decode(&mut input, src, tgt)?;
+            graph.add_edge(src, tgt, edge);
+        }
+        if input.remaining() > 0 {
+            return Err(invalid("trailing bytes after the graph"));
+        }
+        if snapshot {
+            graph.enable_snapshot();
+        }
+        Ok(graph)
+    }
+
+    /// Writes the graph to `path`, through a temporary file renamed over it
+    /// so that a reader never sees a partial graph.
+    pub fn save<P: AsRef<Path>>(&self, path: P) -> io::Result<()> {
+        let path = path.as_ref();
+        let mut partial = path.as_os_str().to_owned();
+        partial.push(".partial");
+        fs::write(&partial, self.to_bytes())?;
+        fs::rename(&partial, path)
+    }
+
+    /// Reads a graph written by `save`, in a single read of the file.
+    pub fn load<P: AsRef<Path>>(path: P) -> io::Result<Self> {
+        Self::from_bytes(&fs::read(path)?)
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn warm_graph() -> HeteroGraph {
+        let mut graph = HeteroGraph::new();
+        graph.enable_stat_features(3, 1);
+        let symbols: Vec<String> = ["foo", "bar", "baz"]
+            .iter()
+            .map(|s| s.to_string())
+            .collect();
+        graph.add_equities(symbols.clone(), vec![None; symbols.len()], 4);
+        graph.add_test_node("test".to_owned(), 1.5, 2);
+        let duration = Duration::from_secs(60);
+        let mut items: Vec<(String, PriceAggregate)> = Vec::new();
+        for i in 0..6 {
+            let timestamp = instant_from_timestamp(1_700_000_000.0 + 60.0 * i as f64);
+            for (j, symbol) in symbols.iter().enumerate() {
+                let price = 100.0 + ((i * (j + 2)) % 5) as f64;
+                items.push((
+                    symbol.clone(),
+                    PriceAggregate::new(
+                        timestamp,
+                        duration,
+                        j != 1,
+                        price,
+                        price + 1.0,
+                        price - 1.0,
+                        price,
+                        1000.0 + i as f64,
+                    ),
+                ));
+            }
+        }
+        graph.update_equities(items);
+        graph.enable_eviction(Eviction {
+            capacity: Some(8),
+            ..Eviction::default()
+        });
+        graph.add_article(
+            "article".to_owned(),
+            "summary".to_owned(),
+            0.25,
+            "publisher".to_owned(),
+            4,
+            Some(HashMap::from([("foo".to_owned(), 0.5)])),
+            instant_from_timestamp(1_700_000_000.0),
+        );
+        graph
+    }
+
+    #[test]
+    fn test_round_trip() {
+        let graph = warm_graph();
+        let restored = HeteroGraph::from_bytes(&graph.to_bytes()).unwrap();
+        assert_eq!(restored.node_count(), graph.node_count());
+        assert_eq!(restored.edge_count(), graph.edge_count());
+        assert_eq!(restored.stat_features, Some((3, 1)));
+        assert_eq!(restored.eviction, graph.eviction);
+        assert_eq!(
+            restored.expiry.oldest().map(|(t, _)| t),
+            graph.expiry.newest()
+        );
+        assert!(!restored.snapshot_enabled());
+
+        for symbol in ["foo", "bar", "baz", "test"] {
+            let (a, b) = (
+                graph.get_node_by_name(symbol.to_owned()).unwrap(),
+                restored.get_node_by_name(symbol.to_owned()).unwrap(),
+            );
+            assert_eq!(a.cls(), b.cls());
+            assert_eq!(graph.node_feature(a), restored.node_feature(b));
+            assert_eq!(a.stats(3, 1), b.stats(3, 1));
+        }
+        for src in ["foo", "bar", "baz"] {
+            for tgt in ["foo", "bar", "baz"].iter().filter(|tgt| **tgt != src) {
+                let feature = |graph: &HeteroGraph| {
+                    graph
+                        .get_edge_by_names(src.to_owned(), tgt.to_string())
+                        .and_then(|edge| edge.feature())
+                };
+                assert!(feature(&graph).is_some());
+                assert_eq!(feature(&restored), feature(&graph));
+            }
+        }
+    }
+
+    #[test]
+    fn test_update_after_load() {
+        let mut graph = warm_graph();
+        graph.enable_snapshot();
+        let mut restored = HeteroGraph::from_bytes(&graph.to_bytes()).unwrap();
+        assert!(restored.snapshot_enabled());
+
+        let timestamp = instant_from_timestamp(1_700_000_000.0 + 60.0 * 6.0);
+        let duration = Duration::from_secs(60);
+        for (i, symbol) in ["foo", "bar", "baz"].iter().enumerate() {
+            let price = 90.0 + i as f64;
+            let bar =
+                PriceAggregate::new(timestamp, duration, true, price, price, price, price, 500.0);
+            graph.update_equity(symbol.to_string(), bar);
+            restored.update_equity(symbol.to_string(), bar);
+        }
+        let stale = instant_from_timestamp(1_700_000_000.0);
+        let bar = PriceAggregate::new(stale, duration, true, 1.0, 1.0, 1.0, 1.0, 1.0);
+        restored.update_equity("foo".to_owned(), bar);
+
+        let edge = |graph: &HeteroGraph| {
+            graph
+                .get_edge_by_names("foo".to_owned(), "baz".to_owned())
+                .and_then(|edge| edge.feature())
+        };
+        assert_eq!(edge(&restored), edge(&graph));
+        let (x, _, _) = restored.snapshot().to_blocks();
+        assert_eq!(x["Equity"].shape, (3, 30));
+    }
+
+    #[test]
+    fn test_save_load() {
+        let graph = warm_graph();
+        let path = std::env::temp_dir().join(format!("moonrs-{}.graph", std::process::id()));
+        graph.save(&path).unwrap();
+        let restored = HeteroGraph::load(&path).unwrap();
+        assert_eq!(restored.to_bytes(), graph.to_bytes());
+        fs::remove_file(&path).unwrap();
+
+        let bytes = graph.to_bytes();
+        assert!(HeteroGraph::from_bytes(&bytes[..bytes.len() - 1]).is_err());
+        assert!(HeteroGraph::from_bytes(b"MOONGRPX").is_err());
+        let mut trailing = bytes.clone();
+        trailing.push(0);
+        assert!(HeteroGraph::from_bytes(&trailing).is_err());
+    }
+}
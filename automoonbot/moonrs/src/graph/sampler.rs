@@ -0,0 +1,246 @@
+use crate::graph::*;
+
+/// SplitMix64, enough to pick neighbours reproducibly without pulling in
+/// a random number crate.
+#[derive(Debug, Clone)]
+struct SplitMix64 {
+    state: u64,
+}
+
+impl SplitMix64 {
+    fn new(seed: u64) -> Self {
+        SplitMix64 { state: seed }
+    }
+
+    fn next_u64(&mut self) -> u64 {
+        self.state = self.state.wrapping_add(0x9E3779B97F4A7C15);
+        let mut z = self.state;
+        z = (z ^ (z >> 30)).wrapping_mul(0xBF58476D1CE4E5B9);
+        z = (z ^ (z >> 27)).wrapping_mul(0x94D049BB133111EB);
+        z ^ (z >> 31)
+    }
+
+    /// Uniform in `0..n`, `n` must not be zero.
+    fn below(&mut self, n: usize) -> usize {
+        ((self.next_u64() as u128 * n as u128) >> 64) as usize
+    }
+}
+
+/// Subgraph around a batch of seed nodes, in the layout of `to_blocks`.
+/// Within each class the seeds come first, in the order they were given.
+#[derive(Debug, Clone, Default)]
+pub struct Sample {
+    pub x: HashMap<String, Block<f64>>,
+    pub edge_index: HashMap<EdgeKey, Block<i64>>,
+    pub edge_attr: HashMap<EdgeKey, Block<f64>>,
+    /// Names of the nodes behind the rows of `x`, by class.
+    pub names: HashMap<String, Vec<String>>,
+    /// Number of seed rows at the top of each class.
+    pub seeds: HashMap<String, usize>,
+}
+
+impl HeteroGraph {
+    /// Samples up to `fanouts[k]` incoming edges of every node reached after
+    /// `k` hops from `seeds`, the direction in which messages flow towards
+    /// the seeds, `usize::MAX` keeps every edge. Only the sampled edges are
+    /// exported, so the batch stays bounded by the seeds and the fanouts
+    /// whatever the size of the graph. The same `seed` gives the same
+    /// sample on the same graph.
+    pub fn sample(&self, seeds: &[NodeIndex], fanouts: &[usize], seed: u64) -> Sample {
+        let mut rng = SplitMix64::new(seed);
+        let mut visited: HashSet<NodeIndex> = HashSet::new();
+        let mut nodes: IndexMap<&str, Vec<NodeIndex>> = IndexMap::new();
+        let mut edges: IndexMap<&str, Vec<EdgeIndex>> = IndexMap::new();
+        let mut counts: HashMap<String, usize> = HashMap::new();
+
+        let mut frontier: Vec<NodeIndex> = Vec::with_capacity(seeds.len());
+        for &index in seeds.iter() {
+            if let Some(node) = self.get_node(index) {
+                if visited.insert(index) {
+                    nodes.entry(node.cls()).or_default().push(index);
+                    *counts.entry(node.cls().to_owned()).or_default() += 1;
+                    frontier.push(index);
+                }
+            }
+        }
+
+        let mut incoming: Vec<EdgeIndex> = Vec::new();
+        for &fanout in fanouts.iter() {
+            let mut next: Vec<NodeIndex> = Vec::new();
+            for &index in frontier.iter() {
+                incoming.clear();
+                incoming.extend(
+                    self.graph
+                        .edges_directed(index, Direction::Incoming)
+                        .map(|edge| edge.id()),
+                );
+                let take = fanout.min(incoming.len());
+                for i in 0..take {
+                    let j = i + rng.below(incoming.len() - i);
+                    incoming.swap(i, j);
+                }
+                for &edge in incoming[..take].iter() {
+                    let (src, weight) = match (
+                        self.graph.edge_endpoints(edge),
+                        self.graph.edge_weight(edge),
+                    ) {
+                        (Some((src, _)), Some(weight)) => (src, weight),
+                        _ => continue,
+                    };
+                    edges.entry(weight.cls()).or_default().push(edge);
+                    if visited.insert(src) {
+                        if let Some(node) = self.get_node(src) {
+                            nodes.entry(node.cls()).or_default().push(src);
+                            next.push(src);
+                        }
+                    }
+                }
+            }
+            frontier = next;
+        }
+
+        let (x, edge_index, edge_attr) = self.build_blocks(
+            nodes
+                .iter()
+                .map(|(cls, indices)| (*cls, indices.iter().copied())),
+            edges
+                .iter()
+                .map(|(cls, indices)| (*cls, indices.iter().copied())),
+        );
+        let names = nodes
+            .iter()
+            .filter(|(cls, _)| x.contains_key(**cls))
+            .map(|(cls, indices)| {
+                let names = indices
+                    .iter()
+                    .filter_map(|&index| self.get_node(index).map(|node| node.name().clone()))
+                    .collect();
+                (cls.to_string(), names)
+            })
+            .collect();
+        counts.retain(|cls, _| x.contains_key(cls));
+        Sample {
+            x,
+            edge_index,
+            edge_attr,
+            names,
+            seeds: counts,
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn universe(size: usize) -> HeteroGraph {
+        let mut graph = HeteroGraph::new();
+        graph.set_workers(1);
+        let symbols: Vec<String> = (0..size).map(|i| format!("s{}", i)).collect();
+        graph.add_equities(symbols.clone(), vec![None; size], 8);
+        let duration = Duration::from_secs(60);
+        let mut items: Vec<(String, PriceAggregate)> = Vec::new();
+        for t in 0..4 {
+            let timestamp = instant_from_timestamp(1_700_000_000.0 + 60.0 * t as f64);
+            for (i, symbol) in symbols.iter().enumerate() {
+                let price = 100.0 + ((t * (i + 1)) % 7) as f64;
+                items.push((
+                    symbol.clone(),
+                    PriceAggregate::new(
+                        timestamp,
+                        duration,
+                        true,
+                        price,
+                        price + 1.0,
+                        price - 1.0,
+                        price,
+                        1000.0,
+                    ),
+                ));
+            }
+        }
+        graph.update_equities(items);
+        graph.add_article(
+            "news".to_owned(),
+            "summary".to_owned(),
+            0.5,
+            "wire".to_owned(),
+            4,
+            Some(HashMap::from([("s0".to_owned(), 0.5)])),
+            instant_from_timestamp(1_700_000_000.0),
+        );
+        graph
+    }
+
+    #[test]
+    fn test_sample() {
+        let graph = universe(12);
+        let seeds: Vec<NodeIndex> = ["s0", "s1"]
+            .iter()
+            .map(|name| *graph.get_node_index(name.to_string()).unwrap())
+            .collect();
+        let sample = graph.sample(&seeds, &[3, 2], 7);
+
+        assert_eq!(sample.seeds["Equity"], 2);
+        let names = &sample.names["Equity"];
+        assert_eq!(names[..2], ["s0".to_owned(), "s1".to_owned()]);
+        assert!(names.len() <= 2 + 2 * 3 + 2 * 3 * 2);
+        assert_eq!(sample.x["Equity"].shape.0, names.len());
+
+        let relation = (
+            "Equity".to_owned(),
+            "Influences".to_owned(),
+            "Equity".to_owned(),
+        );
+        let block = &sample.edge_index[&relation];
+        let sampled = block.shape.1;
+        assert!(sampled <= 2 * 3 + 6 * 2);
+        assert!(block.data.iter().all(|&row| (row as usize) < names.len()));
+        assert_eq!(sample.edge_attr[&relation].shape.0, sampled);
+        for i in 0..sampled {
+            let (src, tgt) = (block.data[i] as usize, block.data[sampled + i] as usize);
+            let feature = graph
+                .get_edge_by_names(names[src].clone(), names[tgt].clone())
+                .and_then(|edge| edge.feature())
+                .unwrap();
+            let cols = sample.edge_attr[&relation].shape.1;
+            assert_eq!(
+                sample.edge_attr[&relation].data[i * cols..(i + 1) * cols],
+                feature.as_slice()[..]
+            );
+        }
+
+        let again = graph.sample(&seeds, &[3, 2], 7);
+        assert_eq!(again.names, sample.names);
+        assert_eq!(again.edge_index, sample.edge_index);
+    }
+
+    #[test]
+    fn test_sample_all() {
+        let graph = universe(5);
+        let seed = *graph.get_node_index("s0".to_owned()).unwrap();
+        let sample = graph.sample(&[seed], &[usize::MAX], 0);
+        assert_eq!(sample.names["Equity"].len(), 5);
+        assert_eq!(sample.names["Article"], vec!["news".to_owned()]);
+        assert_eq!(sample.seeds.get("Article"), None);
+        let relation = (
+            "Equity".to_owned(),
+            "Influences".to_owned(),
+            "Equity".to_owned(),
+        );
+        assert_eq!(sample.edge_index[&relation].shape, (2, 4));
+        assert!(sample.edge_index[&relation].data[4..]
+            .iter()
+            .all(|&row| row == 0));
+        let relation = (
+            "Article".to_owned(),
+            "Referenced".to_owned(),
+            "Equity".to_owned(),
+        );
+        assert_eq!(sample.edge_index[&relation].data, vec![0, 0]);
+
+        let sample = graph.sample(&[seed], &[], 0);
+        assert_eq!(sample.names["Equity"], vec!["s0".to_owned()]);
+        assert!(sample.edge_index.is_empty());
+    }
+}
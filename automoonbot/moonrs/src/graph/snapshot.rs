@@ -0,0 +1,447 @@
+use crate::graph::*;
+
+/// Feature rows of one node or edge class, stored row-major so that a single
+/// row can be patched in place. Removed rows are filled by the last row.
+#[derive(Debug, Clone)]
+pub struct ClassRows<K> {
+    cols: usize,
+    data: Vec<f64>,
+    keys: Vec<K>,
+    rows: HashMap<K, usize>,
+}
+
+impl<K> Default for ClassRows<K> {
+    fn default() -> Self {
+        Self {
+            cols: 0,
+            data: Vec::new(),
+            keys: Vec::new(),
+            rows: HashMap::new(),
+        }
+    }
+}
+
+impl<K> ClassRows<K>
+where
+    K: Copy + Hash + Eq,
+{
+    pub fn len(&self) -> usize {
+        self.keys.len()
+    }
+
+    pub fn cols(&self) -> usize {
+        self.cols
+    }
+
+    pub fn row(&self, key: &K) -> Option<usize> {
+        self.rows.get(key).copied()
+    }
+
+    /// Returns the row of `key`, appending a zero row if it has none.
+    pub fn upsert(&mut self, key: K) -> usize {
+        if let Some(&row) = self.rows.get(&key) {
+            return row;
+        }
+        let row = self.keys.len();
+        self.keys.push(key);
+        self.rows.insert(key, row);
+        self.data.resize(self.keys.len() * self.cols, 0.0);
+        row
+    }
+
+    /// Overwrites a row, the first feature seen fixes the column count.
+    /// Missing features are written as zeros.
+    pub fn write(&mut self, row: usize, feature: Option<na::RowDVector<f64>>) {
+        if self.cols == 0 {
+            match &feature {
+                Some(feature) if !feature.is_empty() => {
+                    self.cols = feature.len();
+                    self.data = vec![0.0; self.keys.len() * self.cols];
+                }
+                _ => return,
+            }
+        }
+        let cols = self.cols;
+        let dst = &mut self.data[row * cols..(row + 1) * cols];
+        dst.fill(0.0);
+        if let Some(feature) = feature {
+            for (dst, src) in dst.iter_mut().zip(feature.iter()) {
+                *dst = *src;
+            }
+        }
+    }
+
+    /// Removes the row of `key` by moving the last row into its place.
+    /// Returns the removed row and the key that now occupies it, if any.
+    pub fn swap_remove(&mut self, key: &K) -> Option<(usize, Option<K>)> {
+        let row = self.rows.remove(key)?;
+        let last = self.keys.len() - 1;
+        self.keys.swap_remove(row);
+        if row != last {
+            let cols = self.cols;
+            self.data
+                .copy_within(last * cols..(last + 1) * cols, row * cols);
+            let moved = self.keys[row];
+            self.rows.insert(moved, row);
+            self.data.truncate(last * cols);
+            return Some((row, Some(moved)));
+        }
+        self.data.truncate(last * self.cols);
+        Some((row, None))
+    }
+
+    pub fn to_block(&self) -> Block<f64> {
+        Block {
+            shape: (self.keys.len(), self.cols),
+            data: self.data.clone(),
+        }
+    }
+}
+
+/// Rows of one edge class, the source and target node rows are kept aligned
+/// with the feature rows.
+#[derive(Debug, Clone, Default)]
+pub struct EdgeRows {
+    relation: Option<EdgeKey>,
+    attr: ClassRows<EdgeIndex>,
+    src: Vec<i64>,
+    tgt: Vec<i64>,
+}
+
+impl EdgeRows {
+    fn upsert(&mut self, key: EdgeIndex) -> usize {
+        let row = self.attr.upsert(key);
+        if row == self.src.len() {
+            self.src.push(-1);
+            self.tgt.push(-1);
+        }
+        row
+    }
+
+    fn swap_remove(&mut self, key: &EdgeIndex) {
+        if let Some((row, _)) = self.attr.swap_remove(key) {
+            self.src.swap_remove(row);
+            self.tgt.swap_remove(row);
+        }
+    }
+}
+
+/// Persistent `to_pyg` buffers of a graph. Nodes and edges that changed since
+/// the last refresh are tracked and only their rows are rewritten, so the
+/// cost of a refresh depends on the number of changes rather than on the
+/// size of the graph.
+#[derive(Debug, Clone, Default)]
+pub struct Snapshot {
+    nodes: HashMap<String, ClassRows<NodeIndex>>,
+    edges: HashMap<String, EdgeRows>,
+    dirty_nodes: HashSet<NodeIndex>,
+    dirty_edges: HashSet<EdgeIndex>,
+    removed_nodes: Vec<(NodeIndex, String)>,
+    removed_edges: Vec<(EdgeIndex, String)>,
+}
+
+impl Snapshot {
+    pub fn new(graph: &StableDiGraph<NodeType, EdgeType>) -> Self {
+        Self {
+            dirty_nodes: graph.node_indices().collect(),
+            dirty_edges: graph.edge_indices().collect(),
+            ..Default::default()
+        }
+    }
+
+    pub fn mark_node(&mut self, index: NodeIndex) {
+        self.dirty_nodes.insert(index);
+    }
+
+    pub fn mark_edge(&mut self, index: EdgeIndex) {
+        self.dirty_edges.insert(index);
+    }
+
+    pub fn drop_node(&mut self, index: NodeIndex, cls: &str) {
+        self.dirty_nodes.remove(&index);
+        self.removed_nodes.push((index, cls.to_owned()));
+    }
+
+    pub fn drop_edge(&mut self, index: EdgeIndex, cls: &str) {
+        self.dirty_edges.remove(&index);
+        self.removed_edges.push((index, cls.to_owned()));
+    }
+
+    pub fn is_clean(&self) -> bool {
+        self.dirty_nodes.is_empty()
+            && self.dirty_edges.is_empty()
+            && self.removed_nodes.is_empty()
+            && self.removed_edges.is_empty()
+    }
+
+    /// Applies all pending changes of `graph` to the buffers.
+    pub fn refresh(
+        &mut self,
+        graph: &StableDiGraph<NodeType, EdgeType>,
+        stat_features: Option<(usize, usize)>,
+    ) {
+        if self.is_clean() {
+            return;
+        }
+
+        for (index, cls) in std::mem::take(&mut self.removed_edges) {
+            if let Some(rows) = self.edges.get_mut(&cls) {
+                rows.swap_remove(&index);
+            }
+        }
+
+        let mut moved: HashSet<NodeIndex> = HashSet::new();
+        for (index, cls) in std::mem::take(&mut self.removed_nodes) {
+            if let Some(rows) = self.nodes.get_mut(&cls) {
+                if let Some((_, Some(key))) = rows.swap_remove(&index) {
+                    moved.insert(key);
+                }
+            }
+        }
+
+        for index in std::mem::take(&mut self.dirty_nodes) {
+            if let Some(node) = graph.node_weight(index) {
+                let rows = self.nodes.entry(node.cls().to_owned()).or_default();
+                let row = rows.upsert(index);
+                rows.write(row, node_feature(node, stat_features));
+            }
+        }
+
+        let mut relink: HashSet<EdgeIndex> = HashSet::new();
+        for node in moved {
+            if graph.contains_node(node) {
+                relink.extend(
+                    graph
+                        .edges_directed(node, Direction::Outgoing)
+                        .chain(graph.edges_directed(node, Direction::Incoming))
+                        .map(|edge| edge.id()),
+                );
+            }
+        }
+
+        for index in std::mem::take(&mut self.dirty_edges) {
+            if let Some(edge) = graph.edge_weight(index) {
+                let rows = self.edges.entry(edge.cls().to_owned()).or_default();
+                let row = rows.upsert(index);
+                rows.attr.write(row, edge.feature());
+                relink.insert(index);
+            }
+        }
+
+        let nodes = &self.nodes;
+        for index in relink {
+            let (edge, (src, tgt)) = match (graph.edge_weight(index), graph.edge_endpoints(index)) {
+                (Some(edge), Some(endpoints)) => (edge, endpoints),
+                _ => continue,
+            };
+            let (src_node, tgt_node) = match (graph.node_weight(src), graph.node_weight(tgt)) {
+                (Some(src_node), Some(tgt_node)) => (src_node, tgt_node),
+                _ => continue,
+            };
+            let src_row = nodes.get(src_node.cls()).and_then(|rows| rows.row(&src));
+            let tgt_row = nodes.get(tgt_node.cls()).and_then(|rows| rows.row(&tgt));
+            if let Some(rows) = self.edges.get_mut(edge.cls()) {
+                if let Some(row) = rows.attr.row(&index) {
+                    rows.relation.get_or_insert_with(|| {
+                        (
+                            src_node.cls().to_owned(),
+                            edge.cls().to_owned(),
+                            tgt_node.cls().to_owned(),
+                        )
+                    });
+                    rows.src[row] = src_row.map_or(-1, |row| row as i64);
+                    rows.tgt[row] = tgt_row.map_or(-1, |row| row as i64);
+                }
+            }
+        }
+    }
+
+    /// Same layout as `HeteroGraph::to_blocks`, built from the buffers.
+    pub fn to_blocks(
+        &self,
+    ) -> (
+        HashMap<String, Block<f64>>,
+        HashMap<EdgeKey, Block<i64>>,
+        HashMap<EdgeKey, Block<f64>>,
+    ) {
+        let x: HashMap<String, Block<f64>> = self
+            .nodes
+            .iter()
+            .filter(|(_, rows)| rows.len() > 0 && rows.cols() > 0)
+            .map(|(cls, rows)| (cls.clone(), rows.to_block()))
+            .collect();
+
+        let mut edge_index: HashMap<EdgeKey, Block<i64>> = HashMap::new();
+        let mut edge_attr: HashMap<EdgeKey, Block<f64>> = HashMap::new();
+        for rows in self.edges.values() {
+            let relation = match &rows.relation {
+                Some(relation) if rows.attr.len() > 0 => relation,
+                _ => continue,
+            };
+            if !x.contains_key(&relation.0) || !x.contains_key(&relation.2) {
+                continue;
+            }
+            let mut data = Vec::with_capacity(2 * rows.src.len());
+            data.extend_from_slice(&rows.src);
+            data.extend_from_slice(&rows.tgt);
+            edge_index.insert(
+                relation.clone(),
+                Block {
+                    shape: (2, rows.src.len()),
+                    data,
+                },
+            );
+            if rows.attr.cols() > 0 {
+                edge_attr.insert(relation.clone(), rows.attr.to_block());
+            }
+        }
+
+        (x, edge_index, edge_attr)
+    }
+}
+
+impl HeteroGraph {
+    /// Starts tracking changes for incremental `to_pyg` exports, the next
+    /// call to `snapshot` builds the buffers from scratch.
+    pub fn enable_snapshot(&mut self) {
+        if self.snapshot.is_none() {
+            self.snapshot = Some(Snapshot::new(&self.graph));
+        }
+    }
+
+    pub fn disable_snapshot(&mut self) {
+        self.snapshot = None;
+    }
+
+    pub fn snapshot_enabled(&self) -> bool {
+        self.snapshot.is_some()
+    }
+
+    /// Brings the snapshot up to date and returns it, enabling it if needed.
+    pub fn snapshot(&mut self) -> &Snapshot {
+        let mut snapshot = match self.snapshot.take() {
+            Some(snapshot) => snapshot,
+            None => Snapshot::new(&self.graph),
+        };
+        snapshot.refresh(&self.graph, self.stat_features);
+        self.snapshot.insert(snapshot)
+    }
+
+    pub(super) fn mark_node(&mut self, index: NodeIndex) {
+        if let Some(snapshot) = self.snapshot.as_mut() {
+            snapshot.mark_node(index);
+        }
+    }
+
+    pub(super) fn mark_edge(&mut self, index: EdgeIndex) {
+        if let Some(snapshot) = self.snapshot.as_mut() {
+            snapshot.mark_edge(index);
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn canonical(
+        blocks: (
+            HashMap<String, Block<f64>>,
+            HashMap<EdgeKey, Block<i64>>,
+            HashMap<EdgeKey, Block<f64>>,
+        ),
+    ) -> (Vec<Vec<String>>, Vec<Vec<String>>) {
+        let (x, edge_index, _) = blocks;
+        let row = |cls: &String, i: i64| -> String {
+            let block = &x[cls];
+            let cols = block.shape.1;
+            let i = i as usize;
+            format!("{}{:?}", cls, &block.data[i * cols..(i + 1) * cols])
+        };
+        let mut nodes: Vec<Vec<String>> = x
+            .iter()
+            .map(|(cls, block)| {
+                let mut rows: Vec<String> =
+                    (0..block.shape.0).map(|i| row(cls, i as i64)).collect();
+                rows.sort();
+                rows
+            })
+            .collect();
+        nodes.sort();
+        let mut edges: Vec<Vec<String>> = edge_index
+            .iter()
+            .map(|((src, _, tgt), block)| {
+                let n = block.shape.1;
+                let mut pairs: Vec<String> = (0..n)
+                    .map(|i| {
+                        format!(
+                            "{}->{}",
+                            row(src, block.data[i]),
+                            row(tgt, block.data[n + i])
+                        )
+                    })
+                    .collect();
+                pairs.sort();
+                pairs
+            })
+            .collect();
+        edges.sort();
+        (nodes, edges)
+    }
+
+    fn bar(value: f64) -> PriceAggregate {
+        PriceAggregate::new(
+            Instant::now(),
+            Duration::from_secs(60),
+            true,
+            value,
+            value,
+            value,
+            value,
+            value,
+        )
+    }
+
+    #[test]
+    fn test_snapshot_matches_full_export() {
+        let mut graph = HeteroGraph::new();
+        graph.enable_snapshot();
+        for (i, symbol) in ["foo", "bar", "baz"].iter().enumerate() {
+            graph.add_equity(symbol.to_string(), None, 10);
+            graph.update_equity(symbol.to_string(), bar(i as f64 + 1.0));
+        }
+        graph.add_currency("USD".to_owned(), 10);
+        graph.update_currency("USD".to_owned(), bar(9.0));
+        assert_eq!(
+            canonical(graph.snapshot().to_blocks()),
+            canonical(graph.to_blocks())
+        );
+        assert!(graph.snapshot.as_ref().is_some_and(|s| s.is_clean()));
+
+        graph.remove_node_by_name("foo".to_owned());
+        graph.add_equity("qux".to_owned(), None, 10);
+        graph.update_equity("qux".to_owned(), bar(4.0));
+        assert_eq!(
+            canonical(graph.snapshot().to_blocks()),
+            canonical(graph.to_blocks())
+        );
+
+        graph.remove_node_by_name("USD".to_owned());
+        let (x, _, _) = graph.snapshot().to_blocks();
+        assert!(x.get("Currency").is_none());
+    }
+
+    #[test]
+    fn test_class_rows_swap_remove() {
+        let mut rows: ClassRows<usize> = ClassRows::default();
+        for key in 0..3 {
+            let row = rows.upsert(key);
+            rows.write(row, Some(na::RowDVector::from_vec(vec![key as f64; 2])));
+        }
+        assert_eq!(rows.swap_remove(&0), Some((0, Some(2))));
+        assert_eq!(rows.row(&2), Some(0));
+        assert_eq!(rows.to_block().data, vec![2.0, 2.0, 1.0, 1.0]);
+        assert_eq!(rows.swap_remove(&1), Some((1, None)));
+        assert_eq!(rows.len(), 1);
+    }
+}
@@ -1,11 +1,11 @@
 #[cfg(feature = "python")]
 use {
+    numpy::{IntoPyArray, PyArrayMethods, PyReadonlyArray1},
     pyo3::{
-        exceptions::PyTypeError,
+        exceptions::{PyTypeError, PyValueError},
         prelude::*,
         types::{IntoPyDict, PyAny, PyDict, PyList},
     },
-    std::time::{SystemTime, UNIX_EPOCH},
 };
 
 #[macro_use]
@@ -18,12 +18,16 @@ pub mod graph;
 pub mod nodes;
 pub mod utils;
 
-use petgraph::stable_graph::{EdgeIndex, NodeIndex, StableDiGraph};
+use petgraph::{
+    stable_graph::{EdgeIndex, NodeIndex, StableDiGraph},
+    visit::EdgeRef,
+    Direction,
+};
 use std::{
     any::Any,
-    collections::{HashMap, HashSet},
+    collections::{BTreeSet, HashMap, HashSet},
     hash::Hash,
-    time::{Duration, Instant},
+    time::{Duration, Instant, SystemTime, UNIX_EPOCH},
 };
 
 #[cfg(feature = "python")]
@@ -36,6 +40,28 @@ mod moonrs {
         "Hello From Rust"
     }
 
+    /// Seconds spent pushing rows into a `TimeSeries` and querying it with
+    /// `view_between`, see `utils::bench::time_series`.
+    #[pyfunction]
+    fn bench_time_series(
+        py: Python,
+        capacity: usize,
+        cols: usize,
+        pushes: usize,
+        queries: usize,
+        span: usize,
+    ) -> (f64, f64) {
+        py.allow_threads(|| {
+            super::utils::bench::time_series(capacity, cols, pushes, queries, span)
+        })
+    }
+
+    /// Seconds spent on `repeat` calls of `compute_correlation`.
+    #[pyfunction]
+    fn bench_correlation(py: Python, rows: usize, cols: usize, repeat: usize) -> f64 {
+        py.allow_threads(|| super::utils::bench::correlation(rows, cols, repeat))
+    }
+
     #[pymodule_export]
     use super::graph::hetero::HeteroGraph;
 }
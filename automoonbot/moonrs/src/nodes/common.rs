@@ -67,6 +67,7 @@ pub struct Article {
     pub(super) sentiment: f64,
     pub(super) publisher: String,
     pub(super) tickers: Option<HashMap<String, f64>>,
+    pub(super) published: Instant,
 }
 
 #[derive(Debug)]
@@ -116,6 +117,69 @@ pub struct Options {
     pub(super) history: TimeSeries<OptionsAggregate>,
 }
 
+impl NodeType {
+    /// Feature row of the bar stored at `index`, for nodes with a price
+    /// history.
+    pub fn row_at(&self, index: &Instant) -> Option<Vec<f64>> {
+        match self {
+            NodeType::Currency(node) => node.history.loc(index).map(|item| item.to_vec()),
+            NodeType::Equity(node) => node.history.loc(index).map(|item| item.to_vec()),
+            NodeType::Bonds(node) => node.history.loc(index).map(|item| item.to_vec()),
+            NodeType::Options(node) => node.history.loc(index).map(|item| item.to_vec()),
+            _ => None,
+        }
+    }
+
+    /// Keeps running sums for the statistics returned by `stats`, for nodes
+    /// with a price history.
+    pub fn track_stats(&mut self, period: usize, lag: usize) {
+        match self {
+            NodeType::Currency(node) => track_series(&mut node.history, period, lag),
+            NodeType::Equity(node) => track_series(&mut node.history, period, lag),
+            NodeType::Bonds(node) => track_series(&mut node.history, period, lag),
+            NodeType::Options(node) => track_series(&mut node.history, period, lag),
+            _ => {}
+        }
+    }
+
+    /// Rolling statistics of the price history, laid out as the z-score,
+    /// skew, kurtosis, momentum and autocorrelation blocks of every column.
+    pub fn stats(&self, period: usize, lag: usize) -> Option<Vec<f64>> {
+        match self {
+            NodeType::Currency(node) => series_stats(&node.history, period, lag),
+            NodeType::Equity(node) => series_stats(&node.history, period, lag),
+            NodeType::Bonds(node) => series_stats(&node.history, period, lag),
+            NodeType::Options(node) => series_stats(&node.history, period, lag),
+            _ => None,
+        }
+    }
+}
+
+fn track_series<T: Clone + Row>(history: &mut TimeSeries<T>, period: usize, lag: usize) {
+    history.track_period(period);
+    history.track_lag(lag);
+}
+
+fn series_stats<T: Clone + Row>(
+    history: &TimeSeries<T>,
+    period: usize,
+    lag: usize,
+) -> Option<Vec<f64>> {
+    let cols = history.last()?.to_row().len();
+    let blocks = [
+        history.zscore(period),
+        history.skew(period),
+        history.kurtosis(period),
+        history.momentum(period),
+        history.autocorrelation(lag),
+    ];
+    let mut values = Vec::with_capacity(blocks.len() * cols);
+    for block in blocks.iter() {
+        values.extend(block.iter().copied().chain(std::iter::repeat(0.0)).take(cols));
+    }
+    Some(values)
+}
+
 impl Article {
     pub fn new(
         title: String,
@@ -123,6 +187,7 @@ impl Article {
         sentiment: f64,
         publisher: String,
         tickers: Option<HashMap<String, f64>>,
+        published: Instant,
     ) -> Self {
         Article {
             title,
@@ -130,9 +195,14 @@ impl Article {
             sentiment,
             publisher,
             tickers,
+            published,
         }
     }
 
+    pub fn published(&self) -> Instant {
+        self.published
+    }
+
     pub fn publisher(&self) -> &String {
         &self.publisher
     }
@@ -145,6 +215,10 @@ impl Article {
         self.sentiment
     }
 
+    pub fn tickers(&self) -> Option<&HashMap<String, f64>> {
+        self.tickers.as_ref()
+    }
+
     pub fn ticker_sentiment(&self, symbol: String) -> Option<f64> {
         if let Some(tickers) = &self.tickers {
             tickers.get(&symbol).copied()
@@ -204,6 +278,10 @@ impl Equity {
         self.company.clone()
     }
 
+    pub fn history(&self) -> &TimeSeries<PriceAggregate> {
+        &self.history
+    }
+
     pub fn mat(&self) -> Option<na::DMatrix<f64>> {
         self.history.mat()
     }
@@ -267,6 +345,10 @@ impl Options {
         &self.expiration
     }
 
+    pub fn history(&self) -> &TimeSeries<OptionsAggregate> {
+        &self.history
+    }
+
     pub fn mat(&self) -> Option<na::DMatrix<f64>> {
         self.history.mat()
     }
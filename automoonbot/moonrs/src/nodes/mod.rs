@@ -1,5 +1,6 @@
 mod common;
 mod dynamic;
+mod records;
 mod statics;
 mod tests;
 
@@ -0,0 +1,156 @@
+use crate::nodes::*;
+use crate::utils::codec::*;
+use std::io;
+
+/// A variant tag followed by the fields of the node, time series included.
+impl Record for NodeType {
+    fn encode(&self, out: &mut Encoder) {
+        match self {
+            NodeType::TestNode(node) => {
+                out.u8(0);
+                out.str(&node.name);
+                out.f64(node.value);
+                out.record(&node.buffer);
+            }
+            NodeType::Article(node) => {
+                out.u8(1);
+                out.str(&node.title);
+                out.str(&node.summary);
+                out.f64(node.sentiment);
+                out.str(&node.publisher);
+                out.bool(node.tickers.is_some());
+                if let Some(tickers) = &node.tickers {
+                    let mut tickers: Vec<(&String, &f64)> = tickers.iter().collect();
+                    tickers.sort_by(|a, b| a.0.cmp(b.0));
+                    out.usize(tickers.len());
+                    for (ticker, sentiment) in tickers {
+                        out.str(ticker);
+                        out.f64(*sentiment);
+                    }
+                }
+                out.instant(&node.published);
+            }
+            NodeType::Publisher(node) => {
+                out.u8(2);
+                out.str(&node.name);
+                out.record(&node.sentiments);
+            }
+            NodeType::Company(node) => {
+                out.u8(3);
+                out.str(&node.name);
+                let mut symbols: Vec<&String> = node.symbols.iter().collect();
+                symbols.sort();
+                out.usize(symbols.len());
+                for symbol in symbols {
+                    out.str(symbol);
+                }
+                out.record(&node.income_statement);
+                out.record(&node.balance_sheet);
+                out.record(&node.cash_flow);
+                out.record(&node.earnings);
+            }
+            NodeType::Currency(node) => {
+                out.u8(4);
+                out.str(&node.symbol);
+                out.record(&node.history);
+            }
+            NodeType::Equity(node) => {
+                out.u8(5);
+                out.str(&node.symbol);
+                out.bool(node.company.is_some());
+                if let Some(company) = &node.company {
+                    out.str(company);
+                }
+                out.record(&node.history);
+            }
+            NodeType::Bonds(node) => {
+                out.u8(6);
+                out.str(&node.symbol);
+                out.f64(node.interest_rate);
+                out.instant(&node.maturity);
+                out.record(&node.history);
+            }
+            NodeType::Options(node) => {
+                out.u8(7);
+                out.str(&node.contract_id);
+                out.str(&node.direction);
+                out.str(&node.underlying);
+                out.f64(node.strike);
+                out.instant(&node.expiration);
+                out.record(&node.history);
+            }
+        }
+    }
+
+    fn decode(input: &mut Decoder) -> io::Result<Self> {
+        let node = match input.u8()? {
+            0 => NodeType::TestNode(TestNode {
+                name: input.string()?,
+                value: input.f64()?,
+                buffer: input.record()?,
+            }),
+            1 => NodeType::Article(Article {
+                title: input.string()?,
+                summary: input.string()?,
+                sentiment: input.f64()?,
+                publisher: input.string()?,
+                tickers: if input.bool()? {
+                    let len = input.len(16)?;
+                    let tickers = (0..len)
+                        .map(|_| Ok((input.string()?, input.f64()?)))
+                        .collect::<io::Result<HashMap<String, f64>>>()?;
+                    Some(tickers)
+                } else {
+                    None
+                },
+                published: input.instant()?,
+            }),
+            2 => NodeType::Publisher(Publisher {
+                name: input.string()?,
+                sentiments: input.record()?,
+            }),
+            3 => NodeType::Company(Company {
+                name: input.string()?,
+                symbols: {
+                    let len = input.len(8)?;
+                    (0..len)
+                        .map(|_| input.string())
+                        .collect::<io::Result<HashSet<String>>>()?
+                },
+                income_statement: input.record()?,
+                balance_sheet: input.record()?,
+                cash_flow: input.record()?,
+                earnings: input.record()?,
+            }),
+            4 => NodeType::Currency(Currency {
+                symbol: input.string()?,
+                history: input.record()?,
+            }),
+            5 => NodeType::Equity(Equity {
+                symbol: input.string()?,
+                company: if input.bool()? {
+                    Some(input.string()?)
+                } else {
+                    None
+                },
+                history: input.record()?,
+            }),
+            6 => NodeType::Bonds(Bonds {
+                symbol: input.string()?,
+                interest_rate: input.f64()?,
+                maturity: input.instant()?,
+                history: input.record()?,
+            }),
+            7 => NodeType::Options(Options {
+                contract_id: input.string()?,
+                direction: input.string()?,
+                underlying: input.string()?,
+                strike: input.f64()?,
+                expiration: input.instant()?,
+                history: input.record()?,
+            }),
+            _ => return Err(invalid("unknown node type")),
+        };
+        Ok(node)
+    }
+}
@@ -168,7 +168,7 @@ impl StaticNode for Currency {
     }
 
     fn feature(&self) -> Option<na::RowDVector<f64>> {
-        Some(self.mat()?.row(0).into_owned())
+        self.history.row(0)
     }
 
     fn dim(&self) -> usize {
@@ -190,7 +190,7 @@ impl StaticNode for Equity {
     }
 
     fn feature(&self) -> Option<na::RowDVector<f64>> {
-        Some(self.mat()?.row(0).into_owned())
+        self.history.row(0)
     }
 
     fn dim(&self) -> usize {
@@ -212,7 +212,7 @@ impl StaticNode for Bonds {
     }
 
     fn feature(&self) -> Option<na::RowDVector<f64>> {
-        Some(self.mat()?.row(0).into_owned())
+        self.history.row(0)
     }
 
     fn dim(&self) -> usize {
@@ -234,7 +234,7 @@ impl StaticNode for Options {
     }
 
     fn feature(&self) -> Option<na::RowDVector<f64>> {
-        Some(self.mat()?.row(0).into_owned())
+        self.history.row(0)
     }
 
     fn dim(&self) -> usize {
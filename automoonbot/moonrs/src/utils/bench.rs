@@ -0,0 +1,89 @@
+//! Timing loops over native primitives that Python cannot reach directly,
+//! exported for the benchmark suite. Inputs are synthetic and deterministic.
+
+use crate::data::*;
+use crate::utils::helpers::compute_correlation;
+use std::hint::black_box;
+use std::time::{Duration, Instant};
+
+/// Deterministic pseudo random values in `[0, 1)`.
+struct Lcg(u64);
+
+impl Lcg {
+    fn next(&mut self) -> f64 {
+        self.0 = self
+            .0
+            .wrapping_mul(6364136223846793005)
+            .wrapping_add(1442695040888963407);
+        (self.0 >> 11) as f64 / (1u64 << 53) as f64
+    }
+
+    fn row(&mut self, cols: usize) -> Vec<f64> {
+        (0..cols).map(|_| self.next()).collect()
+    }
+}
+
+/// Seconds spent pushing `pushes` rows of `cols` columns into a series
+/// of `capacity` rows, and answering `queries` `view_between` lookups of
+/// `span` rows on the filled series.
+pub fn time_series(
+    capacity: usize,
+    cols: usize,
+    pushes: usize,
+    queries: usize,
+    span: usize,
+) -> (f64, f64) {
+    let mut rng = Lcg(7);
+    let rows: Vec<Vec<f64>> = (0..pushes).map(|_| rng.row(cols)).collect();
+    let origin = Instant::now();
+    let stamps: Vec<Instant> = (0..pushes)
+        .map(|i| origin + Duration::from_secs(i as u64))
+        .collect();
+
+    let mut series = TimeSeries::<Vec<f64>>::new(capacity);
+    let start = Instant::now();
+    for (stamp, row) in stamps.iter().zip(rows) {
+        black_box(series.push(*stamp, row));
+    }
+    let push = start.elapsed().as_secs_f64();
+
+    let stored: Vec<Instant> = series.timestamps().copied().collect();
+    let span = span.clamp(1, stored.len().max(1));
+    let start = Instant::now();
+    for q in 0..queries {
+        if stored.len() <= span {
+            break;
+        }
+        let a = (rng.next() * (stored.len() - span) as f64) as usize;
+        let view = series.view_between(&stored[a], &stored[a + span]);
+        black_box(view.map(|view| view.shape()));
+        black_box(q);
+    }
+    let between = start.elapsed().as_secs_f64();
+    (push, between)
+}
+
+/// Seconds spent on `repeat` correlations between two `rows x cols` matrices.
+pub fn correlation(rows: usize, cols: usize, repeat: usize) -> f64 {
+    let mut rng = Lcg(11);
+    let src = na::DMatrix::from_fn(rows, cols, |_, _| rng.next());
+    let tgt = na::DMatrix::from_fn(rows, cols, |_, _| rng.next());
+    let inputs: Vec<_> = (0..repeat).map(|_| (src.clone(), tgt.clone())).collect();
+    let start = Instant::now();
+    for (src, tgt) in inputs {
+        black_box(compute_correlation(src, tgt));
+    }
+    start.elapsed().as_secs_f64()
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_bench() {
+        let (push, between) = time_series(64, 5, 256, 32, 8);
+        assert!(push > 0.0 && between > 0.0);
+        assert!(correlation(32, 5, 4) > 0.0);
+    }
+}
@@ -0,0 +1,266 @@
+use crate::utils::helpers::*;
+use crate::*;
+use std::io;
+
+/// Error for bytes that do not decode to what was expected.
+pub fn invalid(message: &str) -> io::Error {
+    io::Error::new(io::ErrorKind::InvalidData, message.to_owned())
+}
+
+/// Values that can be written to and read back from the binary format
+/// behind `HeteroGraph::save`.
+pub trait Record: Sized {
+    fn encode(&self, out: &mut Encoder);
+    fn decode(input: &mut Decoder) -> io::Result<Self>;
+}
+
+impl Record for f64 {
+    fn encode(&self, out: &mut Encoder) {
+        out.f64(*self);
+    }
+
+    fn decode(input: &mut Decoder) -> io::Result<Self> {
+        input.f64()
+    }
+}
+
+/// Appends little-endian values to a growing buffer. Instants are stored
+/// as nanoseconds since the unix epoch so that they survive a restart.
+#[derive(Debug, Default)]
+pub struct Encoder {
+    bytes: Vec<u8>,
+}
+
+impl Encoder {
+    pub fn new() -> Self {
+        Encoder::default()
+    }
+
+    pub fn into_bytes(self) -> Vec<u8> {
+        self.bytes
+    }
+
+    pub fn raw(&mut self, bytes: &[u8]) {
+        self.bytes.extend_from_slice(bytes);
+    }
+
+    pub fn u8(&mut self, value: u8) {
+        self.bytes.push(value);
+    }
+
+    pub fn bool(&mut self, value: bool) {
+        self.u8(value as u8);
+    }
+
+    pub fn u64(&mut self, value: u64) {
+        self.raw(&value.to_le_bytes());
+    }
+
+    pub fn usize(&mut self, value: usize) {
+        self.u64(value as u64);
+    }
+
+    pub fn i64(&mut self, value: i64) {
+        self.raw(&value.to_le_bytes());
+    }
+
+    pub fn f64(&mut self, value: f64) {
+        self.raw(&value.to_le_bytes());
+    }
+
+    pub fn str(&mut self, value: &str) {
+        self.usize(value.len());
+        self.raw(value.as_bytes());
+    }
+
+    pub fn f64s(&mut self, values: &[f64]) {
+        self.usize(values.len());
+        for value in values.iter() {
+            self.f64(*value);
+        }
+    }
+
+    pub fn instant(&mut self, value: &Instant) {
+        self.i64(nanos_from_instant(value));
+    }
+
+    pub fn duration(&mut self, value: &Duration) {
+        self.u64(value.as_nanos() as u64);
+    }
+
+    /// Writes a presence flag, then the shape and row-major values.
+    pub fn matrix(&mut self, value: Option<&na::DMatrix<f64>>) {
+        self.bool(value.is_some());
+        if let Some(matrix) = value {
+            let (rows, cols) = matrix.shape();
+            self.usize(rows);
+            self.usize(cols);
+            for i in 0..rows {
+                for j in 0..cols {
+                    self.f64(matrix[(i, j)]);
+                }
+            }
+        }
+    }
+
+    pub fn record<T: Record>(&mut self, value: &T) {
+        value.encode(self);
+    }
+}
+
+/// Reads the values written by an `Encoder` back out of a borrowed buffer.
+#[derive(Debug)]
+pub struct Decoder<'a> {
+    bytes: &'a [u8],
+    pos: usize,
+}
+
+impl<'a> Decoder<'a> {
+    pub fn new(bytes: &'a [u8]) -> Self {
+        Decoder { bytes, pos: 0 }
+    }
+
+    pub fn remaining(&self) -> usize {
+        self.bytes.len() - self.pos
+    }
+
+    pub fn raw(&mut self, len: usize) -> io::Result<&'a [u8]> {
+        if len > self.remaining() {
+            return Err(io::Error::new(
+                io::ErrorKind::UnexpectedEof,
+                "truncated graph file",
+            ));
+        }
+        let bytes = &self.bytes[self.pos..self.pos + len];
+        self.pos += len;
+        Ok(bytes)
+    }
+
+    fn array<const N: usize>(&mut self) -> io::Result<[u8; N]> {
+        let mut array = [0u8; N];
+        array.copy_from_slice(self.raw(N)?);
+        Ok(array)
+    }
+
+    pub fn u8(&mut self) -> io::Result<u8> {
+        Ok(self.raw(1)?[0])
+    }
+
+    pub fn bool(&mut self) -> io::Result<bool> {
+        match self.u8()? {
+            0 => Ok(false),
+            1 => Ok(true),
+            _ => Err(invalid("invalid flag")),
+        }
+    }
+
+    pub fn u64(&mut self) -> io::Result<u64> {
+        Ok(u64::from_le_bytes(self.array()?))
+    }
+
+    pub fn usize(&mut self) -> io::Result<usize> {
+        usize::try_from(self.u64()?).map_err(|_| invalid("length out of range"))
+    }
+
+    /// A length prefix, checked against the bytes left so that a corrupt
+    /// file cannot request a huge allocation.
+    pub fn len(&mut self, item_size: usize) -> io::Result<usize> {
+        let len = self.usize()?;
+        if len.saturating_mul(item_size.max(1)) > self.remaining() {
+            return Err(invalid("length past the end of the file"));
+        }
+        Ok(len)
+    }
+
+    pub fn i64(&mut self) -> io::Result<i64> {
+        Ok(i64::from_le_bytes(self.array()?))
+    }
+
+    pub fn f64(&mut self) -> io::Result<f64> {
+        Ok(f64::from_le_bytes(self.array()?))
+    }
+
+    pub fn string(&mut self) -> io::Result<String> {
+        let len = self.len(1)?;
+        let bytes = self.raw(len)?;
+        String::from_utf8(bytes.to_vec()).map_err(|_| invalid("invalid utf-8 string"))
+    }
+
+    pub fn f64s(&mut self) -> io::Result<Vec<f64>> {
+        let len = self.len(8)?;
+        (0..len).map(|_| self.f64()).collect()
+    }
+
+    pub fn instant(&mut self) -> io::Result<Instant> {
+        Ok(instant_from_nanos(self.i64()?))
+    }
+
+    pub fn duration(&mut self) -> io::Result<Duration> {
+        Ok(Duration::from_nanos(self.u64()?))
+    }
+
+    pub fn matrix(&mut self) -> io::Result<Option<na::DMatrix<f64>>> {
+        if !self.bool()? {
+            return Ok(None);
+        }
+        let (rows, cols) = (self.usize()?, self.usize()?);
+        let len = rows
+            .checked_mul(cols)
+            .filter(|len| len.saturating_mul(8) <= self.remaining())
+            .ok_or_else(|| invalid("matrix past the end of the file"))?;
+        let values = (0..len)
+            .map(|_| self.f64())
+            .collect::<io::Result<Vec<f64>>>()?;
+        Ok(Some(na::DMatrix::from_row_slice(rows, cols, &values)))
+    }
+
+    pub fn record<T: Record>(&mut self) -> io::Result<T> {
+        T::decode(self)
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_round_trip() {
+        let now = instant_from_timestamp(1_700_000_000.5);
+        let matrix = na::DMatrix::from_row_slice(2, 3, &[1.0, 2.0, 3.0, 4.0, 5.0, 6.0]);
+        let mut out = Encoder::new();
+        out.bool(true);
+        out.usize(42);
+        out.f64(-1.5);
+        out.str("foo");
+        out.f64s(&[0.5, f64::NAN]);
+        out.instant(&now);
+        out.duration(&Duration::from_secs(60));
+        out.matrix(Some(&matrix));
+        out.matrix(None);
+        let bytes = out.into_bytes();
+
+        let mut input = Decoder::new(&bytes);
+        assert!(input.bool().unwrap());
+        assert_eq!(input.usize().unwrap(), 42);
+        assert_eq!(input.f64().unwrap(), -1.5);
+        assert_eq!(input.string().unwrap(), "foo");
+        let values = input.f64s().unwrap();
+        assert_eq!(values[0], 0.5);
+        assert!(values[1].is_nan());
+        assert_eq!(input.instant().unwrap(), now);
+        assert_eq!(input.duration().unwrap(), Duration::from_secs(60));
+        assert_eq!(input.matrix().unwrap(), Some(matrix));
+        assert_eq!(input.matrix().unwrap(), None);
+        assert_eq!(input.remaining(), 0);
+        assert!(input.u8().is_err());
+    }
+
+    #[test]
+    fn test_corrupt_length() {
+        let mut out = Encoder::new();
+        out.usize(usize::MAX / 2);
+        let bytes = out.into_bytes();
+        assert!(Decoder::new(&bytes).string().is_err());
+        assert!(Decoder::new(&bytes).f64s().is_err());
+    }
+}
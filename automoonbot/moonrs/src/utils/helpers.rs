@@ -1,4 +1,6 @@
+use crate::utils::codec::*;
 use crate::*;
+use std::io;
 
 #[derive(Debug, Clone)]
 pub struct Rate {
@@ -12,54 +14,379 @@ pub enum Opt {
     Put,
 }
 
+/// Welford style co-moment state of two aligned streams of rows. Rows can
+/// be added and removed in `O(src_dim * tgt_dim)`, which keeps covariance
+/// and correlation over a rolling window without revisiting the window.
+#[derive(Debug, Clone, Default)]
+pub struct RollingCovariance {
+    n: usize,
+    src_mean: Vec<f64>,
+    tgt_mean: Vec<f64>,
+    src_m2: Vec<f64>,
+    tgt_m2: Vec<f64>,
+    comoment: Vec<f64>,
+}
+
+impl RollingCovariance {
+    pub fn new(src_dim: usize, tgt_dim: usize) -> Self {
+        RollingCovariance {
+            n: 0,
+            src_mean: vec![0.0; src_dim],
+            tgt_mean: vec![0.0; tgt_dim],
+            src_m2: vec![0.0; src_dim],
+            tgt_m2: vec![0.0; tgt_dim],
+            comoment: vec![0.0; src_dim * tgt_dim],
+        }
+    }
+
+    /// Builds the state from two sequences of rows paired by position.
+    pub fn from_rows<'a, I>(rows: I) -> Self
+    where
+        I: IntoIterator<Item = (&'a [f64], &'a [f64])>,
+    {
+        let mut state = RollingCovariance::default();
+        for (src, tgt) in rows {
+            state.add(src, tgt);
+        }
+        state
+    }
+
+    pub fn len(&self) -> usize {
+        self.n
+    }
+
+    pub fn dims(&self) -> (usize, usize) {
+        (self.src_mean.len(), self.tgt_mean.len())
+    }
+
+    pub fn add(&mut self, src: &[f64], tgt: &[f64]) {
+        if self.n == 0 && self.dims() != (src.len(), tgt.len()) {
+            *self = RollingCovariance::new(src.len(), tgt.len());
+        }
+        if self.dims() != (src.len(), tgt.len()) {
+            return;
+        }
+        self.n += 1;
+        let n = self.n as f64;
+        let cols = tgt.len();
+        let src_delta: Vec<f64> = src.iter().zip(&self.src_mean).map(|(x, m)| x - m).collect();
+        for (i, delta) in src_delta.iter().enumerate() {
+            self.src_mean[i] += delta / n;
+            self.src_m2[i] += delta * (src[i] - self.src_mean[i]);
+        }
+        for (j, y) in tgt.iter().enumerate() {
+            let delta = y - self.tgt_mean[j];
+            self.tgt_mean[j] += delta / n;
+            self.tgt_m2[j] += delta * (y - self.tgt_mean[j]);
+        }
+        for (i, delta) in src_delta.iter().enumerate() {
+            for (j, y) in tgt.iter().enumerate() {
+                self.comoment[i * cols + j] += delta * (y - self.tgt_mean[j]);
+            }
+        }
+    }
+
+    /// Reverses an `add` of the same rows.
+    pub fn remove(&mut self, src: &[f64], tgt: &[f64]) {
+        if self.n == 0 || self.dims() != (src.len(), tgt.len()) {
+            return;
+        }
+        if self.n == 1 {
+            *self = RollingCovariance::new(src.len(), tgt.len());
+            return;
+        }
+        let n = self.n as f64;
+        self.n -= 1;
+        let cols = tgt.len();
+        let src_delta: Vec<f64> = src
+            .iter()
+            .zip(&self.src_mean)
+            .map(|(x, m)| x - (n * m - x) / (n - 1.0))
+            .collect();
+        for (j, y) in tgt.iter().enumerate() {
+            let mean = self.tgt_mean[j];
+            for (i, delta) in src_delta.iter().enumerate() {
+                self.comoment[i * cols + j] -= delta * (y - mean);
+            }
+            let shrunk = (n * mean - y) / (n - 1.0);
+            self.tgt_m2[j] -= (y - shrunk) * (y - mean);
+            self.tgt_mean[j] = shrunk;
+        }
+        for (i, delta) in src_delta.iter().enumerate() {
+            self.src_m2[i] -= delta * (src[i] - self.src_mean[i]);
+            self.src_mean[i] = src[i] - delta;
+        }
+    }
+
+    /// Sample covariance, `(src_dim, tgt_dim)`, zero for a single row.
+    pub fn covariance(&self) -> Option<na::DMatrix<f64>> {
+        if self.n == 0 {
+            return None;
+        }
+        let (rows, cols) = self.dims();
+        let denom = self.n.saturating_sub(1).max(1) as f64;
+        Some(na::DMatrix::from_fn(rows, cols, |i, j| {
+            self.comoment[i * cols + j] / denom
+        }))
+    }
+
+    /// Pearson correlation, `(src_dim, tgt_dim)`, zero where either column
+    /// is constant.
+    pub fn correlation(&self) -> Option<na::DMatrix<f64>> {
+        if self.n == 0 {
+            return None;
+        }
+        let (rows, cols) = self.dims();
+        Some(na::DMatrix::from_fn(rows, cols, |i, j| {
+            let scale = (self.src_m2[i] * self.tgt_m2[j]).sqrt();
+            if scale > 0.0 {
+                self.comoment[i * cols + j] / scale
+            } else {
+                0.0
+            }
+        }))
+    }
+}
+
+impl Record for RollingCovariance {
+    fn encode(&self, out: &mut Encoder) {
+        out.usize(self.n);
+        for values in [
+            &self.src_mean,
+            &self.tgt_mean,
+            &self.src_m2,
+            &self.tgt_m2,
+            &self.comoment,
+        ] {
+            out.f64s(values);
+        }
+    }
+
+    fn decode(input: &mut Decoder) -> io::Result<Self> {
+        let state = RollingCovariance {
+            n: input.usize()?,
+            src_mean: input.f64s()?,
+            tgt_mean: input.f64s()?,
+            src_m2: input.f64s()?,
+            tgt_m2: input.f64s()?,
+            comoment: input.f64s()?,
+        };
+        let (rows, cols) = state.dims();
+        if state.src_m2.len() != rows
+            || state.tgt_m2.len() != cols
+            || state.comoment.len() != rows * cols
+        {
+            return Err(invalid("inconsistent covariance state"));
+        }
+        Ok(state)
+    }
+}
+
+fn rolling_from_mats(
+    src_mat: &na::DMatrix<f64>,
+    tgt_mat: &na::DMatrix<f64>,
+) -> Option<RollingCovariance> {
+    if src_mat.nrows() != tgt_mat.nrows() {
+        return None;
+    }
+    let mut state = RollingCovariance::new(src_mat.ncols(), tgt_mat.ncols());
+    let (mut src, mut tgt) = (Vec::new(), Vec::new());
+    for r in 0..src_mat.nrows() {
+        src.clear();
+        src.extend((0..src_mat.ncols()).map(|c| src_mat[(r, c)]));
+        tgt.clear();
+        tgt.extend((0..tgt_mat.ncols()).map(|c| tgt_mat[(r, c)]));
+        state.add(&src, &tgt);
+    }
+    Some(state)
+}
+
+/// Covariance between the columns of two matrices whose rows are paired.
 pub fn compute_covariance(
     src_mat: na::DMatrix<f64>,
     tgt_mat: na::DMatrix<f64>,
 ) -> Option<na::DMatrix<f64>> {
-    if src_mat.nrows() != tgt_mat.nrows() {
-        return None;
-    }
-    let n = src_mat.nrows() as f64;
-    let src_mean = src_mat.column_mean();
-    let tgt_mean = tgt_mat.column_mean();
-    let centered_src = src_mat.clone()
-        - na::DMatrix::from_fn(src_mat.nrows(), src_mat.ncols(), |r, _| src_mean[r]);
-    let centered_tgt = tgt_mat.clone()
-        - na::DMatrix::from_fn(tgt_mat.nrows(), tgt_mat.ncols(), |r, _| tgt_mean[r]);
-    let covariance = (centered_src.transpose() * centered_tgt) / (n - 1.0);
-    Some(covariance)
+    rolling_from_mats(&src_mat, &tgt_mat)?.covariance()
 }
 
+/// Correlation between the columns of two matrices whose rows are paired.
 pub fn compute_correlation(
     src_mat: na::DMatrix<f64>,
     tgt_mat: na::DMatrix<f64>,
 ) -> Option<na::DMatrix<f64>> {
-    if src_mat.nrows() != tgt_mat.nrows() {
-        return None;
+    rolling_from_mats(&src_mat, &tgt_mat)?.correlation()
+}
+
+/// Covariance and correlation from a single pass over the rows.
+pub fn compute_moments(
+    src_mat: na::DMatrix<f64>,
+    tgt_mat: na::DMatrix<f64>,
+) -> Option<(Option<na::DMatrix<f64>>, Option<na::DMatrix<f64>>)> {
+    let state = rolling_from_mats(&src_mat, &tgt_mat)?;
+    Some((state.covariance(), state.correlation()))
+}
+
+/// Number of threads `par_map` uses when no count is configured.
+pub fn default_workers() -> usize {
+    std::thread::available_parallelism()
+        .map(|n| n.get())
+        .unwrap_or(1)
+}
+
+/// Maps `f` over `items` on up to `workers` scoped threads, each taking a
+/// contiguous chunk of at least `min_chunk` items, and returns the results
+/// in the order of `items`. Runs on the calling thread when there is not
+/// enough work to split.
+pub fn par_map<T, R, F>(items: &[T], workers: usize, min_chunk: usize, f: F) -> Vec<R>
+where
+    T: Sync,
+    R: Send,
+    F: Fn(&T) -> R + Sync,
+{
+    let workers = workers.min(items.len() / min_chunk.max(1));
+    if workers <= 1 {
+        return items.iter().map(f).collect();
     }
-    let n = src_mat.nrows() as f64;
-    let src_mean = src_mat.column_mean();
-    let tgt_mean = tgt_mat.column_mean();
-    let centered_src = src_mat.clone()
-        - na::DMatrix::from_fn(src_mat.nrows(), src_mat.ncols(), |r, _| src_mean[r]);
-    let centered_tgt = tgt_mat.clone()
-        - na::DMatrix::from_fn(tgt_mat.nrows(), tgt_mat.ncols(), |r, _| tgt_mean[r]);
-    let src_std = centered_src.column_variance().map(|var| var.sqrt());
-    let tgt_std = centered_tgt.column_variance().map(|var| var.sqrt());
-
-    let standardized_src = centered_src.component_div(&na::DMatrix::from_fn(
-        src_mat.nrows(),
-        src_mat.ncols(),
-        |r, _| src_std[r],
-    ));
-    let standardized_tgt = centered_tgt.component_div(&na::DMatrix::from_fn(
-        tgt_mat.nrows(),
-        tgt_mat.ncols(),
-        |r, _| tgt_std[r],
-    ));
-
-    let correlation = (standardized_src.transpose() * standardized_tgt) / (n - 1.0);
-    Some(correlation)
+    let chunk = items.len().div_ceil(workers);
+    let f = &f;
+    std::thread::scope(|scope| {
+        let handles: Vec<_> = items
+            .chunks(chunk)
+            .map(|chunk| scope.spawn(move || chunk.iter().map(f).collect::<Vec<R>>()))
+            .collect();
+        handles
+            .into_iter()
+            .flat_map(|handle| {
+                handle
+                    .join()
+                    .unwrap_or_else(|panic| std::panic::resume_unwind(panic))
+            })
+            .collect()
+    })
+}
+
+lazy_static! {
+    /// Wall clock and monotonic clock read together once, used to map unix
+    /// timestamps onto `Instant` consistently across calls.
+    static ref CLOCK_ANCHOR: (Instant, SystemTime) = (Instant::now(), SystemTime::now());
+}
+
+fn instant_from_system(time: SystemTime) -> Instant {
+    let (instant, system) = *CLOCK_ANCHOR;
+    match time.duration_since(system) {
+        Ok(ahead) => instant + ahead,
+        Err(behind) => instant.checked_sub(behind.duration()).unwrap_or(instant),
+    }
+}
+
+/// Converts a unix timestamp in seconds to an `Instant`, equal timestamps
+/// always map to equal instants.
+pub fn instant_from_timestamp(timestamp: f64) -> Instant {
+    instant_from_system(UNIX_EPOCH + Duration::from_secs_f64(timestamp.max(0.0)))
+}
+
+/// Converts unix nanoseconds to an `Instant`, the inverse of
+/// `nanos_from_instant`. Unlike an `Instant` the nanoseconds mean the same
+/// thing in every process.
+pub fn instant_from_nanos(nanos: i64) -> Instant {
+    let offset = Duration::from_nanos(nanos.unsigned_abs());
+    if nanos >= 0 {
+        instant_from_system(UNIX_EPOCH + offset)
+    } else {
+        instant_from_system(UNIX_EPOCH - offset)
+    }
+}
+
+/// Unix nanoseconds of an `Instant`, exact for instants made by
+/// `instant_from_timestamp`.
+pub fn nanos_from_instant(instant: &Instant) -> i64 {
+    let (anchor, system) = *CLOCK_ANCHOR;
+    let time = if *instant >= anchor {
+        system + (*instant - anchor)
+    } else {
+        system - (anchor - *instant)
+    };
+    match time.duration_since(UNIX_EPOCH) {
+        Ok(after) => after.as_nanos() as i64,
+        Err(before) => -(before.duration().as_nanos() as i64),
+    }
+}
+
+/// Weight of an item `elapsed` seconds old, `1 - sigmoid(alpha * (ln(t) -
+/// shift))`, as `compute_time_decay` does on the Python side. Items from
+/// the future weigh nothing.
+pub fn time_decay(elapsed: f64, shift: f64, alpha: f64) -> f64 {
+    if elapsed < 0.0 {
+        return 0.0;
+    }
+    let shifted = elapsed.max(1e-3).ln() - shift;
+    1.0 - 1.0 / (1.0 + (-alpha * shifted).exp())
+}
+
+/// `time_decay` over a slice of ages.
+pub fn time_decays(elapsed: &[f64], shift: f64, alpha: f64) -> Vec<f64> {
+    elapsed
+        .iter()
+        .map(|&elapsed| time_decay(elapsed, shift, alpha))
+        .collect()
+}
+
+/// Range of a `DecayTable` in log seconds, from a millisecond to ~30 years.
+const DECAY_LOG_RANGE: (f64, f64) = (-6.907755278982137, 20.72326583694641);
+
+/// `time_decay` for one setting, tabulated over the log age and read back
+/// by linear interpolation, like `DecayTable` on the Python side.
+#[derive(Debug, Clone)]
+pub struct DecayTable {
+    shift: f64,
+    alpha: f64,
+    scale: f64,
+    values: Vec<f64>,
+}
+
+impl DecayTable {
+    pub fn new(shift: f64, alpha: f64, size: usize) -> Self {
+        let size = size.max(2);
+        let (lo, hi) = DECAY_LOG_RANGE;
+        let step = (hi - lo) / (size - 1) as f64;
+        let mut values: Vec<f64> = (0..size)
+            .map(|i| time_decay((lo + step * i as f64).exp(), shift, alpha))
+            .collect();
+        values.push(values[size - 1]);
+        DecayTable {
+            shift,
+            alpha,
+            scale: 1.0 / step,
+            values,
+        }
+    }
+
+    pub fn setting(&self) -> (f64, f64) {
+        (self.shift, self.alpha)
+    }
+
+    pub fn get(&self, elapsed: f64) -> f64 {
+        if elapsed < 0.0 {
+            return 0.0;
+        }
+        let position = ((elapsed.max(1e-3).ln() - DECAY_LOG_RANGE.0) * self.scale)
+            .clamp(0.0, (self.values.len() - 2) as f64);
+        let index = position as usize;
+        let weight = position - index as f64;
+        self.values[index] * (1.0 - weight) + self.values[index + 1] * weight
+    }
+
+    pub fn apply(&self, elapsed: &[f64]) -> Vec<f64> {
+        elapsed.iter().map(|&elapsed| self.get(elapsed)).collect()
+    }
+}
+
+/// Age at which `time_decay` falls to `threshold`, in closed form so that
+/// expiry can be decided by comparing timestamps.
+pub fn decay_horizon(threshold: f64, shift: f64, alpha: f64) -> Duration {
+    let threshold = threshold.clamp(f64::MIN_POSITIVE, 1.0);
+    let seconds = (shift + ((1.0 - threshold) / threshold).ln() / alpha).exp();
+    Duration::try_from_secs_f64(seconds).unwrap_or(Duration::MAX)
 }
 
 pub fn get_company(symbol: String) -> Option<String> {
@@ -88,3 +415,103 @@ lazy_static! {
         m
     };
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_par_map() {
+        let items: Vec<usize> = (0..1000).collect();
+        let expected: Vec<usize> = items.iter().map(|x| x * x).collect();
+        assert_eq!(par_map(&items, 4, 8, |x| x * x), expected);
+        assert_eq!(par_map(&items, 1, 8, |x| x * x), expected);
+        assert_eq!(par_map(&items[..3], 4, 8, |x| x * x), expected[..3]);
+        assert!(par_map(&items[..0], 4, 8, |x| x * x).is_empty());
+    }
+
+    #[test]
+    fn test_instant_nanos() {
+        for timestamp in [0.0, 1_700_000_000.0, 1_700_000_060.25] {
+            let instant = instant_from_timestamp(timestamp);
+            let nanos = nanos_from_instant(&instant);
+            assert_eq!(nanos as u128, Duration::from_secs_f64(timestamp).as_nanos());
+            assert_eq!(instant_from_nanos(nanos), instant);
+        }
+        let now = Instant::now();
+        assert_eq!(instant_from_nanos(nanos_from_instant(&now)), now);
+    }
+
+    #[test]
+    fn test_time_decay() {
+        assert_eq!(time_decay(-1.0, 7.0, 0.5), 0.0);
+        assert!((time_decay(7f64.exp(), 7.0, 0.5) - 0.5).abs() < 1e-12);
+        assert!(time_decay(60.0, 7.0, 0.5) > time_decay(3600.0, 7.0, 0.5));
+
+        let horizon = decay_horizon(0.1, 7.0, 0.5).as_secs_f64();
+        assert!((time_decay(horizon, 7.0, 0.5) - 0.1).abs() < 1e-9);
+        assert_eq!(decay_horizon(0.0, 7.0, 0.0), Duration::MAX);
+
+        let elapsed: Vec<f64> = (0..500).map(|i| (i as f64 - 5.0).powi(3)).collect();
+        let table = DecayTable::new(7.0, 0.5, 4096);
+        for (exact, approx) in time_decays(&elapsed, 7.0, 0.5)
+            .iter()
+            .zip(table.apply(&elapsed))
+        {
+            assert!((exact - approx).abs() < 1e-6);
+        }
+        assert_eq!(table.get(-1.0), 0.0);
+        assert_eq!(table.get(1e12), table.get(1e9));
+    }
+
+    #[test]
+    fn test_rolling_covariance() {
+        let rows: Vec<(Vec<f64>, Vec<f64>)> = (0..20)
+            .map(|i| {
+                let x = i as f64;
+                (vec![x, (x * 0.7).sin()], vec![x * x % 7.0, 3.0 - x, 1.0])
+            })
+            .collect();
+        let window = 6;
+        let mut state = RollingCovariance::default();
+        for (i, (src, tgt)) in rows.iter().enumerate() {
+            state.add(src, tgt);
+            if i >= window {
+                let (src, tgt) = &rows[i - window];
+                state.remove(src, tgt);
+            }
+        }
+        assert_eq!(state.len(), window);
+
+        let expected = RollingCovariance::from_rows(
+            rows[rows.len() - window..]
+                .iter()
+                .map(|(src, tgt)| (src.as_slice(), tgt.as_slice())),
+        );
+        let (cov, expected_cov) = (state.covariance().unwrap(), expected.covariance().unwrap());
+        let (corr, expected_corr) = (
+            state.correlation().unwrap(),
+            expected.correlation().unwrap(),
+        );
+        for i in 0..2 {
+            for j in 0..3 {
+                assert!((cov[(i, j)] - expected_cov[(i, j)]).abs() < 1e-9);
+                assert!((corr[(i, j)] - expected_corr[(i, j)]).abs() < 1e-9);
+            }
+        }
+        assert_eq!(corr[(0, 2)], 0.0);
+        assert!((corr[(0, 1)] + 1.0).abs() < 1e-9);
+    }
+
+    #[test]
+    fn test_instant_from_timestamp() {
+        let now = SystemTime::now().duration_since(UNIX_EPOCH).unwrap();
+        let a = instant_from_timestamp(now.as_secs_f64() - 3600.0);
+        let b = instant_from_timestamp(now.as_secs_f64() - 3600.0);
+        let c = instant_from_timestamp(now.as_secs_f64() - 3540.0);
+        assert_eq!(a, b);
+        assert!(c > a);
+        let diff = c.duration_since(a).as_secs_f64();
+        assert!((diff - 60.0).abs() < 1e-3);
+    }
+}
@@ -1 +1,3 @@
+pub mod bench;
+pub mod codec;
 pub mod helpers;